@@ -0,0 +1,172 @@
+"""
+Синхронные и асинхронные view новостей под ASGI.
+
+Приложение get_asgi_application() вызывается напрямую, без сети, из
+--connections одновременных «соединений» (корутин), каждое из которых
+шлёт запросы подряд, пока не наберётся --requests. Прогон повторяется
+с синхронными view и с асинхронными (NEWS_ASYNC_VIEWS), печатается
+пропускная способность и перцентили времени ответа:
+
+    python -m benchmarks.asgi --connections 500 --requests 5000
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+from . import harness, setup
+
+
+async def call(application, path):
+    """Один GET через интерфейс ASGI; возвращает код ответа."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    status = None
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    return status
+
+
+async def load(application, paths, connections, requests):
+    samples = []
+    remaining = requests
+
+    async def connection():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            status = await call(application, random.choice(paths))
+            samples.append(harness.Sample(
+                (time.perf_counter() - start) * 1000, 0, status
+            ))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(connections)))
+    return samples, time.perf_counter() - started
+
+
+def use_async_views(enabled):
+    from django.conf import settings
+    from django.urls import clear_url_caches
+
+    import news.urls
+    import yanews.urls
+
+    settings.NEWS_ASYNC_VIEWS = enabled
+    importlib.reload(news.urls)
+    importlib.reload(yanews.urls)
+    clear_url_caches()
+
+
+def get_paths(sample_size=100):
+    from django.urls import reverse
+
+    from news.models import News
+
+    news_ids = News.objects.order_by('?').values_list(
+        'pk', flat=True
+    )[:sample_size]
+    return [reverse('news:home')] + [
+        reverse('news:detail', args=(pk,)) for pk in news_ids
+    ]
+
+
+def run_mode(name, paths, args):
+    from django.core.asgi import get_asgi_application
+
+    from news.instrumentation import metrics
+
+    use_async_views(name == 'async')
+    application = get_asgi_application()
+    asyncio.run(load(application, paths, 10, args.warmup))
+    metrics.clear()
+    samples, elapsed = asyncio.run(
+        load(application, paths, args.connections, args.requests)
+    )
+    result = harness.summarize(samples, elapsed)
+    result['queries_per_request'] = round(
+        metrics.total('sql_queries_total') / len(samples), 2
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=20,
+                        help='Комментариев к каждой новости.')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--connections', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--threads', type=int,
+                        help='Размер пула БД асинхронных view.')
+    parser.add_argument('--output', type=Path, help='Файл для отчёта JSON.')
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+
+    from news.seeding import seed_news, seed_users
+
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    if args.threads is not None:
+        settings.ASYNC_DB_THREADS = args.threads
+    # Под такой нагрузкой предупреждения о медленных запросах — шум.
+    settings.SQL_SLOW_QUERY_MS = float('inf')
+    workers = os.cpu_count()
+    users, _ = seed_users(args.users, 'password', 5000, workers)
+    seed_news(args.news, args.comments, users, 5000, workers)
+    paths = get_paths()
+
+    report = {
+        'commit': harness.get_commit(),
+        'connections': args.connections,
+        'async_db_threads': settings.ASYNC_DB_THREADS,
+        'modes': {},
+    }
+    print(
+        f'{"view":<8}{"p50":>9}{"p95":>9}{"p99":>9}'
+        f'{"зап/с":>9}{"SQL":>7}{"ошибки":>8}'
+    )
+    for name in ('sync', 'async'):
+        result = run_mode(name, paths, args)
+        report['modes'][name] = result
+        print(
+            f'{name:<8}{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}'
+            f'{result["p99_ms"]:>9.2f}{result["throughput_rps"]:>9.0f}'
+            f'{result["queries_per_request"]:>7.1f}{result["errors"]:>8}'
+        )
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2)
+        )
+
+
+if __name__ == '__main__':
+    main()
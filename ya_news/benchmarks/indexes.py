@@ -0,0 +1,153 @@
+"""
+Влияние составных индексов на планы и время запросов.
+
+Заполняет отдельную базу новостями и комментариями, затем для каждого
+запроса, которым пользуются представления, печатает план
+(EXPLAIN QUERY PLAN) и медиану времени с составными индексами и без них
+(остаются только неявные индексы внешних ключей).
+
+    python -m benchmarks.indexes --comments 1000000
+"""
+import argparse
+import random
+
+from . import measure, setup
+
+BATCH_SIZE = 10000
+
+
+def seed(news_count, comments_count, users_count):
+    from datetime import date, timedelta
+
+    from django.contrib.auth import get_user_model
+
+    from news.models import Comment, News
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'reader{index}') for index in range(users_count)
+    )
+    today = date.today()
+    News.objects.bulk_create(
+        (
+            News(
+                title=f'Новость {index}',
+                text='Текст новости.',
+                date=today - timedelta(days=index % 3650),
+            )
+            for index in range(news_count)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    for start in range(0, comments_count, BATCH_SIZE):
+        size = min(BATCH_SIZE, comments_count - start)
+        Comment.objects.bulk_create(
+            Comment(
+                news_id=random.choice(news_ids),
+                author_id=random.choice(user_ids),
+                text='Текст комментария.',
+            )
+            for _ in range(size)
+        )
+
+
+def get_queries():
+    from django.db.models import Count
+
+    from news.models import Comment, News
+    from news.pagination import FORWARD, KeysetPaginator
+
+    hot_news = News.objects.annotate(
+        total=Count('comment')
+    ).order_by('-total').values_list('pk', flat=True)[0]
+    busy_author = Comment.objects.values('author').annotate(
+        total=Count('pk')
+    ).order_by('-total').values_list('author', flat=True)[0]
+    comments = KeysetPaginator(
+        Comment.objects.filter(news_id=hot_news), ('created', 'id'), 50
+    )
+    middle = comments.queryset.order_by('created', 'id')[
+        comments.queryset.count() // 2
+    ]
+    news = KeysetPaginator(News.objects.all(), ('-date', '-id'), 10)
+    oldest = News.objects.order_by('date', 'id')[100]
+    return {
+        'comments of news, first page': comments.get_page().queryset,
+        'comments of news, deep page': comments.get_page(
+            comments.encode_cursor(middle, FORWARD)
+        ).queryset,
+        'comments of author': Comment.objects.filter(
+            author_id=busy_author
+        ).order_by('created')[:50],
+        'news home page': news.get_page().queryset,
+        'news deep page': news.get_page(
+            news.encode_cursor(oldest, FORWARD)
+        ).queryset,
+    }
+
+
+def explain(queryset):
+    from django.db import connection
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return '; '.join(row[-1] for row in cursor.fetchall())
+
+
+def run(queries, repeat):
+    return {
+        name: (
+            explain(queryset),
+            measure(lambda: list(queryset.all()), repeat),
+        )
+        for name, queryset in queries.items()
+    }
+
+
+def composite_indexes():
+    from news.models import Comment, News
+
+    for model in (News, Comment):
+        for index in model._meta.indexes:
+            yield model, index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--news', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--db', help='Файл базы (по умолчанию временный).')
+    args = parser.parse_args()
+
+    setup(args.db)
+    from django.db import connection
+
+    seed(args.news, args.comments, args.users)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    queries = get_queries()
+
+    with_indexes = run(queries, args.repeat)
+    with connection.schema_editor() as editor:
+        for model, index in composite_indexes():
+            editor.remove_index(model, index)
+    without_indexes = run(queries, args.repeat)
+    with connection.schema_editor() as editor:
+        for model, index in composite_indexes():
+            editor.add_index(model, index)
+
+    for name in queries:
+        plan_before, time_before = without_indexes[name]
+        plan_after, time_after = with_indexes[name]
+        print(f'{name}:')
+        print(f'  без индексов  {time_before:9.3f} ms  {plan_before}')
+        print(f'  с индексами   {time_after:9.3f} ms  {plan_after}')
+
+
+if __name__ == '__main__':
+    main()
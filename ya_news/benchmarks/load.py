@@ -0,0 +1,86 @@
+"""
+Нагрузочный прогон всех страниц news.urls.
+
+Заполняет отдельную базу новостями, комментариями и читателями (как
+команда seed_news) и обходит каждую страницу в несколько потоков.
+Отчёт JSON можно сравнить с прошлым прогоном:
+
+    python -m benchmarks.load --output before.json
+    python -m benchmarks.load --baseline before.json --threshold 0.2
+"""
+import argparse
+import os
+import sys
+
+from . import harness, setup
+
+# Сколько разных адресов обходить для страниц с параметром.
+SAMPLE_SIZE = 100
+
+
+def get_routes():
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from news.models import Comment, News
+    from news.seeding import WORDS
+
+    from .harness import Route
+
+    news_ids = list(
+        News.objects.order_by('?').values_list('pk', flat=True)[:SAMPLE_SIZE]
+    )
+    reader = get_user_model().objects.filter(comment__isnull=False).first()
+    comment_ids = list(
+        Comment.objects.filter(author=reader).values_list(
+            'pk', flat=True
+        )[:SAMPLE_SIZE]
+    )
+    detail = [reverse('news:detail', args=(pk,)) for pk in news_ids]
+    return [
+        Route('news:home', [reverse('news:home')], None),
+        Route(
+            'news:search',
+            [f'{reverse("news:search")}?q={word}' for word in WORDS],
+            None,
+        ),
+        Route('news:detail', detail, None),
+        Route('news:detail (reader)', detail, reader),
+        Route(
+            'news:edit',
+            [reverse('news:edit', args=(pk,)) for pk in comment_ids],
+            reader,
+        ),
+        Route(
+            'news:delete',
+            [reverse('news:delete', args=(pk,)) for pk in comment_ids],
+            reader,
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=20,
+                        help='Комментариев к каждой новости.')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--seed-workers', type=int, default=os.cpu_count())
+    harness.add_arguments(parser)
+    args = parser.parse_args()
+
+    setup()
+    from news.seeding import seed_news, seed_users
+
+    users, _ = seed_users(args.users, 'password', 5000, args.seed_workers)
+    seed_news(args.news, args.comments, users, 5000, args.seed_workers)
+    data = {
+        'news': args.news,
+        'comments_per_news': args.comments,
+        'users': args.users,
+    }
+    sys.exit(harness.run(args, get_routes(), data))
+
+
+if __name__ == '__main__':
+    main()
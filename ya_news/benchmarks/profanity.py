@@ -0,0 +1,74 @@
+"""
+Проверка комментария на запрещённые слова: цикл по словарю против автомата.
+
+Словарь и текст генерируются случайно из русского алфавита. Цикл —
+прежний CommentForm.clean_text: по одной проверке «word in text» на
+каждое слово. Django для этого замера не нужен.
+
+    python -m benchmarks.profanity --words 10000 --text-size 50000
+"""
+import argparse
+import random
+import time
+
+from news.profanity import WordMatcher
+
+from . import measure
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(length):
+    return ''.join(random.choice(ALPHABET) for _ in range(length))
+
+
+def make_text(size, words, hits):
+    parts = []
+    length = 0
+    while length < size:
+        part = random_word(random.randint(2, 9))
+        parts.append(part)
+        length += len(part) + 1
+    for _ in range(hits):
+        parts.insert(random.randrange(len(parts)), random.choice(words))
+    return ' '.join(parts)[:size]
+
+
+def linear_scan(words, text):
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--words', type=int, default=10000)
+    parser.add_argument('--text-size', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # Длинные «основы», чтобы случайный текст не совпадал с ними сам.
+    words = [random_word(random.randint(8, 12)) for _ in range(args.words)]
+    start = time.perf_counter()
+    matcher = WordMatcher(words)
+    build = (time.perf_counter() - start) * 1000
+    print(f'Сборка автомата на {len(matcher)} слов: {build:.1f} ms')
+
+    for title, hits in (('чистый текст', 0), ('текст с нарушением', 1)):
+        text = make_text(args.text_size, words, hits)
+        assert linear_scan(words, text) == bool(matcher.search(text))
+        loop = measure(lambda: linear_scan(words, text), args.repeat)
+        search = measure(lambda: matcher.search(text), args.repeat)
+        findall = measure(lambda: matcher.findall(text), args.repeat)
+        print(f'{title}, {len(text)} символов:')
+        print(f'  цикл по словарю        {loop:9.2f} ms')
+        print(f'  автомат, search        {search:9.2f} ms')
+        print(f'  автомат, все позиции   {findall:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Одновременные чтение и запись: обычный SQLite и профиль production.
+
+Читатели открывают страницы новостей, писатели в то же время добавляют к
+ним комментарии. Прогон повторяется на копии одной и той же базы с
+бэкендом django.db.backends.sqlite3 без постоянных соединений и с
+бэкендом news.db (WAL, PRAGMA, очередь писателей) и CONN_MAX_AGE, как
+при SQLITE_PROFILE=production; печатаются пропускная способность,
+перцентили и число ошибок отдельно для чтения и записи:
+
+    python -m benchmarks.sqlite --readers 8 --writers 4 --duration 10
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from . import harness, setup
+
+PROFILES = {
+    'default': {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0},
+    'production': {'ENGINE': 'news.db', 'CONN_MAX_AGE': 600},
+}
+
+
+def use_profile(name, database):
+    """Переключает default на копию базы с настройками профиля."""
+    from django.conf import settings
+    from django.db import connections
+
+    connections['default'].close()
+    del connections['default']
+    settings.DATABASES['default'].update(PROFILES[name], NAME=database)
+
+
+def run_client(paths, user, deadline, post):
+    from django.db import close_old_connections, connection
+    from django.test import Client
+
+    # Ошибки базы должны попасть в отчёт кодом 500, а не прервать поток.
+    client = Client(raise_request_exception=False)
+    if user is not None:
+        client.force_login(user)
+    samples = []
+    try:
+        while time.perf_counter() < deadline:
+            path = random.choice(paths)
+            start = time.perf_counter()
+            if post:
+                response = client.post(path, {'text': 'Комментарий.'})
+            else:
+                response = client.get(path)
+            samples.append(harness.Sample(
+                (time.perf_counter() - start) * 1000, 0, response.status_code
+            ))
+            # Тестовый клиент не закрывает соединения после ответа, а
+            # WSGI-обработчик закрывает, если они старше CONN_MAX_AGE.
+            close_old_connections()
+    finally:
+        connection.close()
+    return samples
+
+
+def run_profile(name, database, paths, author, args):
+    use_profile(name, database)
+    deadline = time.perf_counter() + args.duration
+    results = {'read': [], 'write': []}
+    threads = []
+
+    def start(role, user, post):
+        thread = threading.Thread(target=lambda: results[role].extend(
+            run_client(paths, user, deadline, post)
+        ))
+        thread.start()
+        threads.append(thread)
+
+    started = time.perf_counter()
+    for _ in range(args.readers):
+        start('read', None, False)
+    for _ in range(args.writers):
+        start('write', author, True)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        role: harness.summarize(samples, elapsed)
+        for role, samples in results.items() if samples
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=20,
+                        help='Комментариев к каждой новости.')
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Длительность прогона каждого профиля, с.')
+    parser.add_argument('--output', type=Path, help='Файл для отчёта JSON.')
+    args = parser.parse_args()
+
+    database = setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from news.models import News
+    from news.seeding import seed_news, seed_users
+
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    # Под такой нагрузкой предупреждения о медленных запросах — шум.
+    settings.SQL_SLOW_QUERY_MS = float('inf')
+    workers = os.cpu_count()
+    users, _ = seed_users(100, 'password', 5000, workers)
+    seed_news(args.news, args.comments, users, 5000, workers)
+    author = get_user_model().objects.first()
+    paths = [
+        reverse('news:detail', args=(pk,))
+        for pk in News.objects.order_by('?').values_list(
+            'pk', flat=True
+        )[:100]
+    ]
+
+    report = {
+        'commit': harness.get_commit(),
+        'readers': args.readers,
+        'writers': args.writers,
+        'profiles': {},
+    }
+    print(
+        f'{"профиль":<12}{"":<8}{"p50":>9}{"p95":>9}{"p99":>9}'
+        f'{"зап/с":>9}{"ошибки":>8}'
+    )
+    for name in PROFILES:
+        copy = database.with_name(f'{name}.sqlite3')
+        shutil.copy(database, copy)
+        result = run_profile(name, copy, paths, author, args)
+        report['profiles'][name] = result
+        for role, summary in result.items():
+            print(
+                f'{name:<12}{role:<8}{summary["p50_ms"]:>9.2f}'
+                f'{summary["p95_ms"]:>9.2f}{summary["p99_ms"]:>9.2f}'
+                f'{summary["throughput_rps"]:>9.0f}{summary["errors"]:>8}'
+            )
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2)
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""
+JSON API новостей и комментариев для мобильных клиентов.
+
+Списки отдаются страницами по курсору (как на сайте) или, если клиент
+просит application/x-ndjson в заголовке Accept, выгружаются целиком
+потоком NDJSON: строки читаются из БД порциями по
+settings.API_EXPORT_CHUNK_SIZE, поэтому память процесса не растёт с
+размером выгрузки. Под ASGI выгрузка недоступна (ответ 406).
+
+Вход — обычная сессия сайта, запросы на запись проверяются на CSRF.
+Комментарии проверяет та же CommentForm, что и на сайте, а работать
+можно только со своими комментариями (CommentBase.get_queryset).
+"""
+import json
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (
+    Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+)
+from django.shortcuts import get_object_or_404
+from django.views import generic
+
+from .forms import CommentForm
+from .models import Comment, News
+from .pagination import InvalidCursor, KeysetPaginator
+from .views import CommentBase, add_comment, delete_comment
+
+NDJSON = 'application/x-ndjson'
+NEWS_FIELDS = ('id', 'title', 'text', 'date', 'comment_count')
+COMMENT_FIELDS = ('id', 'news_id', 'text', 'created', 'updated')
+
+
+def serialize_news(news):
+    return {name: getattr(news, name) for name in NEWS_FIELDS}
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.id,
+        'news': comment.news_id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created,
+        'updated': comment.updated,
+    }
+
+
+def error_response(status, message, **extra):
+    return JsonResponse(
+        {'error': message, **extra},
+        status=status,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def wants_ndjson(request):
+    """
+    Клиент явно просит NDJSON.
+
+    request.accepts() здесь не подходит: он согласен на NDJSON и при
+    Accept: */*, а такой заголовок шлют почти все клиенты.
+    """
+    media_types = request.headers.get('Accept', '').split(',')
+    return any(
+        media_type.split(';')[0].strip() == NDJSON
+        for media_type in media_types
+    )
+
+
+def stream_ndjson(queryset, serialize):
+    """Построчная выгрузка queryset без загрузки его в память целиком."""
+    for obj in queryset.iterator(chunk_size=settings.API_EXPORT_CHUNK_SIZE):
+        yield json.dumps(
+            serialize(obj), cls=DjangoJSONEncoder, ensure_ascii=False
+        ) + '\n'
+
+
+class ApiMixin:
+    """Ответы и ошибки, включая 401 и 404, — в JSON."""
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return error_response(HTTPStatus.NOT_FOUND, 'Не найдено.')
+        except BadRequest as error:
+            return error_response(HTTPStatus.BAD_REQUEST, str(error))
+
+    def handle_no_permission(self):
+        return error_response(HTTPStatus.UNAUTHORIZED, 'Требуется вход.')
+
+    def render(self, data, status=HTTPStatus.OK):
+        return JsonResponse(
+            data,
+            status=status,
+            encoder=DjangoJSONEncoder,
+            json_dumps_params={'ensure_ascii': False},
+        )
+
+    def get_form(self, instance=None):
+        """Форма комментария с данными из тела запроса — объекта JSON."""
+        try:
+            data = json.loads(self.request.body)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            raise BadRequest('Ожидается объект JSON.')
+        return CommentForm(data, instance=instance)
+
+    def form_invalid(self, form):
+        return self.render({'errors': form.errors}, HTTPStatus.BAD_REQUEST)
+
+
+class ListApiMixin(ApiMixin):
+    """Страница по курсору или вся выборка потоком NDJSON."""
+    list_queryset = None
+    ordering = None
+    serialize = None
+    cursor_kwarg = 'cursor'
+
+    def get_list_queryset(self):
+        """Выборка списка; зависящую от запроса задают переопределением."""
+        return self.list_queryset.all()
+
+    def list(self):
+        queryset = self.get_list_queryset().order_by(*self.ordering)
+        if wants_ndjson(self.request):
+            return self.ndjson_response(queryset)
+        paginator = KeysetPaginator(
+            queryset, self.ordering, settings.API_PAGE_SIZE
+        )
+        try:
+            page = paginator.get_page(
+                self.request.GET.get(self.cursor_kwarg)
+            )
+        except InvalidCursor as error:
+            raise BadRequest(error) from error
+        return self.render({
+            'results': [self.serialize(obj) for obj in page],
+            'next': page.next_cursor,
+        })
+
+    def ndjson_response(self, queryset):
+        """
+        Выгрузка NDJSON потоком; под ASGI — отказ 406.
+
+        ASGIHandler в Django 3.2 перебирает StreamingHttpResponse прямо в
+        цикле событий, где ORM запрещён, а асинхронные итераторы не
+        поддерживает. Собирать выгрузку в памяти нельзя — она растёт с
+        числом строк, поэтому под ASGI список читается страницами.
+        """
+        if isinstance(self.request, ASGIRequest):
+            return error_response(
+                HTTPStatus.NOT_ACCEPTABLE,
+                'Выгрузка NDJSON под ASGI недоступна, '
+                'читайте список страницами.',
+            )
+        return StreamingHttpResponse(
+            stream_ndjson(queryset, self.serialize), content_type=NDJSON
+        )
+
+
+class NewsListApi(ListApiMixin, generic.View):
+    """Новости, сначала свежие."""
+    list_queryset = News.objects.only(*NEWS_FIELDS)
+    ordering = ('-date', '-id')
+    serialize = staticmethod(serialize_news)
+
+    def get(self, request, *args, **kwargs):
+        return self.list()
+
+
+class NewsDetailApi(ApiMixin, generic.View):
+
+    def get(self, request, *args, **kwargs):
+        return self.render(
+            serialize_news(get_object_or_404(News, pk=kwargs['pk']))
+        )
+
+
+class NewsCommentsApi(ListApiMixin, generic.View):
+    """Видимые комментарии новости; добавить может вошедший посетитель."""
+    ordering = ('created', 'id')
+    serialize = staticmethod(serialize_comment)
+
+    def dispatch(self, request, *args, **kwargs):
+        # Для несуществующей новости — 404, а не пустой список.
+        if not News.objects.filter(pk=kwargs['pk']).exists():
+            return error_response(HTTPStatus.NOT_FOUND, 'Не найдено.')
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_list_queryset(self):
+        return Comment.objects.filter(
+            news_id=self.kwargs['pk'], is_hidden=False
+        ).select_related('author').only(
+            *COMMENT_FIELDS, 'author__username'
+        )
+
+    def get(self, request, *args, **kwargs):
+        return self.list()
+
+    def post(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        form = self.get_form()
+        if not form.is_valid():
+            return self.form_invalid(form)
+        comment = form.save(commit=False)
+        comment.news_id = self.kwargs['pk']
+        comment.author = request.user
+        add_comment(comment)
+        return self.render(serialize_comment(comment), HTTPStatus.CREATED)
+
+
+class OwnCommentsApi(ListApiMixin, CommentBase, generic.View):
+    """Комментарии вошедшего посетителя, сначала свежие."""
+    ordering = ('-created', '-id')
+    serialize = staticmethod(serialize_comment)
+
+    def get_list_queryset(self):
+        return self.get_queryset().select_related('author').only(
+            *COMMENT_FIELDS, 'author__username'
+        )
+
+    def get(self, request, *args, **kwargs):
+        return self.list()
+
+
+class CommentApi(
+        ApiMixin,
+        CommentBase,
+        generic.detail.SingleObjectMixin,
+        generic.View
+):
+    """Свой комментарий: прочитать, изменить текст, удалить."""
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('author')
+
+    def get(self, request, *args, **kwargs):
+        return self.render(serialize_comment(self.get_object()))
+
+    def patch(self, request, *args, **kwargs):
+        form = self.get_form(instance=self.get_object())
+        if not form.is_valid():
+            return self.form_invalid(form)
+        return self.render(serialize_comment(form.save()))
+
+    put = patch
+
+    def delete(self, request, *args, **kwargs):
+        delete_comment(self.get_object())
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
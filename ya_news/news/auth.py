@@ -0,0 +1,66 @@
+"""
+Пользователь сессии из кэша.
+
+AuthenticationMiddleware на каждом запросе загружает пользователя через
+бэкенд из сессии — это запрос к auth_user. CachedModelBackend хранит
+загруженного пользователя в кэше settings.AUTH_USER_CACHE_TIMEOUT
+секунд. Проверку хэша пароля в сессии по-прежнему выполняет
+django.contrib.auth.get_user, а при сохранении или удалении пользователя
+и при выходе запись сбрасывается (news/signals.py).
+
+Сброс виден другим процессам, только если кэш у них общий, поэтому
+бэкенд и сессии в кэше с кэшем одного процесса (LocMemCache) запрещает
+проверка check_shared_cache.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core import checks
+from django.core.cache import cache
+
+USER_KEY = 'news:user:{pk}'
+# Бэкенды кэша, у которых своё содержимое в каждом процессе.
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        key = USER_KEY.format(pk=user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+
+
+def forget_user(pk):
+    cache.delete(USER_KEY.format(pk=pk))
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Сессии и пользователь из кэша — только с общим для процессов кэшем."""
+    used = []
+    if f'{__name__}.CachedModelBackend' in settings.AUTHENTICATION_BACKENDS:
+        used.append(('CachedModelBackend', 'default'))
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        used.append((settings.SESSION_ENGINE, settings.SESSION_CACHE_ALIAS))
+    return [
+        checks.Error(
+            f'{name} хранит данные в кэше {alias!r} одного процесса: '
+            'выход и смена пароля не дойдут до других процессов.',
+            hint='Задайте общий кэш (memcached, Redis, FileBasedCache) '
+                 'или верните сессии в БД и ModelBackend.',
+            id='news.E001',
+        )
+        for name, alias in used
+        if settings.CACHES[alias]['BACKEND'] in PER_PROCESS_CACHES
+    ]
@@ -0,0 +1,267 @@
+import contextlib
+import hashlib
+import math
+import random
+import time
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+from .replicas import read_primary
+
+VERSION_KEY = 'news:{pk}:version'
+FRAGMENT_KEY = 'news:{pk}:v{version}:{name}:{variant}'
+PAGE_GENERATION_KEY = 'news:pages:generation'
+PAGE_KEY = 'news:page:{path}'
+PAGE_PART_KEY = 'news:pages:g{generation}:{name}:{variant}'
+# Есть, пока реплики могут не знать о последнем изменении новостей.
+RECENT_WRITE_KEY = 'news:recent_write'
+# Сколько секунд после истечения ещё можно отдавать устаревшую копию,
+# пока один воркер её пересчитывает.
+PAGE_CACHE_STALE_TIMEOUT = 60
+PAGE_CACHE_LOCK_TIMEOUT = 5
+# Сколько секунд ждать чужой пересчёт страницы, которой нет в кэше,
+# прежде чем построить её самому.
+PAGE_CACHE_WAIT_TIMEOUT = 0.5
+PAGE_CACHE_POLL_INTERVAL = 0.05
+PAGE_CACHE_BETA = 1.0
+
+
+def get_news_version(pk):
+    """
+    Текущая версия кэша новости.
+
+    Версия входит в ключ каждого фрагмента, поэтому для сброса кэша
+    достаточно её увеличить. Если ключ версии вытеснен из кэша, новая
+    версия начинается с текущего времени и не совпадает со старыми.
+    """
+    key = VERSION_KEY.format(pk=pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_news_version(pk):
+    """Делает недействительными все закэшированные фрагменты новости."""
+    key = VERSION_KEY.format(pk=pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate_news(*pks):
+    """
+    После коммита транзакции сбрасывает кэш новостей pks и кэш страниц.
+
+    Сброс внутри транзакции опасен: параллельный запрос успеет прочитать
+    ещё старые данные и закэшировать их уже под новой версией. Вне
+    транзакции сброс выполняется сразу.
+    """
+    def bump():
+        # До новых версий: кто их увидит, увидит и эту метку.
+        cache.set(RECENT_WRITE_KEY, True, settings.REPLICA_PIN_SECONDS)
+        for pk in pks:
+            bump_news_version(pk)
+        bump_page_generation()
+
+    transaction.on_commit(bump)
+
+
+def reading_for_cache():
+    """
+    Откуда читать данные, которые попадут в кэш.
+
+    Обычно — оттуда же, откуда и весь запрос: из реплики, а посетитель,
+    только что изменивший данные, — из основной базы. Но
+    REPLICA_PIN_SECONDS после любого изменения новостей реплика может
+    его ещё не знать, а кэш хранил бы старые данные под новой версией
+    до её следующей смены. Тогда кэш заполняется из основной базы.
+    """
+    if settings.NEWS_READ_REPLICAS and cache.get(RECENT_WRITE_KEY):
+        return read_primary()
+    return contextlib.nullcontext()
+
+
+def cached_fragment(pk, version, name, render, variant=''):
+    """Возвращает HTML фрагмента из кэша или рендерит и кэширует его."""
+    key = FRAGMENT_KEY.format(
+        pk=pk,
+        version=version,
+        name=name,
+        variant=hashlib.md5(variant.encode()).hexdigest(),
+    )
+    html = cache.get(key)
+    if html is None:
+        with reading_for_cache():
+            html = render()
+        cache.set(key, html, settings.NEWS_FRAGMENT_CACHE_TIMEOUT)
+    return html
+
+
+def cached_page_part(generation, name, load, variant=''):
+    """
+    Значение для страниц списков из кэша поколения generation.
+
+    Как cached_fragment, только сбрасывается вместе со всеми страницами
+    (bump_page_generation), а не с версией одной новости.
+    """
+    key = PAGE_PART_KEY.format(
+        generation=generation,
+        name=name,
+        variant=hashlib.md5(variant.encode()).hexdigest(),
+    )
+    value = cache.get(key)
+    if value is None:
+        with reading_for_cache():
+            value = load()
+        cache.set(key, value, settings.NEWS_PAGE_CACHE_TIMEOUT)
+    return value
+
+
+class CachedPage:
+    """Закэшированный ответ и данные для досрочного пересчёта."""
+
+    def __init__(self, response, generation, delta, expires):
+        self.content = response.content
+        self.content_type = response['Content-Type']
+        self.generation = generation
+        self.delta = delta
+        self.expires = expires
+
+    def is_fresh(self, generation):
+        """
+        Свеж ли ответ (XFetch).
+
+        Чем ближе срок истечения и чем дольше строилась страница, тем выше
+        вероятность, что очередной запрос пересчитает её заранее. Так
+        истечение не совпадает у всех воркеров одновременно.
+        """
+        if generation != self.generation:
+            return False
+        jitter = self.delta * PAGE_CACHE_BETA * -math.log(
+            1 - random.random()
+        )
+        return time.time() + jitter < self.expires
+
+    def to_response(self):
+        return HttpResponse(self.content, content_type=self.content_type)
+
+
+def get_page_key(path, params=()):
+    """
+    Ключ страницы path с GET-параметрами params.
+
+    Остальная строка запроса в ключ не входит: иначе запросы с
+    произвольными параметрами забивали бы кэш копиями одной страницы.
+    """
+    query = urlencode(sorted(
+        (name, value) for name, value in params if value
+    ))
+    if query:
+        path = f'{path}?{query}'
+    return PAGE_KEY.format(path=hashlib.md5(path.encode()).hexdigest())
+
+
+def get_page_generation():
+    generation = cache.get(PAGE_GENERATION_KEY)
+    if generation is None:
+        cache.add(PAGE_GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(PAGE_GENERATION_KEY)
+    return generation
+
+
+def bump_page_generation():
+    """Помечает все закэшированные страницы устаревшими."""
+    try:
+        cache.incr(PAGE_GENERATION_KEY)
+    except ValueError:
+        cache.add(PAGE_GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def cached_page(request, build, params=()):
+    """
+    Отдаёт страницу из кэша, пересчитывая её не более чем в одном воркере.
+
+    Пересчёт защищён блокировкой (cache.add атомарен): пока один воркер
+    строит страницу, остальные отдают устаревшую копию, а если её нет —
+    недолго ждут результата. Страница определяется путём и GET-параметрами
+    params (пары имя — значение).
+    """
+    key = get_page_key(request.path, params)
+    lock_key = key + ':lock'
+    generation = get_page_generation()
+    page = cache.get(key)
+    if page is not None and page.is_fresh(generation):
+        return page.to_response()
+    locked = cache.add(lock_key, True, PAGE_CACHE_LOCK_TIMEOUT)
+    if not locked:
+        if page is not None:
+            return page.to_response()
+        page = wait_for_page(key)
+        if page is not None:
+            return page.to_response()
+    try:
+        start = time.monotonic()
+        with reading_for_cache():
+            response = build()
+        if response.status_code == HTTPStatus.OK:
+            timeout = settings.NEWS_PAGE_CACHE_TIMEOUT
+            cache.set(
+                key,
+                CachedPage(
+                    response,
+                    generation,
+                    delta=time.monotonic() - start,
+                    expires=time.time() + timeout,
+                ),
+                timeout + PAGE_CACHE_STALE_TIMEOUT,
+            )
+        return response
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def wait_for_page(key):
+    deadline = time.monotonic() + PAGE_CACHE_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(PAGE_CACHE_POLL_INTERVAL)
+        page = cache.get(key)
+        if page is not None:
+            return page
+    return None
+
+
+class AnonymousPageCacheMixin:
+    """
+    Кэширует ответ целиком для анонимных GET-запросов.
+
+    В ключ кэша входит только курсор страницы (cursor_kwarg
+    KeysetPaginationMixin) без необязательного выравнивания base64.
+    """
+    cursor_kwarg = 'cursor'
+
+    def get_page_cache_params(self):
+        cursor = self.request.GET.get(self.cursor_kwarg, '')
+        return ((self.cursor_kwarg, cursor.rstrip('=')),)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+
+        def build():
+            response = super(AnonymousPageCacheMixin, self).dispatch(
+                request, *args, **kwargs
+            )
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+
+        return cached_page(request, build, self.get_page_cache_params())
@@ -0,0 +1,63 @@
+"""
+Условные GET-запросы: ETag и Last-Modified.
+
+Представление перечисляет в get_validators() то, по чему дешёвым
+запросом видно, изменилась ли страница. Если клиент или CDN прислал
+совпадающий If-None-Match (или If-Modified-Since), ответ 304 уходит
+сразу, без загрузки остальных данных и рендера шаблонов.
+"""
+import hashlib
+from http import HTTPStatus
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+
+    def get_validators(self):
+        """
+        Пара (части ETag, время изменения или None).
+
+        None вместо пары — проверка не нужна, страница отдаётся как
+        обычно (например, view сам ответит 404). По умолчанию проверки
+        нет.
+        """
+        return None
+
+    def get_etag(self, parts):
+        request = self.request
+        # Страница зависит от пользователя (ссылки, форма комментария), а
+        # токен в форме — от cookie CSRF, который меняется при входе.
+        parts = (
+            *parts,
+            request.get_full_path(),
+            request.user.pk,
+            request.META.get('CSRF_COOKIE'),
+        )
+        return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        validators = self.get_validators()
+        if validators is None:
+            return super().dispatch(request, *args, **kwargs)
+        parts, last_modified = validators
+        etag = self.get_etag(parts)
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        if response.status_code not in (
+            HTTPStatus.OK, HTTPStatus.NOT_MODIFIED
+        ):
+            return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Cookie',))
+        return response
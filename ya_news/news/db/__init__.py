@@ -0,0 +1,5 @@
+"""
+Бэкенд SQLite для нагрузки: ENGINE = 'news.db'.
+
+Подробности — в news/db/base.py.
+"""
@@ -1,7 +1,11 @@
+from functools import lru_cache
+
+from django.conf import settings
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .profanity import WordMatcher
 
 BAD_WORDS = (
     'редиска',
@@ -11,6 +15,24 @@ BAD_WORDS = (
 WARNING = 'Не ругайтесь!'
 
 
+@lru_cache(maxsize=None)
+def get_bad_words_matcher():
+    """
+    Автомат для поиска запрещённых слов.
+
+    Строится при первом обращении из BAD_WORDS и словаря из файла
+    settings.BAD_WORDS_FILE, если он задан.
+    """
+    if settings.BAD_WORDS_FILE:
+        return WordMatcher.from_file(settings.BAD_WORDS_FILE, BAD_WORDS)
+    return WordMatcher(BAD_WORDS)
+
+
+def reload_bad_words():
+    """Перечитать словарь: автомат пересоберётся при следующей проверке."""
+    get_bad_words_matcher.cache_clear()
+
+
 class CommentForm(ModelForm):
 
     class Meta:
@@ -20,8 +42,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if get_bad_words_matcher().search(text):
+            raise ValidationError(WARNING)
         return text
@@ -0,0 +1,252 @@
+"""
+Учёт SQL-запросов каждого HTTP-запроса.
+
+QueryInstrumentationMiddleware оборачивает все соединения с БД
+execute_wrapper и по окончании запроса:
+
+* пишет каждый SQL-запрос с длительностью и именем страницы в лог
+  news.sql на уровне DEBUG;
+* предупреждает о запросах дольше settings.SQL_SLOW_QUERY_MS
+  (slow_query) и об одинаковых запросах с одинаковыми параметрами,
+  повторённых за один HTTP-запрос (duplicate_query) — обычно это
+  повторный get_object() или N+1. Параметры запроса (в них бывают
+  пароли и личные данные) попадают в лог только при
+  settings.SQL_LOG_PARAMS;
+* увеличивает счётчики, которые страница news:metrics отдаёт в
+  текстовом формате Prometheus.
+
+Записи лога — JSON-объекты (см. JsonFormatter и LOGGING в настройках).
+Счётчики живут в памяти процесса, Prometheus собирает их с каждого.
+
+Обёртки запросов подключаются через wrap_queries(): они хранятся в
+contextvars, поэтому видят и запросы, которые асинхронные view и
+sync_to_async выполняют в других потоках.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .middleware import SyncAsyncMiddleware
+
+logger = logging.getLogger('news.sql')
+
+Query = namedtuple('Query', ('alias', 'sql', 'params', 'duration'))
+
+# Счётчики для Prometheus: имя и описание.
+METRICS = (
+    ('http_requests_total', 'Обработанных HTTP-запросов.'),
+    ('sql_queries_total', 'SQL-запросов при обработке HTTP-запросов.'),
+    ('sql_query_seconds_total', 'Суммарное время SQL-запросов, секунд.'),
+    ('sql_slow_queries_total', 'Медленных SQL-запросов.'),
+    ('sql_duplicate_queries_total', 'Повторов одинаковых SQL-запросов.'),
+)
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON: сообщение и поля из extra['data']."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage(),
+            **getattr(record, 'data', {}),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class Metrics:
+    """Счётчики по страницам; общие для всех потоков процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = Counter()
+
+    def add(self, name, view, value=1):
+        with self.lock:
+            self.values[name, view] += value
+
+    def get(self, name, view):
+        with self.lock:
+            return self.values[name, view]
+
+    def total(self, name):
+        """Сумма счётчика по всем страницам."""
+        with self.lock:
+            return sum(
+                value for (metric, _), value in self.values.items()
+                if metric == name
+            )
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def render(self):
+        """Счётчики в текстовом формате Prometheus."""
+        with self.lock:
+            values = sorted(self.values.items())
+        lines = []
+        for name, description in METRICS:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} counter')
+            lines.extend(
+                f'{name}{{view="{escape_label(view)}"}} {value:g}'
+                for (metric, view), value in values if metric == name
+            )
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def escape_label(value):
+    return (
+        value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    )
+
+
+# Обёртки execute_wrapper текущего запроса, от внешней к внутренней.
+query_wrappers = ContextVar('query_wrappers', default=())
+
+
+def dispatch(execute, sql, params, many, context):
+    """Передаёт запрос обёрткам из query_wrappers текущего контекста."""
+    for wrapper in reversed(query_wrappers.get()):
+        execute = _bind(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def _bind(wrapper, execute):
+    def call(sql, params, many, context):
+        return wrapper(execute, sql, params, many, context)
+    return call
+
+
+def install(connection):
+    """Подключает dispatch к соединению потока, если его там ещё нет."""
+    if dispatch not in connection.execute_wrappers:
+        # В начало списка: execute_wrapper() снимает свои обёртки с конца.
+        connection.execute_wrappers.insert(0, dispatch)
+
+
+@receiver(connection_created)
+def install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+def install_all():
+    for connection in connections.all():
+        install(connection)
+
+
+@contextmanager
+def wrap_queries(wrapper):
+    """
+    Пропускает через wrapper запросы к БД, выполненные в этом контексте.
+
+    В отличие от connection.execute_wrapper() действует на соединения
+    любого потока, куда переходит контекст: sync_to_async и пул
+    асинхронных view копируют contextvars.
+    """
+    install_all()
+    token = query_wrappers.set((*query_wrappers.get(), wrapper))
+    try:
+        yield
+    finally:
+        query_wrappers.reset(token)
+
+
+class QueryRecorder:
+    """Обёртка execute_wrapper, запоминающая запросы и их время."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(Query(
+                context['connection'].alias,
+                sql,
+                params,
+                time.perf_counter() - start,
+            ))
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unresolved'
+
+
+def report(request, queries):
+    """Пишет в лог и счётчики запросы одного HTTP-запроса."""
+    view = get_view_name(request)
+    context = {'view': view, 'method': request.method, 'path': request.path}
+    slow_ms = settings.SQL_SLOW_QUERY_MS
+    metrics.add('http_requests_total', view)
+    metrics.add('sql_queries_total', view, len(queries))
+    metrics.add(
+        'sql_query_seconds_total', view,
+        sum(query.duration for query in queries),
+    )
+    log_each = logger.isEnabledFor(logging.DEBUG)
+    for query in queries:
+        duration_ms = round(query.duration * 1000, 3)
+        data = {
+            **context,
+            'database': query.alias,
+            'sql': query.sql,
+            'duration_ms': duration_ms,
+        }
+        if log_each:
+            logger.debug('query', extra={'data': data})
+        if duration_ms > slow_ms:
+            metrics.add('sql_slow_queries_total', view)
+            logger.warning(
+                'slow_query',
+                extra={'data': {**data, 'threshold_ms': slow_ms}},
+            )
+    repeats = Counter(
+        (query.alias, query.sql, repr(query.params)) for query in queries
+    )
+    for (alias, sql, params), count in repeats.items():
+        if count == 1:
+            continue
+        metrics.add('sql_duplicate_queries_total', view, count - 1)
+        data = {**context, 'database': alias, 'sql': sql, 'count': count}
+        if settings.SQL_LOG_PARAMS:
+            data['params'] = params
+        logger.warning('duplicate_query', extra={'data': data})
+
+
+class QueryInstrumentationMiddleware(SyncAsyncMiddleware):
+    """Собирает SQL-запросы HTTP-запроса и передаёт их в report()."""
+
+    def handle(self, request):
+        recorder = QueryRecorder()
+        with wrap_queries(recorder):
+            response = self.get_response(request)
+        report(request, recorder.queries)
+        return response
+
+    async def ahandle(self, request):
+        recorder = QueryRecorder()
+        with wrap_queries(recorder):
+            response = await self.get_response(request)
+        report(request, recorder.queries)
+        return response
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.moderation import rescan_comments
+
+
+class Command(BaseCommand):
+    help = (
+        'Перепроверяет сохранённые комментарии на запрещённые слова '
+        'и скрывает нарушителей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Число процессов для проверки текста.',
+        )
+        parser.add_argument(
+            '--start-after',
+            type=int,
+            help='Начать с комментариев, чей id больше указанного.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=Path,
+            help=(
+                'Файл, куда после каждой порции записывается последний '
+                'проверенный id; при повторном запуске проверка '
+                'продолжится с него.'
+            ),
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать нарушения, ничего не скрывая.',
+        )
+
+    def get_start_after(self, options):
+        if options['start_after'] is not None:
+            return options['start_after']
+        checkpoint = options['checkpoint']
+        if checkpoint is None or not checkpoint.exists():
+            return 0
+        try:
+            return int(checkpoint.read_text().strip() or 0)
+        except ValueError:
+            raise CommandError(
+                f'Повреждён файл контрольной точки {checkpoint}'
+            )
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+
+        def on_chunk(stats):
+            if checkpoint is not None and not options['dry_run']:
+                checkpoint.write_text(str(stats.last_id))
+            self.stdout.write(
+                f'Проверено {stats.checked}, скрыто {stats.hidden}, '
+                f'последний id {stats.last_id}, '
+                f'{stats.rate:.0f} строк/с'
+            )
+
+        stats = rescan_comments(
+            start_after=self.get_start_after(options),
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+            on_chunk=on_chunk,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: проверено {stats.checked}, скрыто {stats.hidden} '
+            f'за {stats.elapsed:.1f} с ({stats.rate:.0f} строк/с)'
+        ))
@@ -0,0 +1,53 @@
+import pstats
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводит дампы cProfile, сохранённые ProfilingMiddleware, '
+        'по страницам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir',
+            type=Path,
+            default=settings.PROFILING_DUMP_DIR,
+            help='Каталог с дампами (по умолчанию PROFILING_DUMP_DIR).',
+        )
+        parser.add_argument(
+            '--view',
+            default='',
+            help='Только страницы, в имени которых есть эта строка.',
+        )
+        parser.add_argument(
+            '--sort',
+            default='cumulative',
+            help='Порядок строк профиля, как в pstats.',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Сколько функций показать для каждой страницы.',
+        )
+
+    def handle(self, *args, **options):
+        if options['dir'] is None or not Path(options['dir']).is_dir():
+            raise CommandError('Не найден каталог с дампами профилей.')
+        found = False
+        for directory in sorted(Path(options['dir']).iterdir()):
+            dumps = sorted(directory.glob('*.prof'))
+            if not dumps or options['view'] not in directory.name:
+                continue
+            found = True
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{directory.name}: запросов {len(dumps)}'
+            ))
+            stats = pstats.Stats(*map(str, dumps), stream=self.stdout)
+            stats.sort_stats(options['sort']).print_stats(options['limit'])
+        if not found:
+            self.stdout.write('Дампов профилей нет.')
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from news.models import Comment, News
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает News.comment_count по видимым комментариям '
+        'и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не меняя.',
+        )
+
+    def handle(self, *args, **options):
+        counts = Comment.objects.filter(
+            news=OuterRef('pk'), is_hidden=False
+        ).order_by().values('news').annotate(
+            total=Count('pk')
+        ).values('total')
+        actual = Coalesce(Subquery(counts), 0)
+        with transaction.atomic():
+            mismatched = dict(
+                News.objects.annotate(actual=actual).exclude(
+                    comment_count=F('actual')
+                ).values_list('pk', 'actual')
+            )
+            if not options['dry_run']:
+                pks = list(mismatched)
+                for start in range(0, len(pks), BATCH_SIZE):
+                    News.objects.filter(
+                        pk__in=pks[start:start + BATCH_SIZE]
+                    ).update(comment_count=actual)
+        for pk, total in mismatched.items():
+            self.stdout.write(f'Новость {pk}: {total}')
+        action = 'Найдено' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} расхождений: {len(mismatched)}'
+        ))
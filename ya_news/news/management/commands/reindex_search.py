@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс новостей и комментариев.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError('Поисковый индекс доступен только для SQLite.')
+        indexed = 0
+
+        def on_chunk(size):
+            nonlocal indexed
+            indexed += size
+            self.stdout.write(f'Проиндексировано {indexed}')
+
+        search.reindex(chunk_size=options['chunk_size'], on_chunk=on_chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: проиндексировано записей {indexed}'
+        ))
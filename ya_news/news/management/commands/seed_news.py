@@ -0,0 +1,67 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.seeding import seed_news, seed_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу читателями, новостями и комментариями '
+        'для стендов и замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--news', type=int, default=10000)
+        parser.add_argument(
+            '--comments',
+            type=int,
+            default=10,
+            help='Комментариев к каждой новости.',
+        )
+        parser.add_argument(
+            '--password',
+            default='password',
+            help='Общий пароль всех созданных читателей.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Строк в одной порции bulk_create.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов, создающих строки.',
+        )
+
+    def report(self, label):
+        def on_progress(stats):
+            self.stdout.write(
+                f'{label}: {stats.rows} строк, {stats.rate:.0f} строк/с'
+            )
+        return on_progress
+
+    def summary(self, label, stats):
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {stats.rows} строк за {stats.elapsed:.1f} с '
+            f'({stats.rate:.0f} строк/с)'
+        ))
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 and options['comments'] > 0:
+            raise CommandError('Комментариям нужен хотя бы один читатель.')
+        batch_size, workers = options['batch_size'], options['workers']
+        users, users_stats = seed_users(
+            options['users'], options['password'], batch_size, workers,
+            self.report('Читатели'),
+        )
+        self.summary('Читатели', users_stats)
+        news_stats = seed_news(
+            options['news'], options['comments'], users, batch_size,
+            workers, self.report('Новости и комментарии'),
+        )
+        self.summary('Новости и комментарии', news_stats)
@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from news.replicas import copy_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик — локальная замена '
+        'репликации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            action='append',
+            dest='databases',
+            help='Реплика из DATABASES; по умолчанию все, кроме default.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Повторять копирование каждые N секунд до прерывания.',
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['databases'] or [
+            alias for alias in settings.DATABASES
+            if alias != DEFAULT_DB_ALIAS
+        ]
+        if DEFAULT_DB_ALIAS in aliases:
+            raise CommandError('Основную базу нельзя копировать в себя.')
+        for alias in [DEFAULT_DB_ALIAS, *aliases]:
+            if alias not in settings.DATABASES:
+                raise CommandError(f'Нет базы {alias} в DATABASES.')
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError('Копирование доступно только для SQLite.')
+        while True:
+            for alias in aliases:
+                copy_database(connections[alias].settings_dict['NAME'])
+                self.stdout.write(f'Скопировано в {alias}')
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Реплики обновлены'))
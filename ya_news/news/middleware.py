@@ -0,0 +1,23 @@
+"""Основа middleware, работающих в синхронной и асинхронной цепочке."""
+import asyncio
+
+from django.utils.deprecation import MiddlewareMixin
+
+
+class SyncAsyncMiddleware(MiddlewareMixin):
+    """
+    Middleware, который Django может поставить в любую цепочку.
+
+    Асинхронным экземпляр помечает MiddlewareMixin, как и у встроенных
+    middleware Django. Подкласс реализует handle(request) для
+    синхронной цепочки и корутину ahandle(request) для асинхронной.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.ahandle(request)
+        return self.handle(request)
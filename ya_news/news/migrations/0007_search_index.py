@@ -0,0 +1,77 @@
+import re
+
+from django.db import migrations
+
+# Стемминг — алгоритм Snowball, FTS5 его не умеет; остальное — SQL
+# этой миграции, не зависящий от будущих правок news.search.
+from news.stemmer import stem
+
+CHUNK_SIZE = 2000
+WORD = re.compile(r'\w+')
+CREATE_INDEX_SQL = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS news_search USING fts5('
+    'title, body, news_id UNINDEXED)'
+)
+RANK_SQL = (
+    "INSERT INTO news_search(news_search, rank) "
+    "VALUES ('rank', 'bm25(5.0, 1.0)')"
+)
+INSERT_SQL = (
+    'INSERT OR REPLACE INTO news_search(rowid, title, body, news_id) '
+    'VALUES (%s, %s, %s, %s)'
+)
+OPTIMIZE_SQL = "INSERT INTO news_search(news_search) VALUES ('optimize')"
+DROP_SQL = 'DROP TABLE IF EXISTS news_search'
+# rowid = id * 2 для новостей и id * 2 + 1 для комментариев.
+NEWS_SQL = (
+    'SELECT id, id * 2, title, text, id FROM news_news '
+    'WHERE id > %s ORDER BY id LIMIT %s'
+)
+COMMENTS_SQL = (
+    'SELECT id, id * 2 + 1, \'\', text, news_id FROM news_comment '
+    'WHERE id > %s AND NOT is_hidden ORDER BY id LIMIT %s'
+)
+
+
+def stemmed(text):
+    return ' '.join(stem(word) for word in WORD.findall(text))
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(DROP_SQL)
+        cursor.execute(CREATE_INDEX_SQL)
+        cursor.execute(RANK_SQL)
+        for select_sql in (NEWS_SQL, COMMENTS_SQL):
+            last_id = 0
+            while True:
+                cursor.execute(select_sql, (last_id, CHUNK_SIZE))
+                chunk = cursor.fetchall()
+                if not chunk:
+                    break
+                last_id = chunk[-1][0]
+                cursor.executemany(INSERT_SQL, [
+                    (rowid, stemmed(title), stemmed(text), news_id)
+                    for _, rowid, title, text, news_id in chunk
+                ])
+        cursor.execute(OPTIMIZE_SQL)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_comment_is_hidden'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,126 @@
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import search
+from .cache import invalidate_news
+from .forms import get_bad_words_matcher
+from .models import Comment, News
+from .profanity import find_offending, init_worker
+
+
+@dataclass
+class ScanStats:
+    checked: int = 0
+    hidden: int = 0
+    last_id: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self):
+        return self.checked / self.elapsed if self.elapsed else 0.0
+
+
+def iter_chunks(start_after, chunk_size):
+    """Видимые комментарии после start_after, списками по chunk_size."""
+    rows = Comment.objects.filter(
+        pk__gt=start_after, is_hidden=False
+    ).order_by('pk').values_list('pk', 'news_id', 'text').iterator(
+        chunk_size=chunk_size
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def hide_comments(comment_news):
+    """
+    Скрывает комментарии одним UPDATE и поправляет счётчики новостей.
+
+    comment_news — словарь {id комментария: id новости}. Массовый update
+    не отправляет сигналы, поэтому кэш новостей и поисковый индекс
+    обновляем сами.
+    """
+    if not comment_news:
+        return
+    per_news = Counter(comment_news.values())
+    by_amount = {}
+    for news_id, amount in per_news.items():
+        by_amount.setdefault(amount, []).append(news_id)
+    with transaction.atomic():
+        Comment.objects.filter(pk__in=list(comment_news)).update(
+            is_hidden=True, updated=timezone.now()
+        )
+        for amount, news_ids in by_amount.items():
+            News.objects.filter(
+                pk__in=news_ids, comment_count__gte=amount
+            ).update(comment_count=F('comment_count') - amount)
+        search.remove_comments(comment_news)
+        invalidate_news(*per_news)
+
+
+def rescan_comments(
+        start_after=0, chunk_size=2000, workers=1, dry_run=False,
+        on_chunk=None):
+    """
+    Перепроверяет сохранённые комментарии тем же фильтром, что и форма.
+
+    Комментарии читаются потоком по возрастанию id, проверка текста
+    распределяется по процессам, найденные нарушения скрываются массовым
+    обновлением. После каждой порции вызывается on_chunk(stats):
+    stats.last_id можно сохранить и продолжить с него через start_after.
+    """
+    matcher = get_bad_words_matcher()
+    stats = ScanStats(last_id=start_after)
+    started = time.monotonic()
+
+    def handle(chunk, offending):
+        offending = set(offending)
+        to_hide = {
+            pk: news_id for pk, news_id, _ in chunk if pk in offending
+        }
+        if not dry_run:
+            hide_comments(to_hide)
+        stats.checked += len(chunk)
+        stats.hidden += len(to_hide)
+        stats.last_id = chunk[-1][0]
+        stats.elapsed = time.monotonic() - started
+        if on_chunk is not None:
+            on_chunk(stats)
+
+    def texts(chunk):
+        return [(pk, text) for pk, _, text in chunk]
+
+    chunks = iter_chunks(start_after, chunk_size)
+    if workers <= 1:
+        for chunk in chunks:
+            handle(chunk, find_offending(texts(chunk), matcher))
+        return stats
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(matcher.words,),
+    ) as executor:
+        # Держим в работе не больше двух порций на воркер и разбираем
+        # результаты по порядку, чтобы last_id рос монотонно.
+        pending = deque()
+        for chunk in chunks:
+            pending.append(
+                (chunk, executor.submit(find_offending, texts(chunk)))
+            )
+            if len(pending) >= workers * 2:
+                chunk, future = pending.popleft()
+                handle(chunk, future.result())
+        while pending:
+            chunk, future = pending.popleft()
+            handle(chunk, future.result())
+    return stats
@@ -0,0 +1,120 @@
+from collections import deque, namedtuple
+
+Match = namedtuple('Match', ('start', 'end', 'word'))
+
+
+class WordMatcher:
+    """
+    Поиск множества подстрок за один проход (алгоритм Ахо — Корасик).
+
+    Автомат строится один раз по списку слов; проверка текста занимает
+    время, линейное от длины текста и числа совпадений, и не зависит от
+    размера словаря. Регистр не учитывается.
+    """
+
+    def __init__(self, words):
+        self.words = sorted({word.lower() for word in words if word})
+        # Состояние автомата — индекс в списках переходов, ссылок
+        # неудач и выходов; 0 — корень бора.
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for word in self.words:
+            self._add(word)
+        self._link()
+
+    @classmethod
+    def from_file(cls, path, extra=()):
+        """Словарь из файла: по слову на строку, # — комментарий."""
+        with open(path, encoding='utf-8') as file:
+            words = [
+                line.split('#', 1)[0].strip() for line in file
+            ]
+        return cls([*extra, *words])
+
+    def __len__(self):
+        return len(self.words)
+
+    def _add(self, word):
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] = (word,)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                # Слова, оканчивающиеся в состоянии по ссылке неудачи,
+                # оканчиваются и здесь.
+                self._output[next_state] += self._output[
+                    self._fail[next_state]
+                ]
+
+    def _scan(self, text):
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for word in output[state]:
+                yield index + 1, word
+
+    def finditer(self, text):
+        """Все вхождения слов, включая пересекающиеся, по порядку концов."""
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            offsets = None
+        else:
+            # Некоторые символы при lower() превращаются в несколько,
+            # позиции пересчитываем на исходный текст.
+            offsets = []
+            lowered = []
+            for position, char in enumerate(text):
+                for lowered_char in char.lower():
+                    offsets.append(position)
+                    lowered.append(lowered_char)
+        for end, word in self._scan(lowered):
+            start = end - len(word)
+            if offsets is not None:
+                start, end = offsets[start], offsets[end - 1] + 1
+            yield Match(start, end, word)
+
+    def findall(self, text):
+        return list(self.finditer(text))
+
+    def search(self, text):
+        """Первое найденное вхождение или None."""
+        return next(self.finditer(text), None)
+
+
+# Автомат в процессе-воркере пула: собирается один раз в init_worker.
+# Модуль не зависит от Django, поэтому годится для любого способа
+# запуска процессов (fork, spawn).
+_worker_matcher = None
+
+
+def init_worker(words):
+    global _worker_matcher
+    _worker_matcher = WordMatcher(words)
+
+
+def find_offending(rows, matcher=None):
+    """Идентификаторы из пар (id, текст), где есть запрещённые слова."""
+    if matcher is None:
+        matcher = _worker_matcher
+    return [pk for pk, text in rows if matcher.search(text)]
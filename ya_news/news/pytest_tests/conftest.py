@@ -1,13 +1,69 @@
+import re
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 
 import pytest
 from django.urls import reverse
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
 
 from news.models import News, Comment
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def format_queries(queries):
+    """
+    Запросы, сгруппированные по виду, с числом повторов.
+
+    Запросы, различающиеся только параметрами, — признак N+1; самые
+    частые идут первыми.
+    """
+    shapes = Counter(
+        re.sub(r"\b\d+\b|'[^']*'", '?', query['sql']) for query in queries
+    )
+    return '\n'.join(
+        f'{count:>4} × {sql}' for sql, count in shapes.most_common()
+    )
+
+
+@pytest.fixture
+def assert_request_budget():
+    """
+    Выполняет запрос и проверяет число SQL-запросов и время ответа.
+
+    При превышении бюджета тест падает с перечнем выполненных запросов.
+    """
+    def check(client, url, max_queries, max_ms, method='get', **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(client, method)(url, **kwargs)
+            elapsed = (time.perf_counter() - start) * 1000
+        problems = []
+        if len(queries) > max_queries:
+            problems.append(
+                f'запросов к БД {len(queries)}, бюджет {max_queries}'
+            )
+        if elapsed > max_ms:
+            problems.append(f'ответ за {elapsed:.0f} мс, бюджет {max_ms} мс')
+        if problems:
+            pytest.fail(
+                f'{method.upper()} {url}: ' + '; '.join(problems)
+                + '\n' + format_queries(queries.captured_queries)
+            )
+        return response
+    return check
+
+
 @pytest.fixture
 def author(django_user_model):
     return django_user_model.objects.create(username='Автор')
@@ -97,6 +153,11 @@ def home_page_url():
     return reverse('news:home')
 
 
+@pytest.fixture
+def search_url():
+    return reverse('news:search')
+
+
 @pytest.fixture
 def login_url():
     return reverse('users:login')
@@ -0,0 +1,253 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.asgi import get_asgi_application
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.forms import BAD_WORDS, WARNING
+from news.models import Comment, News
+
+NDJSON = 'application/x-ndjson'
+
+
+def read_ndjson(response):
+    assert response.streaming
+    assert response['Content-Type'] == NDJSON
+    content = b''.join(response.streaming_content).decode()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+def send_json(client, method, url, data):
+    return getattr(client, method)(
+        url, json.dumps(data), content_type='application/json'
+    )
+
+
+@pytest.mark.django_db
+def test_news_list_pages(client, news_list, settings):
+    settings.API_PAGE_SIZE = 4
+    url = reverse('news:api_news_list')
+    titles = []
+    cursor = ''
+    while True:
+        data = client.get(url, {'cursor': cursor}).json()
+        titles += [item['title'] for item in data['results']]
+        cursor = data['next']
+        if cursor is None:
+            break
+    expected = list(
+        News.objects.order_by('-date', '-id').values_list('title', flat=True)
+    )
+    assert titles == expected
+
+
+@pytest.mark.django_db
+def test_news_list_bad_cursor(client):
+    response = client.get(reverse('news:api_news_list'), {'cursor': '!'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'error' in response.json()
+
+
+@pytest.mark.django_db
+def test_news_list_streams_ndjson(client, news_list, settings):
+    settings.API_EXPORT_CHUNK_SIZE = 3
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(
+            reverse('news:api_news_list'), HTTP_ACCEPT=NDJSON
+        )
+    # Строки читаются из БД, только когда сервер отдаёт тело ответа.
+    assert len(queries) == 0
+    items = read_ndjson(response)
+    assert [item['id'] for item in items] == list(
+        News.objects.order_by('-date', '-id').values_list('id', flat=True)
+    )
+
+
+def call_asgi(path, headers):
+    """GET через get_asgi_application(): код ответа и всё тело."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), *headers],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async_to_sync(get_asgi_application())(scope, receive, send)
+    body = b''.join(
+        message.get('body', b'') for message in messages
+        if message['type'] == 'http.response.body'
+    )
+    return messages[0]['status'], body
+
+
+# Под ASGI запросы идут из другого потока: данные должны быть закоммичены.
+@pytest.mark.django_db(transaction=True)
+def test_ndjson_export_refused_under_asgi(news_list):
+    status, body = call_asgi(
+        reverse('news:api_news_list'), [(b'accept', NDJSON.encode())]
+    )
+    # Поток в Django 3.2 под ASGI не выгрузить, а целиком — нельзя.
+    assert status == HTTPStatus.NOT_ACCEPTABLE
+    assert 'error' in json.loads(body)
+    status, body = call_asgi(reverse('news:api_news_list'), [])
+    assert status == HTTPStatus.OK
+    assert json.loads(body)['results']
+
+
+@pytest.mark.django_db
+def test_wildcard_accept_gets_page(client, news_list):
+    response = client.get(reverse('news:api_news_list'), HTTP_ACCEPT='*/*')
+    assert not response.streaming
+    assert 'results' in response.json()
+
+
+@pytest.mark.django_db
+def test_news_detail(client, news):
+    news.refresh_from_db()
+    response = client.get(reverse('news:api_news_detail', args=(news.pk,)))
+    assert response.json() == {
+        'id': news.pk,
+        'title': news.title,
+        'text': news.text,
+        'date': news.date.isoformat(),
+        'comment_count': 0,
+    }
+
+
+@pytest.mark.django_db
+def test_missing_news(client):
+    for name in ('news:api_news_detail', 'news:api_news_comments'):
+        response = client.get(reverse(name, args=(1,)))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert 'error' in response.json()
+
+
+@pytest.mark.django_db
+def test_news_comments_hide_hidden(client, news, comment_list):
+    hidden = news.comment_set.last()
+    hidden.is_hidden = True
+    hidden.save()
+    url = reverse('news:api_news_comments', args=(news.pk,))
+    expected = list(
+        news.comment_set.filter(is_hidden=False).values_list('id', flat=True)
+    )
+    assert [item['id'] for item in client.get(url).json()['results']] == (
+        expected
+    )
+    streamed = read_ndjson(client.get(url, HTTP_ACCEPT=NDJSON))
+    assert [item['id'] for item in streamed] == expected
+
+
+def test_create_comment(author_client, author, news, form_data):
+    url = reverse('news:api_news_comments', args=(news.pk,))
+    response = send_json(author_client, 'post', url, form_data)
+    assert response.status_code == HTTPStatus.CREATED
+    comment = Comment.objects.get()
+    assert response.json()['id'] == comment.pk
+    assert response.json()['author'] == author.username
+    assert comment.text == form_data['text']
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_anonymous_cant_create_comment(client, news, form_data):
+    url = reverse('news:api_news_comments', args=(news.pk,))
+    response = send_json(client, 'post', url, form_data)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert Comment.objects.count() == 0
+
+
+@pytest.mark.parametrize('data', ({'text': f'Ты {BAD_WORDS[0]}!'}, {}))
+def test_invalid_comment(author_client, news, data):
+    url = reverse('news:api_news_comments', args=(news.pk,))
+    response = send_json(author_client, 'post', url, data)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'text' in response.json()['errors']
+    assert Comment.objects.count() == 0
+
+
+def test_bad_words_message(author_client, news):
+    url = reverse('news:api_news_comments', args=(news.pk,))
+    response = send_json(
+        author_client, 'post', url, {'text': f'Ты {BAD_WORDS[0]}!'}
+    )
+    assert response.json()['errors'] == {'text': [WARNING]}
+
+
+@pytest.mark.parametrize('body', ('не json', '[]'))
+def test_body_must_be_json_object(author_client, news, body):
+    response = author_client.post(
+        reverse('news:api_news_comments', args=(news.pk,)),
+        body,
+        content_type='application/json',
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert Comment.objects.count() == 0
+
+
+def test_own_comments(author_client, not_author_client, comment):
+    url = reverse('news:api_comments')
+    assert [
+        item['id'] for item in author_client.get(url).json()['results']
+    ] == [comment.pk]
+    assert not_author_client.get(url).json()['results'] == []
+    streamed = read_ndjson(not_author_client.get(url, HTTP_ACCEPT=NDJSON))
+    assert streamed == []
+
+
+@pytest.mark.django_db
+def test_own_comments_anonymous(client):
+    response = client.get(reverse('news:api_comments'))
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_author_can_edit_comment(author_client, comment, form_data):
+    url = reverse('news:api_comment', args=(comment.pk,))
+    response = send_json(author_client, 'patch', url, form_data)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['text'] == form_data['text']
+    comment.refresh_from_db()
+    assert comment.text == form_data['text']
+
+
+def test_author_can_delete_comment(author_client, comment, news):
+    News.objects.filter(pk=news.pk).update(comment_count=1)
+    url = reverse('news:api_comment', args=(comment.pk,))
+    response = author_client.delete(url)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert Comment.objects.count() == 0
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.parametrize('method', ('get', 'patch', 'delete'))
+def test_other_user_cant_touch_comment(
+        not_author_client, comment, form_data, method):
+    url = reverse('news:api_comment', args=(comment.pk,))
+    if method == 'get':
+        response = not_author_client.get(url)
+    else:
+        response = send_json(not_author_client, method, url, form_data)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    comment.refresh_from_db()
+    assert comment.text != form_data['text']
@@ -0,0 +1,97 @@
+import asyncio
+import importlib
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import clear_url_caches, resolve
+
+import news.urls
+import yanews.urls
+from news import async_views
+from news.instrumentation import QueryInstrumentationMiddleware, metrics
+from news.models import Comment
+from news.replicas import PrimaryPinningMiddleware
+
+
+def send(method, *args, **kwargs):
+    """Запрос AsyncClient из синхронного теста."""
+    async def request():
+        return await method(*args, **kwargs)
+    return async_to_sync(request)()
+
+
+def reload_urls():
+    importlib.reload(news.urls)
+    importlib.reload(yanews.urls)
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_urls(settings):
+    settings.NEWS_ASYNC_VIEWS = True
+    reload_urls()
+    yield
+    settings.NEWS_ASYNC_VIEWS = False
+    reload_urls()
+
+
+def test_setting_selects_async_views(async_urls, home_page_url):
+    view = resolve(home_page_url).func
+    assert view is async_views.news_list
+    assert asyncio.iscoroutinefunction(view)
+
+
+def test_sync_views_by_default(home_page_url):
+    assert not asyncio.iscoroutinefunction(resolve(home_page_url).func)
+
+
+@pytest.mark.parametrize(
+    'middleware', (QueryInstrumentationMiddleware, PrimaryPinningMiddleware)
+)
+def test_middleware_follows_chain(middleware):
+    async def async_response(request):
+        return request
+
+    assert asyncio.iscoroutinefunction(middleware(async_response))
+    assert not asyncio.iscoroutinefunction(middleware(lambda request: None))
+
+
+def test_pool_size_from_settings(settings):
+    assert async_views.get_executor()._max_workers == (
+        settings.ASYNC_DB_THREADS
+    )
+
+
+# Запросы идут из потоков пула со своими соединениями, поэтому данные
+# должны быть закоммичены.
+@pytest.mark.django_db(transaction=True)
+def test_async_pages(async_urls, async_client, news_list, comment,
+                     home_page_url, news_detail_url):
+    metrics.clear()
+    response = send(async_client.get, home_page_url)
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.context['object_list']) > 0
+    response = send(async_client.get, news_detail_url)
+    assert response.status_code == HTTPStatus.OK
+    assert comment.text in response.content.decode()
+    # Запросы из потоков пула видны middleware через contextvars.
+    assert metrics.get('sql_queries_total', 'news:home') > 0
+    assert metrics.get('sql_queries_total', 'news:detail') > 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_comment_post(async_urls, async_client, author, news,
+                            news_detail_url, form_data):
+    async_client.force_login(author)
+    # Multipart-тело AsyncClient в Django 3.2 читает с ошибкой.
+    response = send(
+        async_client.post,
+        news_detail_url,
+        data=urlencode(form_data),
+        content_type='application/x-www-form-urlencoded',
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url == f'{news_detail_url}#comments'
+    assert Comment.objects.filter(news=news, author=author).count() == 1
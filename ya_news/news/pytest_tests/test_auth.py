@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from news import auth
+from news.auth import USER_KEY, CachedModelBackend, check_shared_cache
+
+pytestmark = pytest.mark.django_db
+
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(settings, tmp_path):
+    """Настройки SHARED_CACHE_DIR: общий файловый кэш, сессии в кэше."""
+    settings.CACHES = {
+        'default': {'BACKEND': FILE_CACHE, 'LOCATION': tmp_path / 'cache'}
+    }
+    settings.AUTHENTICATION_BACKENDS = ['news.auth.CachedModelBackend']
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+def tables(queries):
+    return {
+        table for table in ('auth_user', 'django_session')
+        for query in queries if table in query['sql']
+    }
+
+
+def test_session_and_user_from_cache(author_client, comment_edit_url):
+    with CaptureQueriesContext(connection) as queries:
+        author_client.get(comment_edit_url)
+    # Сессия попала в кэш при входе, пользователь — при первом запросе.
+    assert tables(queries) == {'auth_user'}
+    with CaptureQueriesContext(connection) as queries:
+        response = author_client.get(comment_edit_url)
+    assert response.status_code == HTTPStatus.OK
+    assert tables(queries) == set()
+
+
+def test_password_change_ends_sessions(author, author_client,
+                                       comment_edit_url, login_url):
+    author_client.get(comment_edit_url)
+    author.set_password('новый пароль')
+    author.save()
+    response = author_client.get(comment_edit_url)
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url.startswith(login_url)
+
+
+def test_logout_forgets_user(author, author_client, comment_edit_url,
+                             logout_url):
+    author_client.get(comment_edit_url)
+    assert cache.get(USER_KEY.format(pk=author.pk)) == author
+    author_client.get(logout_url)
+    assert cache.get(USER_KEY.format(pk=author.pk)) is None
+
+
+@pytest.mark.parametrize('shared', (True, False))
+def test_forget_user_in_other_worker(author, monkeypatch, tmp_path, shared):
+    """
+    Два процесса — два экземпляра кэша.
+
+    Сброс в одном процессе виден другому только через общий кэш; у
+    LocMemCache в разных процессах разное содержимое.
+    """
+    if shared:
+        first = FileBasedCache(tmp_path / 'workers', {})
+        second = FileBasedCache(tmp_path / 'workers', {})
+    else:
+        first = LocMemCache('first-worker', {})
+        second = LocMemCache('second-worker', {})
+    monkeypatch.setattr(auth, 'cache', first)
+    CachedModelBackend().get_user(author.pk)
+    monkeypatch.setattr(auth, 'cache', second)
+    auth.forget_user(author.pk)
+    stale = first.get(USER_KEY.format(pk=author.pk))
+    assert (stale is None) == shared
+
+
+def test_check_requires_shared_cache(settings):
+    assert check_shared_cache(None) == []
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    }
+    errors = check_shared_cache(None)
+    assert [error.id for error in errors] == ['news.E001'] * 2
+    settings.AUTHENTICATION_BACKENDS = [
+        'django.contrib.auth.backends.ModelBackend'
+    ]
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    assert check_shared_cache(None) == []
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+
+from news import search
+from news.models import Comment, News
+from news.pagination import KeysetPaginator
+
+NEWS_COUNT = 200
+READERS_COUNT = 20
+# Больше одной страницы комментариев.
+COMMENTS_COUNT = 120
+
+# Бюджеты (запросов к БД, миллисекунд) на запрос к странице. Время —
+# с большим запасом на медленные машины: оно ловит только порядки.
+BUDGETS = {
+    'news:home': (1, 500),
+    'news:search': (3, 500),
+    'news:detail': (2, 500),
+    'news:detail:reader': (4, 500),
+    'news:edit': (4, 500),
+    'news:delete': (4, 500),
+}
+
+
+@pytest.fixture
+def readers(django_user_model):
+    django_user_model.objects.bulk_create(
+        django_user_model(username=f'Читатель {index}')
+        for index in range(READERS_COUNT)
+    )
+    return list(django_user_model.objects.order_by('pk'))
+
+
+@pytest.fixture
+def busy_news(readers):
+    """Архив новостей и одна обсуждаемая новость с комментариями."""
+    today = datetime.today()
+    News.objects.bulk_create(
+        News(
+            title=f'Новость {index}',
+            text='Текст новости про погоду.',
+            date=today - timedelta(days=index),
+        )
+        for index in range(NEWS_COUNT)
+    )
+    news = News.objects.create(
+        title='Обсуждаемая новость',
+        text='Текст обсуждаемой новости.',
+        comment_count=COMMENTS_COUNT,
+    )
+    now = datetime.now()
+    Comment.objects.bulk_create(
+        Comment(
+            news=news,
+            author=readers[index % READERS_COUNT],
+            text=f'Комментарий {index} про погоду',
+            created=now - timedelta(minutes=index),
+        )
+        for index in range(COMMENTS_COUNT)
+    )
+    # bulk_create не отправляет сигналы, индекс поиска строим сами.
+    search.reindex()
+    return news
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('busy_news')
+def test_home_budget(client, assert_request_budget):
+    assert_request_budget(client, reverse('news:home'), *BUDGETS['news:home'])
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('busy_news')
+def test_search_budget(client, assert_request_budget):
+    response = assert_request_budget(
+        client, reverse('news:search'), *BUDGETS['news:search'],
+        data={'q': 'погода'},
+    )
+    assert len(response.context['results']) == settings.NEWS_SEARCH_LIMIT
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('comments_page', (None, 1))
+def test_detail_budget(client, busy_news, assert_request_budget,
+                       comments_page):
+    url = reverse('news:detail', args=(busy_news.pk,))
+    data = {}
+    if comments_page:
+        paginator = KeysetPaginator(
+            busy_news.comment_set.all(),
+            ('created', 'id'),
+            settings.COMMENTS_COUNT_ON_PAGE,
+        )
+        data['comments'] = paginator.get_page().next_cursor
+    assert_request_budget(client, url, *BUDGETS['news:detail'], data=data)
+
+
+@pytest.mark.django_db
+def test_detail_budget_for_reader(
+        busy_news, readers, assert_request_budget, client):
+    client.force_login(readers[0])
+    url = reverse('news:detail', args=(busy_news.pk,))
+    assert_request_budget(client, url, *BUDGETS['news:detail:reader'])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ('news:edit', 'news:delete'))
+def test_comment_pages_budget(
+        name, busy_news, readers, assert_request_budget, client):
+    client.force_login(readers[0])
+    comment = busy_news.comment_set.filter(author=readers[0]).first()
+    url = reverse(name, args=(comment.pk,))
+    assert_request_budget(client, url, *BUDGETS[name])
@@ -0,0 +1,167 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+
+from news import cache as news_cache
+from news.cache import get_news_version, get_page_generation, get_page_key
+from news.models import Comment, News
+from news.views import add_comment
+
+
+@pytest.fixture(params=('locmem', 'filebased'))
+def cache_backend(request, settings, tmp_path):
+    backends = {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'filebased': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        },
+    }
+    settings.CACHES = {'default': backends[request.param]}
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('cache_backend', 'comment')
+def test_detail_served_from_cache_for_anonymous(
+        client, news_detail_url, django_assert_num_queries):
+    first = client.get(news_detail_url)
+    with django_assert_num_queries(0):
+        second = client.get(news_detail_url)
+    assert second.content == first.content
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('cache_backend')
+def test_comment_save_invalidates_detail_cache(
+        client, news, author, news_detail_url,
+        django_capture_on_commit_callbacks):
+    client.get(news_detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Свежий')
+    assert 'Свежий' in client.get(news_detail_url).content.decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('cache_backend')
+def test_news_delete_invalidates_detail_cache(
+        client, news, news_detail_url, django_capture_on_commit_callbacks):
+    client.get(news_detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        news.delete()
+    assert client.get(news_detail_url).status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_version_bumped_after_commit(
+        news, author, django_capture_on_commit_callbacks):
+    versions = get_news_version(news.pk), get_page_generation()
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            add_comment(Comment(news=news, author=author, text='Свежий'))
+        # До коммита параллельный запрос закэшировал бы старые данные
+        # под новой версией.
+        assert (get_news_version(news.pk), get_page_generation()) == versions
+    assert get_news_version(news.pk) != versions[0]
+    assert get_page_generation() != versions[1]
+
+
+@pytest.mark.django_db
+def test_comment_list_not_cached_for_author(
+        client, author_client, comment, news):
+    url = reverse('news:detail', args=(news.id,))
+    client.get(url)
+    edit_url = reverse('news:edit', args=(comment.id,))
+    assert edit_url in author_client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('cache_backend', 'news_list')
+def test_home_page_cached_for_anonymous(
+        client, home_page_url, django_assert_num_queries):
+    first = client.get(home_page_url)
+    with django_assert_num_queries(0):
+        second = client.get(home_page_url)
+    assert second.content == first.content
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_list')
+def test_home_page_not_cached_for_user(
+        author_client, home_page_url, django_assert_max_num_queries):
+    author_client.get(home_page_url)
+    with django_assert_max_num_queries(3) as captured:
+        author_client.get(home_page_url)
+    assert any(
+        'news_news' in query['sql'] for query in captured.captured_queries
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('cache_backend')
+def test_news_save_invalidates_home_page(
+        client, home_page_url, django_capture_on_commit_callbacks):
+    client.get(home_page_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        News.objects.create(title='Срочная новость', text='Текст')
+    assert 'Срочная новость' in client.get(home_page_url).content.decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_list')
+def test_stale_home_page_served_while_rebuilding(
+        client, home_page_url, django_assert_num_queries,
+        django_capture_on_commit_callbacks):
+    stale = client.get(home_page_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        News.objects.create(title='Срочная новость', text='Текст')
+    # Страницу уже пересчитывает другой воркер.
+    cache.add(get_page_key(home_page_url) + ':lock', True)
+    with django_assert_num_queries(0):
+        response = client.get(home_page_url)
+    assert response.content == stale.content
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_list')
+def test_home_page_key_ignores_other_params(
+        client, home_page_url, django_assert_num_queries):
+    first = client.get(home_page_url)
+    with django_assert_num_queries(0):
+        response = client.get(home_page_url, {'utm_source': 'рассылка'})
+    assert response.content == first.content
+    assert get_page_key(home_page_url, [('cursor', '')]) == (
+        get_page_key(home_page_url)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_list')
+def test_home_pages_cached_by_cursor(
+        client, home_page_url, django_assert_num_queries):
+    cursor = client.get(home_page_url).context['page_obj'].next_cursor
+    second = client.get(home_page_url, {'cursor': cursor})
+    assert second.context['page_obj'].previous_cursor is not None
+    padded = cursor + '=' * (-len(cursor) % 4)
+    with django_assert_num_queries(0):
+        response = client.get(
+            home_page_url, {'cursor': padded, 'sort': 'ignored'}
+        )
+    assert response.content == second.content
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_list')
+def test_missing_page_waits_briefly_for_other_worker(
+        client, home_page_url):
+    # Страницу строит другой воркер, но так и не кладёт в кэш.
+    cache.add(get_page_key(home_page_url) + ':lock', True)
+    start = time.monotonic()
+    response = client.get(home_page_url)
+    assert response.status_code == HTTPStatus.OK
+    assert time.monotonic() - start < news_cache.PAGE_CACHE_WAIT_TIMEOUT * 2
@@ -0,0 +1,158 @@
+import hashlib
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views import generic
+
+from news.cache import (
+    FRAGMENT_KEY, PAGE_PART_KEY, get_news_version, get_page_generation
+)
+from news.conditional import ConditionalGetMixin
+from news.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+def revalidate(client, url, etag):
+    return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+
+def test_detail_not_modified_after_one_query(
+        client, news_detail_url, comment, django_assert_num_queries):
+    etag = client.get(news_detail_url)['ETag']
+    # Части ETag вытеснены из кэша: нужен один запрос, без комментариев.
+    cache.clear()
+    with django_assert_num_queries(1) as captured:
+        response = revalidate(client, news_detail_url, etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response['ETag'] == etag
+    assert 'FROM "news_news"' in captured.captured_queries[0]['sql']
+    assert 'Cookie' in response['Vary']
+
+
+def test_validators_cached_without_text(client, news, news_detail_url):
+    client.get(news_detail_url)
+    parts = cache.get(FRAGMENT_KEY.format(
+        pk=news.pk,
+        version=get_news_version(news.pk),
+        name='validators',
+        variant=hashlib.md5(b'').hexdigest(),
+    ))
+    assert parts is not None
+    assert news.title not in parts
+    assert news.text not in parts
+
+
+def test_detail_not_modified_from_cache(
+        client, news_detail_url, django_assert_num_queries):
+    etag = client.get(news_detail_url)['ETag']
+    with django_assert_num_queries(0):
+        response = revalidate(client, news_detail_url, etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def add_comment(news, comment):
+    Comment.objects.create(
+        news=news, author=comment.author, text='Новый комментарий'
+    )
+
+
+def edit_comment(news, comment):
+    comment.text = 'Изменённый комментарий'
+    comment.save()
+
+
+def edit_news(news, comment):
+    news.title = 'Изменённый заголовок'
+    news.save()
+
+
+@pytest.mark.parametrize('change', (add_comment, edit_comment, edit_news))
+def test_detail_changes_invalidate_etag(
+        client, news, comment, news_detail_url, change,
+        django_capture_on_commit_callbacks):
+    etag = client.get(news_detail_url)['ETag']
+    with django_capture_on_commit_callbacks(execute=True):
+        change(news, comment)
+    response = revalidate(client, news_detail_url, etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+def test_detail_etag_depends_on_user(client, author_client, news_detail_url):
+    etag = client.get(news_detail_url)['ETag']
+    response = revalidate(author_client, news_detail_url, etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'form' in response.context
+
+
+def test_missing_news_not_found(client, news, news_detail_url):
+    news.delete()
+    response = revalidate(client, news_detail_url, '"любой"')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.usefixtures('news_list')
+def test_home_not_modified_without_queries(
+        client, home_page_url, django_assert_num_queries):
+    etag = client.get(home_page_url)['ETag']
+    with django_assert_num_queries(0):
+        response = revalidate(client, home_page_url, etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def news_queries(captured):
+    return [
+        query for query in captured.captured_queries
+        if '"news_' in query['sql']
+    ]
+
+
+@pytest.mark.usefixtures('news_list')
+def test_home_for_user_not_modified_after_one_query(
+        author_client, home_page_url, django_assert_max_num_queries):
+    etag = author_client.get(home_page_url)['ETag']
+    with django_assert_max_num_queries(2) as captured:
+        response = revalidate(author_client, home_page_url, etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert news_queries(captured) == []
+    # Сводка вытеснена из кэша: один запрос страницы, без рендера.
+    cache.delete(PAGE_PART_KEY.format(
+        generation=get_page_generation(),
+        name='list_validators',
+        variant=hashlib.md5(b'').hexdigest(),
+    ))
+    with django_assert_max_num_queries(3) as captured:
+        response = revalidate(author_client, home_page_url, etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert len(news_queries(captured)) == 1
+
+
+def test_home_for_user_etag_changes_with_comments(
+        author_client, news, comment, home_page_url,
+        django_capture_on_commit_callbacks):
+    etag = author_client.get(home_page_url)['ETag']
+    with django_capture_on_commit_callbacks(execute=True):
+        add_comment(news, comment)
+    response = revalidate(author_client, home_page_url, etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+def test_home_page_loaded_once_for_user(
+        author_client, home_page_url, django_assert_max_num_queries):
+    with django_assert_max_num_queries(3) as captured:
+        author_client.get(home_page_url)
+    assert len(news_queries(captured)) == 1
+
+
+def test_no_validators_by_default(rf):
+    class Page(ConditionalGetMixin, generic.View):
+        def get(self, request, *args, **kwargs):
+            return HttpResponse('Страница')
+
+    response = Page.as_view()(rf.get('/', HTTP_IF_NONE_MATCH='*'))
+    assert response.status_code == HTTPStatus.OK
+    assert not response.has_header('ETag')
@@ -1,3 +1,6 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
 import pytest
 from django.conf import settings
 from django.urls import reverse
@@ -11,10 +14,20 @@ from news.forms import CommentForm
 def test_news_on_homepage_count(client):
     response = client.get(reverse('news:home'))
     object_list = response.context['object_list']
-    news_count = object_list.count()
+    news_count = len(object_list)
     assert news_count == settings.NEWS_COUNT_ON_HOME_PAGE
 
 
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_list', 'comment_list')
+def test_homepage_single_query(client, django_assert_num_queries, news):
+    News.objects.filter(pk=news.pk).update(comment_count=3)
+    with django_assert_num_queries(1) as captured:
+        response = client.get(reverse('news:home'))
+    assert 'news_comment' not in captured.captured_queries[0]['sql']
+    assert 'Комментариев: 3' in response.content.decode()
+
+
 @pytest.mark.django_db
 @pytest.mark.usefixtures('news_list', 'comment_list')
 @pytest.mark.parametrize(
@@ -48,3 +61,97 @@ def test_commentform_for_anonymous_user(client, news):
     url = reverse('news:detail', args=(news.id,))
     response = client.get(url)
     assert 'form' not in response.context
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('news_list')
+def test_homepage_cursor_pagination(client):
+    url = reverse('news:home')
+    first_page = client.get(url).context['page_obj']
+    assert first_page.previous_cursor is None
+    second_page = client.get(
+        url, {'cursor': first_page.next_cursor}
+    ).context['page_obj']
+    assert len(second_page) == 1
+    assert second_page.next_cursor is None
+    back_page = client.get(
+        url, {'cursor': second_page.previous_cursor}
+    ).context['page_obj']
+    assert list(back_page) == list(first_page)
+
+
+@pytest.mark.django_db
+def test_cursors_reach_both_ends_of_full_pages(client, settings):
+    settings.NEWS_COUNT_ON_HOME_PAGE = 10
+    today = datetime.today()
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст.',
+             date=today - timedelta(days=index))
+        for index in range(20)
+    )
+    url = reverse('news:home')
+    pages = [client.get(url).context['page_obj']]
+    while pages[-1].next_cursor is not None:
+        pages.append(client.get(
+            url, {'cursor': pages[-1].next_cursor}
+        ).context['page_obj'])
+    # Последняя страница заполнена целиком, пустой за ней нет.
+    assert [len(page) for page in pages] == [10, 10]
+    back_page = client.get(
+        url, {'cursor': pages[-1].previous_cursor}
+    ).context['page_obj']
+    assert list(back_page) == list(pages[0])
+    assert back_page.previous_cursor is None
+    assert back_page.next_cursor is not None
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_returns_404(client):
+    response = client.get(reverse('news:home'), {'cursor': 'garbage'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('comment_list')
+def test_comments_cursor_pagination(client, news, settings):
+    settings.COMMENTS_COUNT_ON_PAGE = 4
+    url = reverse('news:detail', args=(news.id,))
+    seen = []
+    cursor = None
+    while True:
+        params = {'comments': cursor} if cursor else {}
+        page = client.get(url, params).context['comments_page']
+        seen.extend(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    all_comments = list(news.comment_set.order_by('created', 'id'))
+    assert seen == all_comments
+
+
+@pytest.mark.django_db
+def test_search_finds_other_word_forms(client):
+    news = News.objects.create(
+        title='Выставка современного искусства',
+        text='В музее открылась выставка.',
+    )
+    News.objects.create(title='Погода', text='Ожидается дождь.')
+    response = client.get(reverse('news:search'), {'q': 'выставки'})
+    results = response.context['results']
+    assert [result.news for result in results] == [news]
+    assert results[0].title.startswith('<mark>Выставка</mark>')
+    assert '<mark>выставка</mark>.' in results[0].snippet
+
+
+@pytest.mark.django_db
+def test_search_highlights_comment_snippet(client, news, author):
+    comment = Comment.objects.create(
+        news=news, author=author, text='<b>Интересные</b> новости!'
+    )
+    response = client.get(reverse('news:search'), {'q': 'новость'})
+    result, = response.context['results']
+    assert result.comment == comment
+    assert result.snippet == (
+        '&lt;b&gt;Интересные&lt;/b&gt; <mark>новости</mark>!'
+    )
+    assert '<b>Интересные</b>' not in response.content.decode()
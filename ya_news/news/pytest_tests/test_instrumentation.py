@@ -0,0 +1,123 @@
+import json
+import logging
+from http import HTTPStatus
+
+import pytest
+from django.urls import resolve, reverse
+
+from news.instrumentation import (
+    JsonFormatter, Query, logger, metrics, report
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    metrics.clear()
+    yield
+    metrics.clear()
+
+
+@pytest.fixture
+def sql_log(caplog):
+    """Записи лога news.sql (он не передаёт записи корневому логгеру)."""
+    logger.addHandler(caplog.handler)
+    yield caplog
+    logger.removeHandler(caplog.handler)
+
+
+def events(caplog, name):
+    return [
+        record.data for record in caplog.records if record.msg == name
+    ]
+
+
+@pytest.mark.django_db
+def test_every_query_logged_with_view(client, news_detail_url, sql_log):
+    sql_log.set_level(logging.DEBUG, logger='news.sql')
+    client.get(news_detail_url)
+    queries = events(sql_log, 'query')
+    assert queries
+    assert len(queries) == metrics.get('sql_queries_total', 'news:detail')
+    assert all(query['view'] == 'news:detail' for query in queries)
+    assert all(query['duration_ms'] >= 0 for query in queries)
+
+
+@pytest.mark.django_db
+def test_slow_queries_flagged(client, news_detail_url, settings, sql_log):
+    settings.SQL_SLOW_QUERY_MS = -1
+    client.get(news_detail_url)
+    slow = events(sql_log, 'slow_query')
+    assert slow
+    assert slow[0]['threshold_ms'] == -1
+    assert metrics.get('sql_slow_queries_total', 'news:detail') == len(slow)
+
+
+def report_repeated_select(rf):
+    request = rf.get('/edit_comment/1/')
+    request.resolver_match = resolve('/edit_comment/1/')
+    select = 'SELECT * FROM news_comment WHERE id = %s'
+    report(request, [
+        Query('default', select, (1,), 0.001),
+        Query('default', select, (2,), 0.001),
+        Query('default', select, (1,), 0.001),
+    ])
+
+
+def test_repeated_queries_flagged(rf, sql_log):
+    report_repeated_select(rf)
+    duplicates = events(sql_log, 'duplicate_query')
+    assert len(duplicates) == 1
+    assert duplicates[0]['view'] == 'news:edit'
+    assert duplicates[0]['count'] == 2
+    # Параметры могут содержать личные данные.
+    assert 'params' not in duplicates[0]
+    assert metrics.get('sql_duplicate_queries_total', 'news:edit') == 1
+
+
+def test_repeated_query_params_logged_on_request(rf, settings, sql_log):
+    settings.SQL_LOG_PARAMS = True
+    report_repeated_select(rf)
+    assert events(sql_log, 'duplicate_query')[0]['params'] == '(1,)'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url',
+    (
+        pytest.lazy_fixture('news_detail_url'),
+        pytest.lazy_fixture('comment_edit_url'),
+        pytest.lazy_fixture('comment_delete_url'),
+    )
+)
+def test_no_duplicates_in_post_flows(author_client, url, form_data, sql_log):
+    author_client.post(url, data=form_data)
+    assert events(sql_log, 'duplicate_query') == []
+
+
+def test_json_formatter():
+    record = logging.LogRecord(
+        'news.sql', logging.WARNING, __file__, 1, 'slow_query', None, None
+    )
+    record.data = {'view': 'news:detail', 'duration_ms': 150.0}
+    data = json.loads(JsonFormatter().format(record))
+    assert data['event'] == 'slow_query'
+    assert data['level'] == 'WARNING'
+    assert data['view'] == 'news:detail'
+    assert data['duration_ms'] == 150.0
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(client, home_page_url):
+    client.get(home_page_url)
+    response = client.get(reverse('news:metrics'))
+    assert response.status_code == HTTPStatus.OK
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.content.decode()
+    assert '# TYPE sql_queries_total counter' in text
+    assert 'http_requests_total{view="news:home"} 1' in text
+
+
+@pytest.mark.django_db
+def test_metrics_only_for_allowed_addresses(client):
+    response = client.get(reverse('news:metrics'), REMOTE_ADDR='10.0.0.1')
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -1,12 +1,17 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
 from pytest_django.asserts import assertFormError
 from pytest_django.asserts import assertRedirects
+from django.core.management import call_command
 from django.urls import reverse
 
-from news.models import Comment
-from news.forms import BAD_WORDS, WARNING
+from news.models import Comment, News
+from news.forms import BAD_WORDS, WARNING, reload_bad_words
+from news.profanity import WordMatcher
+from news.search import search
+from news.stemmer import stem
 
 
 def test_user_can_create_comment(author_client, author, form_data, news):
@@ -83,3 +88,163 @@ def test_user_cant_use_bad_words(author_client, news):
     assert response.status_code == HTTPStatus.OK
     assertFormError(response, 'form', 'text', WARNING)
     assert Comment.objects.count() == before_post_count
+
+
+def test_comment_count_follows_create_and_delete(
+        author_client, form_data, news):
+    url = reverse('news:detail', args=(news.id,))
+    author_client.post(url, data=form_data)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    comment = Comment.objects.get(news=news)
+    author_client.post(reverse('news:delete', args=(comment.id,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('comment_list')
+def test_recount_comments_fixes_counter(news):
+    News.objects.filter(pk=news.pk).update(comment_count=0)
+    call_command('recount_comments')
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.filter(news=news).count()
+
+
+def test_bad_words_matcher_reports_positions():
+    matcher = WordMatcher(('редис', 'редиска', 'диск'))
+    text = 'Ты РЕДИСКА!'
+    assert sorted(matcher.findall(text)) == [
+        (3, 8, 'редис'), (3, 10, 'редиска'), (5, 9, 'диск'),
+    ]
+
+
+@pytest.mark.django_db
+def test_bad_words_loaded_from_file(author_client, news, settings, tmp_path):
+    dictionary = tmp_path / 'bad_words.txt'
+    dictionary.write_text('# словарь\nбармалей\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = dictionary
+    reload_bad_words()
+    try:
+        url = reverse('news:detail', args=(news.id,))
+        response = author_client.post(url, data={'text': 'Ну ты Бармалей'})
+        assertFormError(response, 'form', 'text', WARNING)
+    finally:
+        settings.BAD_WORDS_FILE = None
+        reload_bad_words()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('workers', (1, 2))
+def test_moderate_comments_hides_bad_words(
+        author, news, client, tmp_path, workers):
+    clean = Comment.objects.create(news=news, author=author, text='Хорошо')
+    bad = Comment.objects.create(
+        news=news, author=author, text=f'Ты {BAD_WORDS[1]}!'
+    )
+    News.objects.filter(pk=news.pk).update(comment_count=2)
+    checkpoint = tmp_path / 'checkpoint'
+    call_command(
+        'moderate_comments',
+        workers=workers,
+        chunk_size=1,
+        checkpoint=checkpoint,
+        stdout=StringIO(),
+    )
+    bad.refresh_from_db()
+    clean.refresh_from_db()
+    news.refresh_from_db()
+    assert bad.is_hidden and not clean.is_hidden
+    assert news.comment_count == 1
+    assert checkpoint.read_text() == str(bad.pk)
+    url = reverse('news:detail', args=(news.id,))
+    assert BAD_WORDS[1] not in client.get(url).content.decode()
+
+
+@pytest.mark.parametrize(
+    'words, expected',
+    (
+        (('новость', 'новости', 'новостями'), 'новост'),
+        (('комментарий', 'комментарии'), 'комментар'),
+        (('красивейшая', 'красивый'), 'красив'),
+        (('Ёлки', 'елки'), 'елк'),
+        (('python',), 'python'),
+    ),
+)
+def test_stemmer_reduces_word_forms(words, expected):
+    assert {stem(word) for word in words} == {expected}
+
+
+@pytest.mark.django_db
+def test_search_index_follows_changes(author_client, comment, news):
+    def found(query):
+        return [(result.news, result.comment) for result in search(query)]
+
+    news.text = 'Новый текст'
+    news.save()
+    assert found('нового') == [(news, None)]
+    assert found('заметки') == [(news, comment)]
+    author_client.post(reverse('news:delete', args=(comment.id,)))
+    assert found('заметки') == []
+    news.delete()
+    assert found('нового') == []
+
+
+@pytest.mark.django_db
+def test_hidden_comments_leave_search_index(author, news):
+    comment = Comment.objects.create(
+        news=news, author=author, text=f'Вот {BAD_WORDS[1]}'
+    )
+    call_command('moderate_comments', stdout=StringIO())
+    comment.refresh_from_db()
+    assert comment.is_hidden
+    assert search(BAD_WORDS[1]) == []
+
+
+@pytest.mark.django_db
+def test_reindex_search_indexes_rows_saved_without_signals():
+    News.objects.bulk_create([News(title='Репортаж', text='Старая запись')])
+    assert search('репортаж') == []
+    call_command('reindex_search', chunk_size=1, stdout=StringIO())
+    assert [result.news.title for result in search('репортажи')] == [
+        'Репортаж'
+    ]
+
+
+@pytest.mark.django_db
+def test_seed_news_creates_consistent_rows(author, django_user_model):
+    call_command(
+        'seed_news', users=3, news=4, comments=5, batch_size=7, workers=1,
+        password='secret', stdout=StringIO(),
+    )
+    readers = django_user_model.objects.exclude(pk=author.pk)
+    assert readers.count() == 3
+    assert all(reader.check_password('secret') for reader in readers)
+    assert len({reader.password for reader in readers}) == 1
+    assert News.objects.count() == 4
+    assert Comment.objects.filter(author__in=readers).count() == 20
+    for news in News.objects.all():
+        assert news.comment_set.count() == news.comment_count == 5
+    assert search('новость')
+
+
+# Сессия и пользователь, объект страницы ровно один раз, затем запись.
+# Адрес перехода строится из news_id, без повторных загрузок.
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'url, queries',
+    (
+        # Новость, SAVEPOINT, комментарий, индекс, счётчик, RELEASE.
+        (pytest.lazy_fixture('news_detail_url'), 8),
+        # Комментарий, UPDATE, индекс.
+        (pytest.lazy_fixture('comment_edit_url'), 5),
+        # SAVEPOINT, комментарий, DELETE, индекс, счётчик, RELEASE.
+        (pytest.lazy_fixture('comment_delete_url'), 8),
+    )
+)
+def test_post_flows_load_objects_once(
+        author_client, url, queries, form_data, django_assert_num_queries
+):
+    with django_assert_num_queries(queries):
+        response = author_client.post(url, data=form_data)
+    assert response.status_code == HTTPStatus.FOUND
@@ -0,0 +1,105 @@
+import time
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from news.profiling import (
+    RequestProfile, current_profile, instrument_templates, registry
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    registry.clear()
+    yield
+    registry.clear()
+
+
+@pytest.fixture
+def profile_all(settings):
+    settings.PROFILING_SAMPLE_RATE = 1
+
+
+@pytest.fixture
+def profiling_url():
+    return reverse('news:profiling')
+
+
+@pytest.mark.django_db
+def test_sampling_off_records_nothing(client, news_detail_url):
+    client.get(news_detail_url)
+    assert registry.report() == {}
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('profile_all')
+def test_get_and_post_recorded_separately(
+        author_client, news_detail_url, form_data
+):
+    author_client.get(news_detail_url)
+    author_client.get(news_detail_url)
+    author_client.post(news_detail_url, data=form_data)
+    report = registry.report()
+    detail = report['news:detail GET']
+    assert detail['count'] == 2
+    assert detail['queries'] > 0
+    assert detail['sql_ms'] > 0
+    assert detail['render_ms'] > 0
+    assert detail['mean_ms'] >= detail['sql_ms'] + detail['render_ms']
+    assert sum(detail['histogram_ms'].values()) == 2
+    assert report['news:detail POST']['count'] == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('profile_all')
+def test_cprofile_dumps_reported(client, news_detail_url, settings,
+                                 tmp_path):
+    settings.PROFILING_DUMP_DIR = tmp_path
+    client.get(news_detail_url)
+    assert len(list((tmp_path / 'news_detail_GET').glob('*.prof'))) == 1
+    out = StringIO()
+    call_command('profiling_report', dir=tmp_path, stdout=out)
+    assert 'news_detail_GET: запросов 1' in out.getvalue()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('profile_all')
+def test_cprofile_dumps_limited_per_page(client, news_detail_url, settings,
+                                         tmp_path):
+    settings.PROFILING_DUMP_DIR = tmp_path
+    settings.PROFILING_DUMP_LIMIT = 2
+    for _ in range(3):
+        client.get(news_detail_url)
+    assert len(list((tmp_path / 'news_detail_GET').glob('*.prof'))) == 2
+
+
+def test_fragments_rendered_in_view_counted():
+    instrument_templates()
+    profile = RequestProfile()
+    token = current_profile.set(profile)
+    start = time.perf_counter()
+    try:
+        # Фрагмент, как во view, с вложенным {% include %}.
+        render_to_string(
+            'news/includes/comments.html',
+            {'comments': [], 'comments_page': None},
+        )
+    finally:
+        current_profile.reset(token)
+    assert 0 < profile.render <= time.perf_counter() - start
+
+
+@pytest.mark.django_db
+def test_report_only_for_staff(client, not_author_client, admin_client,
+                               profiling_url):
+    assert client.get(profiling_url).status_code == HTTPStatus.FOUND
+    assert not_author_client.get(profiling_url).status_code == (
+        HTTPStatus.FORBIDDEN
+    )
+    response = admin_client.get(profiling_url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {}
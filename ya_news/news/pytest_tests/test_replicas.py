@@ -0,0 +1,135 @@
+import sqlite3
+import time
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news import search
+from news.cache import RECENT_WRITE_KEY
+from news.models import News
+from news.replicas import (
+    PIN_COOKIE, PrimaryReplicaRouter, copy_database, is_pinned, pinned,
+    read_primary
+)
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.NEWS_READ_REPLICAS = ('replica',)
+
+
+def test_router_reads_from_replica(replicas):
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(News) == 'replica'
+    assert router.db_for_write(News) == 'default'
+    assert router.allow_migrate('default', 'news')
+    assert not router.allow_migrate('replica', 'news')
+
+
+def test_router_leaves_other_apps(replicas):
+    assert PrimaryReplicaRouter().db_for_read(Session) is None
+
+
+def test_router_without_replicas():
+    assert PrimaryReplicaRouter().db_for_read(News) == 'default'
+
+
+def test_pinned_reads_from_primary(replicas):
+    token = pinned.set(True)
+    try:
+        assert PrimaryReplicaRouter().db_for_read(News) == 'default'
+    finally:
+        pinned.reset(token)
+    with read_primary():
+        assert PrimaryReplicaRouter().db_for_read(News) == 'default'
+    assert PrimaryReplicaRouter().db_for_read(News) == 'replica'
+
+
+@pytest.mark.parametrize(
+    'method, cookie, expected',
+    (
+        ('post', None, True),
+        ('get', None, False),
+        ('get', lambda: time.time() + 60, True),
+        ('get', lambda: time.time() - 1, False),
+        ('get', lambda: 'мусор', False),
+    )
+)
+def test_is_pinned(rf, method, cookie, expected):
+    request = getattr(rf, method)('/')
+    if cookie is not None:
+        request.COOKIES[PIN_COOKIE] = str(cookie())
+    assert is_pinned(request) is expected
+
+
+# Реплика в тестах — та же база; в транзакции TestCase таблицы были бы
+# заблокированы для второго соединения.
+@pytest.mark.django_db(databases=['default', 'replica'], transaction=True)
+def test_pages_read_from_replica(author_client, comment, news_detail_url,
+                                 replicas):
+    # Комментарии для автора не кэшируются и читаются из реплики.
+    with CaptureQueriesContext(connections['replica']) as queries:
+        author_client.get(news_detail_url)
+    assert any('news_comment' in query['sql'] for query in queries)
+
+
+@pytest.mark.django_db(databases=['default', 'replica'], transaction=True)
+def test_cache_filled_from_replica(client, news, news_detail_url, replicas):
+    cache.delete(RECENT_WRITE_KEY)
+    with CaptureQueriesContext(connections['default']) as queries:
+        client.get(news_detail_url)
+        client.get(reverse('news:home'))
+    assert not any('"news_' in query['sql'] for query in queries)
+
+
+@pytest.mark.django_db(databases=['default', 'replica'], transaction=True)
+def test_cache_filled_from_primary_after_write(client, news, news_detail_url,
+                                               replicas):
+    # Вне транзакции кэш сбрасывается сразу после сохранения.
+    news.title = 'Изменённый заголовок'
+    news.save()
+    with CaptureQueriesContext(connections['replica']) as queries:
+        client.get(news_detail_url)
+        client.get(reverse('news:home'))
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db(databases=['default', 'replica'], transaction=True)
+def test_reindex_reads_and_writes_given_database(news):
+    with CaptureQueriesContext(connections['default']) as primary:
+        with CaptureQueriesContext(connections['replica']) as replica:
+            search.reindex(using='replica')
+    assert len(primary) == 0
+    assert len(replica) > 0
+
+
+# Обращение к реплике в этом тесте запрещено: оно завершится ошибкой.
+@pytest.mark.django_db
+def test_own_comment_read_from_primary(author_client, news, news_detail_url,
+                                       form_data, replicas):
+    response = author_client.post(news_detail_url, data=form_data)
+    assert PIN_COOKIE in response.cookies
+    response = author_client.get(response.url)
+    assert form_data['text'] in response.content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_copy_database(tmp_path, news_list):
+    target = tmp_path / 'replica.sqlite3'
+    copy_database(target)
+    replica = sqlite3.connect(target)
+    try:
+        (count,) = replica.execute('SELECT COUNT(*) FROM news_news').fetchone()
+    finally:
+        replica.close()
+    assert count == News.objects.count()
+
+
+def test_sync_replica_refuses_default():
+    with pytest.raises(CommandError):
+        call_command('sync_replica', database=['default'])
@@ -11,6 +11,8 @@ from pytest_django.asserts import assertRedirects
     [
         (pytest.lazy_fixture('home_page_url'), 'default_client',
          HTTPStatus.OK),
+        (pytest.lazy_fixture('search_url'), 'default_client',
+         HTTPStatus.OK),
         (pytest.lazy_fixture('login_url'), 'default_client', HTTPStatus.OK),
         (pytest.lazy_fixture('logout_url'), 'default_client', HTTPStatus.OK),
         (pytest.lazy_fixture('signup_url'), 'default_client', HTTPStatus.OK),
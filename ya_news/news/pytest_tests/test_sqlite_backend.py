@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connection
+
+from news.db.base import DatabaseWrapper
+
+
+@pytest.fixture
+def open_database(tmp_path, django_db_blocker):
+    """
+    Соединения бэкенда news.db с отдельным файлом базы.
+
+    Тестовую базу они не трогают, поэтому разрешены без django_db.
+    """
+    wrappers = []
+
+    def open_(**options):
+        wrapper = DatabaseWrapper(
+            {
+                **connection.settings_dict,
+                'ENGINE': 'news.db',
+                'NAME': tmp_path / 'tuned.sqlite3',
+                'OPTIONS': options,
+            },
+            alias='tuned',
+        )
+        wrappers.append(wrapper)
+        return wrapper
+
+    with django_db_blocker.unblock():
+        yield open_
+    for wrapper in wrappers:
+        wrapper.inc_thread_sharing()
+        wrapper.close()
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+def test_pragmas_applied(open_database):
+    wrapper = open_database()
+    assert pragma(wrapper, 'journal_mode') == 'wal'
+    # 1 — NORMAL.
+    assert pragma(wrapper, 'synchronous') == 1
+    assert pragma(wrapper, 'busy_timeout') == 5000
+    assert pragma(wrapper, 'cache_size') == -64 * 1024
+
+
+def test_pragmas_from_options(open_database):
+    wrapper = open_database(pragmas={'busy_timeout': 100}, timeout=1)
+    assert pragma(wrapper, 'busy_timeout') == 100
+
+
+def test_concurrent_read_then_write_transactions(open_database):
+    """
+    Транзакции, которые сначала читают, а потом пишут, с обычным
+    бэкендом падают с «database is locked».
+    """
+    setup = open_database()
+    with setup.cursor() as cursor:
+        cursor.execute('CREATE TABLE counter (value INTEGER)')
+    local = threading.local()
+
+    def write(_):
+        if not hasattr(local, 'wrapper'):
+            local.wrapper = open_database()
+        wrapper = local.wrapper
+        wrapper._start_transaction_under_autocommit()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM counter')
+            (count,) = cursor.fetchone()
+            cursor.execute('INSERT INTO counter VALUES (%s)', (count,))
+        wrapper.commit()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(write, range(40)))
+    with setup.cursor() as cursor:
+        cursor.execute('SELECT value FROM counter ORDER BY value')
+        values = [value for (value,) in cursor.fetchall()]
+    # Писатели шли строго по очереди: каждый видел все прошлые записи.
+    assert values == list(range(40))
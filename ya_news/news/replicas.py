@@ -0,0 +1,127 @@
+"""
+Чтение из реплик базы данных.
+
+PrimaryReplicaRouter отправляет запись в default, а чтение моделей
+приложения news — в одну из реплик settings.NEWS_READ_REPLICAS;
+остальные приложения (пользователи, сессии) работают с default. Реплика
+отстаёт от основной базы, поэтому PrimaryPinningMiddleware на время
+settings.REPLICA_PIN_SECONDS после изменяющего запроса посетителя (POST
+и т. п.) читает его запросы из default: только что добавленный
+комментарий виден сразу после редиректа на #comments. Данные для кэша
+тоже читаются из реплик, кроме тех же REPLICA_PIN_SECONDS после любого
+изменения новостей (news.cache.reading_for_cache): иначе в кэш под
+новой версией попали бы ещё не дошедшие до реплики данные.
+
+Локально реплика — второй файл SQLite, «репликацию» заменяет команда
+sync_replica, копирующая основную базу.
+"""
+import contextlib
+import contextvars
+import random
+import sqlite3
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .middleware import SyncAsyncMiddleware
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# Читать ли запросы текущего HTTP-запроса из основной базы.
+pinned = contextvars.ContextVar('pinned', default=False)
+
+
+@contextlib.contextmanager
+def read_primary():
+    """Внутри блока модели news читаются из основной базы."""
+    token = pinned.set(True)
+    try:
+        yield
+    finally:
+        pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    app_label = 'news'
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != self.app_label:
+            return None
+        replicas = settings.NEWS_READ_REPLICAS
+        if pinned.get() or not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Все базы хранят одни и те же данные.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает в реплики вместе с данными при копировании.
+        return db == DEFAULT_DB_ALIAS
+
+
+def is_pinned(request):
+    if request.method not in SAFE_METHODS:
+        return True
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def set_pin(request, response):
+    if request.method in SAFE_METHODS or not settings.NEWS_READ_REPLICAS:
+        return
+    seconds = settings.REPLICA_PIN_SECONDS
+    # Срок в значении: клиент может не удалять просроченные cookie.
+    response.set_cookie(
+        PIN_COOKIE,
+        str(time.time() + seconds),
+        max_age=seconds,
+        httponly=True,
+        samesite='Lax',
+    )
+
+
+class PrimaryPinningMiddleware(SyncAsyncMiddleware):
+    """Направляет чтение закреплённых посетителей в основную базу."""
+
+    def handle(self, request):
+        token = pinned.set(is_pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            pinned.reset(token)
+        set_pin(request, response)
+        return response
+
+    async def ahandle(self, request):
+        token = pinned.set(is_pinned(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            pinned.reset(token)
+        set_pin(request, response)
+        return response
+
+
+def copy_database(target, source=DEFAULT_DB_ALIAS):
+    """
+    Копирует базу source в файл target через backup API SQLite.
+
+    Копия согласованна: читатели реплики видят либо прежнее, либо новое
+    состояние целиком.
+    """
+    connection = connections[source]
+    connection.ensure_connection()
+    destination = sqlite3.connect(target)
+    try:
+        connection.connection.backup(destination)
+    finally:
+        destination.close()
@@ -0,0 +1,256 @@
+import re
+from collections import namedtuple
+from itertools import islice
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+from .models import Comment, News
+from .stemmer import stem
+
+INDEX_TABLE = 'news_search'
+WORD = re.compile(r'\w+')
+# Новость и комментарий с одинаковым id не должны делить строку
+# индекса, поэтому rowid = id * 2 + вид записи.
+NEWS, COMMENT = 0, 1
+SNIPPET_LENGTH = 200
+
+# В индексе лежат не исходные тексты, а основы слов: стемминг делает
+# Python, а FTS5 хранит словари и считает bm25. Заголовок новости
+# весит в пять раз больше текста.
+CREATE_INDEX_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5('
+    'title, body, news_id UNINDEXED)'
+)
+RANK_SQL = (
+    f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}, rank) "
+    "VALUES ('rank', 'bm25(5.0, 1.0)')"
+)
+DROP_SQL = f'DROP TABLE IF EXISTS {INDEX_TABLE}'
+REPLACE_SQL = (
+    f'INSERT OR REPLACE INTO {INDEX_TABLE}(rowid, title, body, news_id) '
+    'VALUES (%s, %s, %s, %s)'
+)
+SEARCH_SQL = (
+    f'SELECT rowid, news_id FROM {INDEX_TABLE} '
+    f'WHERE {INDEX_TABLE} MATCH %s ORDER BY rank LIMIT %s'
+)
+
+SearchResult = namedtuple(
+    'SearchResult', ('news', 'comment', 'title', 'snippet')
+)
+
+
+def is_supported(db_connection=connection):
+    return db_connection.vendor == 'sqlite'
+
+
+def get_stems(text):
+    return [stem(word) for word in WORD.findall(text)]
+
+
+def stemmed(text):
+    return ' '.join(get_stems(text))
+
+
+def news_row(pk, title, text):
+    return pk * 2 + NEWS, stemmed(title), stemmed(text), pk
+
+
+def comment_row(pk, news_id, text):
+    return pk * 2 + COMMENT, '', stemmed(text), news_id
+
+
+def install(db_connection=connection):
+    with db_connection.cursor() as cursor:
+        cursor.execute(CREATE_INDEX_SQL)
+        cursor.execute(RANK_SQL)
+
+
+def uninstall(db_connection=connection):
+    with db_connection.cursor() as cursor:
+        cursor.execute(DROP_SQL)
+
+
+def write_rows(rows, db_connection=connection):
+    if is_supported(db_connection) and rows:
+        with db_connection.cursor() as cursor:
+            cursor.executemany(REPLACE_SQL, rows)
+
+
+def remove_rows(rowids):
+    if is_supported() and rowids:
+        placeholders = ', '.join(['%s'] * len(rowids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {INDEX_TABLE} WHERE rowid IN ({placeholders})',
+                list(rowids),
+            )
+
+
+def index_news(news):
+    write_rows([news_row(news.pk, news.title, news.text)])
+
+
+def index_comment(comment):
+    """Скрытые модератором комментарии в поиск не попадают."""
+    if comment.is_hidden:
+        remove_comments([comment.pk])
+    else:
+        write_rows([comment_row(comment.pk, comment.news_id, comment.text)])
+
+
+def remove_news(pk):
+    remove_rows([pk * 2 + NEWS])
+
+
+def remove_comments(pks):
+    remove_rows([pk * 2 + COMMENT for pk in pks])
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def reindex(news_model=News, comment_model=Comment, chunk_size=2000,
+            on_chunk=None, using=DEFAULT_DB_ALIAS):
+    """
+    Строит индекс заново, читая новости и комментарии потоком.
+
+    Строки приходят из базы порциями по chunk_size и сразу пишутся в
+    индекс, в памяти держится только текущая порция. Модели можно
+    передать явно — так индекс строит миграция. После каждой порции
+    вызывается on_chunk(число записей в ней). Читается и пишется только
+    база using.
+    """
+    db_connection = connections[using]
+    uninstall(db_connection)
+    install(db_connection)
+    sources = (
+        (
+            news_model.objects.using(using).order_by('pk').values_list(
+                'pk', 'title', 'text'
+            ),
+            news_row,
+        ),
+        (
+            comment_model.objects.using(using).filter(
+                is_hidden=False
+            ).order_by('pk').values_list('pk', 'news_id', 'text'),
+            comment_row,
+        ),
+    )
+    for queryset, make_row in sources:
+        rows = queryset.iterator(chunk_size=chunk_size)
+        for chunk in chunked(rows, chunk_size):
+            write_rows([make_row(*row) for row in chunk], db_connection)
+            if on_chunk is not None:
+                on_chunk(len(chunk))
+    with db_connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('optimize')"
+        )
+
+
+def highlight(text, stems, length=None):
+    """
+    Фрагмент текста вокруг первого найденного слова.
+
+    Подсвечиваются все слова, основа которых есть в запросе; текст
+    экранируется, так что результат безопасно выводить в шаблоне.
+    Без length возвращается весь текст.
+    """
+    found = [
+        match for match in WORD.finditer(text) if stem(match[0]) in stems
+    ]
+    start, end = 0, len(text)
+    if length is not None and end > length:
+        if found:
+            start = max(0, found[0].start() - length // 4)
+            # Не режем слово пополам.
+            while 0 < start < found[0].start() and text[start - 1].isalnum():
+                start += 1
+        end = min(end, start + length)
+    parts = ['…'] if start else []
+    position = start
+    for match in found:
+        if match.start() < start:
+            continue
+        if match.end() > end:
+            break
+        parts.append(escape(text[position:match.start()]))
+        parts.append(format_html('<mark>{}</mark>', match[0]))
+        position = match.end()
+    parts.append(escape(text[position:end]))
+    if end < len(text):
+        parts.append('…')
+    return mark_safe(''.join(parts))
+
+
+def find_rows(stems, limit):
+    """Пары (rowid, id новости) от самых релевантных."""
+    if is_supported():
+        words = ' '.join(f'"{word}"' for word in stems)
+        with connection.cursor() as cursor:
+            cursor.execute(SEARCH_SQL, (words, limit))
+            return cursor.fetchall()
+    # На других СУБД индекса нет: ищем подстроки без ранжирования.
+    news_condition, comment_condition = Q(), Q()
+    for word in stems:
+        news_condition &= Q(title__icontains=word) | Q(text__icontains=word)
+        comment_condition &= Q(text__icontains=word)
+    news = News.objects.filter(news_condition).values_list('pk', flat=True)
+    comments = Comment.objects.filter(
+        comment_condition, is_hidden=False
+    ).values_list('pk', 'news_id')
+    return [
+        *((pk * 2 + NEWS, pk) for pk in news[:limit]),
+        *((pk * 2 + COMMENT, news_id) for pk, news_id in comments[:limit]),
+    ][:limit]
+
+
+def search(query, limit=None):
+    """
+    Новости и комментарии, подходящие под запрос, с подсветкой.
+
+    Слова запроса и индекса приводятся к основам, поэтому «новостями»
+    находит «новость». Все новости и комментарии результата загружаются
+    двумя запросами.
+    """
+    stems = get_stems(query)
+    if not stems:
+        return []
+    rows = find_rows(stems, limit or settings.NEWS_SEARCH_LIMIT)
+    news = News.objects.in_bulk({news_id for _, news_id in rows})
+    comments = Comment.objects.select_related('author').in_bulk(
+        [rowid // 2 for rowid, _ in rows if rowid % 2 == COMMENT]
+    )
+    stems = set(stems)
+    results = []
+    for rowid, news_id in rows:
+        if news_id not in news:
+            continue
+        item = news[news_id]
+        if rowid % 2 == COMMENT:
+            comment = comments.get(rowid // 2)
+            if comment is None:
+                continue
+            text = comment.text
+        else:
+            comment = None
+            text = item.text
+        results.append(SearchResult(
+            news=item,
+            comment=comment,
+            title=highlight(item.title, stems),
+            snippet=highlight(text, stems, SNIPPET_LENGTH),
+        ))
+    return results
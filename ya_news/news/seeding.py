@@ -0,0 +1,188 @@
+"""
+Массовое заполнение базы для стендов и замеров.
+
+Строки создаются bulk_create порциями. Каждая порция — отдельная
+задача со своим непересекающимся диапазоном id, поэтому задачи можно
+выполнять в нескольких процессах без согласования между ними: id
+назначаются заранее, а не базой.
+
+SQLite пускает к записи одно соединение за раз, поэтому на ней
+процессы ускоряют только подготовку строк (тексты, основы слов для
+поиска), а сама вставка идёт по очереди.
+"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from . import search
+from .models import Comment, News
+
+# Сколько секунд процесс ждёт своей очереди на запись в SQLite.
+SQLITE_TIMEOUT = 600
+WORDS = (
+    'погода', 'выставка', 'футбол', 'выборы', 'концерт', 'дорога',
+    'город', 'театр', 'музей', 'парк', 'школа', 'фестиваль',
+)
+
+
+@dataclass
+class SeedStats:
+    rows: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def split(start, count, size):
+    """Диапазоны [начало, конец) по size id, покрывающие count id."""
+    stop = start + count
+    return [
+        (low, min(low + size, stop)) for low in range(start, stop, size)
+    ]
+
+
+def init_worker(database_name):
+    import django
+
+    django.setup()
+    settings_dict = connections['default'].settings_dict
+    settings_dict['NAME'] = database_name
+    if connections['default'].vendor == 'sqlite':
+        settings_dict['OPTIONS'] = {
+            **settings_dict['OPTIONS'], 'timeout': SQLITE_TIMEOUT
+        }
+
+
+def create_users(start, stop, password_hash):
+    """Читатели reader<id> с общим, заранее посчитанным хэшем пароля."""
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(id=pk, username=f'reader{pk}', password=password_hash)
+        for pk in range(start, stop)
+    )
+    return stop - start
+
+
+def create_news(start, stop, first_news_id, first_comment_id,
+                comments_per_news, users):
+    """
+    Новости с id из [start, stop) с комментариями и записями в индексе.
+
+    Комментарии новости с id n получают id подряд начиная с
+    first_comment_id + (n - first_news_id) * comments_per_news.
+    """
+    rng = random.Random(start)
+    today = date.today()
+    news = [
+        News(
+            id=pk,
+            title=f'Новость {pk}: {rng.choice(WORDS)}',
+            text=' '.join(rng.choices(WORDS, k=40)),
+            date=today - timedelta(days=pk % 3650),
+            comment_count=comments_per_news,
+        )
+        for pk in range(start, stop)
+    ]
+    comments = [
+        Comment(
+            id=first_comment_id + (item.pk - first_news_id)
+            * comments_per_news + index,
+            news_id=item.pk,
+            author_id=rng.randrange(*users),
+            text=' '.join(rng.choices(WORDS, k=12)),
+        )
+        for item in news
+        for index in range(comments_per_news)
+    ]
+    # bulk_create не отправляет сигналы, строки индекса готовим сами,
+    # до начала транзакции.
+    index_rows = [
+        search.news_row(item.pk, item.title, item.text) for item in news
+    ] + [
+        search.comment_row(comment.pk, comment.news_id, comment.text)
+        for comment in comments
+    ]
+    with transaction.atomic():
+        News.objects.bulk_create(news)
+        Comment.objects.bulk_create(comments)
+        search.write_rows(index_rows)
+    return len(news) + len(comments)
+
+
+def run_tasks(func, tasks, workers, on_progress=None):
+    """
+    Выполняет func(*task) для каждой задачи и считает созданные строки.
+
+    При workers > 1 задачи распределяются по процессам; каждый процесс
+    открывает своё соединение с той же базой. После каждой задачи
+    вызывается on_progress(stats).
+    """
+    stats = SeedStats()
+    started = time.monotonic()
+
+    def done(rows):
+        stats.rows += rows
+        stats.elapsed = time.monotonic() - started
+        if on_progress is not None:
+            on_progress(stats)
+
+    if workers <= 1:
+        for task in tasks:
+            done(func(*task))
+        return stats
+    database_name = connection.settings_dict['NAME']
+    # Дочерние процессы не должны унаследовать открытое соединение.
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(database_name,),
+    ) as executor:
+        futures = [executor.submit(func, *task) for task in tasks]
+        for future in as_completed(futures):
+            done(future.result())
+    return stats
+
+
+def seed_users(count, password, batch_size, workers, on_progress=None):
+    password_hash = make_password(password)
+    first = next_id(get_user_model())
+    tasks = [
+        (start, stop, password_hash)
+        for start, stop in split(first, count, batch_size)
+    ]
+    return (first, first + count), run_tasks(
+        create_users, tasks, workers, on_progress
+    )
+
+
+def seed_news(count, comments_per_news, users, batch_size, workers,
+              on_progress=None):
+    """
+    Новости с комментариями; users — диапазон id авторов комментариев.
+
+    batch_size — число строк (новостей вместе с их комментариями) в
+    одной задаче.
+    """
+    first_news_id = next_id(News)
+    first_comment_id = next_id(Comment)
+    news_per_task = max(1, batch_size // (1 + comments_per_news))
+    tasks = [
+        (start, stop, first_news_id, first_comment_id,
+         comments_per_news, users)
+        for start, stop in split(first_news_id, count, news_per_task)
+    ]
+    return run_tasks(create_news, tasks, workers, on_progress)
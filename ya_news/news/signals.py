@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .auth import forget_user
+from .cache import invalidate_news
+from .models import Comment, News
+
+
+@receiver((post_save, post_delete), sender=News)
+def news_changed(sender, instance, **kwargs):
+    """Изменилась новость — сбрасываем её кэш и кэш страниц."""
+    invalidate_news(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    """Изменился комментарий — сбрасываем кэш его новости и страниц."""
+    invalidate_news(instance.news_id)
+
+
+@receiver(post_save, sender=News)
+def index_news(sender, instance, **kwargs):
+    search.index_news(instance)
+
+
+@receiver(post_delete, sender=News)
+def unindex_news(sender, instance, **kwargs):
+    search.remove_news(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.remove_comments([instance.pk])
+
+
+@receiver((post_save, post_delete), sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    """Пароль, активность и прочее — сбрасываем кэш пользователя."""
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def logged_out(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
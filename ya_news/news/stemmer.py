@@ -0,0 +1,78 @@
+"""
+Стеммер Портера для русского языка (алгоритм Snowball).
+
+Окончания ищутся только в RV — части слова после первой гласной.
+Слова без русских гласных (латиница, числа) возвращаются как есть.
+"""
+import re
+from functools import lru_cache
+
+VOWELS = 'аеиоуыэюя'
+RV = re.compile(rf'^(.*?[{VOWELS}])(.*)$')
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(ся|сь)$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|'
+    r'их|ых|ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|'
+    r'ыло|ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|'
+    r'ием|ем|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+# Словообразовательный суффикс снимается только в R2.
+DERIVATIONAL = re.compile(rf'.*[^{VOWELS}]+[{VOWELS}].*ость?$')
+DERIVATIONAL_SUFFIX = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+
+
+def _remove(pattern, rv):
+    return pattern.sub('', rv, count=1)
+
+
+@lru_cache(maxsize=100000)
+def stem(word):
+    """Основа слова: «новостями» и «новость» дают «новост»."""
+    word = word.lower().replace('ё', 'е')
+    match = RV.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+
+    # Шаг 1: деепричастие, иначе возвратность и прилагательное,
+    # глагол или существительное.
+    stemmed = _remove(PERFECTIVE_GERUND, rv)
+    if stemmed == rv:
+        rv = _remove(REFLEXIVE, rv)
+        stemmed = _remove(ADJECTIVE, rv)
+        if stemmed != rv:
+            stemmed = _remove(PARTICIPLE, stemmed)
+        else:
+            stemmed = _remove(VERB, rv)
+            if stemmed == rv:
+                stemmed = _remove(NOUN, rv)
+    rv = stemmed
+
+    # Шаг 2: «и» на конце.
+    if rv.endswith('и'):
+        rv = rv[:-1]
+
+    # Шаг 3: суффикс «ост(ь)».
+    if DERIVATIONAL.match(rv):
+        rv = _remove(DERIVATIONAL_SUFFIX, rv)
+
+    # Шаг 4: мягкий знак, либо превосходная степень и двойное «н».
+    if rv.endswith('ь'):
+        rv = rv[:-1]
+    else:
+        rv = _remove(SUPERLATIVE, rv)
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+    return start + rv
@@ -1,16 +1,43 @@
+from django.conf import settings
 from django.urls import path
 
-from news import views
+from news import api, async_views, views
 
 app_name = 'news'
 
+if settings.NEWS_ASYNC_VIEWS:
+    news_list, news_detail = async_views.news_list, async_views.news_detail
+else:
+    news_list = views.NewsList.as_view()
+    news_detail = views.NewsDetailView.as_view()
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', news_list, name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', news_detail, name='detail'),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('profiling/', views.ProfilingReport.as_view(), name='profiling'),
+    path('metrics/', views.PrometheusMetrics.as_view(), name='metrics'),
+    path('api/news/', api.NewsListApi.as_view(), name='api_news_list'),
+    path(
+        'api/news/<int:pk>/',
+        api.NewsDetailApi.as_view(),
+        name='api_news_detail'
+    ),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.NewsCommentsApi.as_view(),
+        name='api_news_comments'
+    ),
+    path('api/comments/', api.OwnCommentsApi.as_view(), name='api_comments'),
+    path(
+        'api/comments/<int:pk>/',
+        api.CommentApi.as_view(),
+        name='api_comment'
+    ),
 ]
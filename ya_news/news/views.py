@@ -1,39 +1,272 @@
+import hashlib
+
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import (
+    LoginRequiredMixin, UserPassesTestMixin
+)
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.http import (
+    Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+)
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
+from django.utils.safestring import mark_safe
 from django.views import generic
+from django.views.decorators.http import conditional_page
 
+from .cache import (
+    AnonymousPageCacheMixin, cached_fragment, cached_page_part,
+    get_news_version, get_page_generation
+)
+from .conditional import ConditionalGetMixin
 from .forms import CommentForm
+from .instrumentation import metrics
 from .models import Comment, News
+from .pagination import (
+    InvalidCursor, KeysetPaginationMixin, KeysetPaginator, get_page_or_404
+)
+from .profiling import registry
+from .search import search
+
 
+@method_decorator(conditional_page, name='dispatch')
+class NewsList(
+        ConditionalGetMixin,
+        AnonymousPageCacheMixin,
+        KeysetPaginationMixin,
+        generic.ListView,
+):
+    """
+    Список новостей, для анонимных читателей — из кэша.
 
-class NewsList(generic.ListView):
-    """Список новостей."""
+    Анонимным читателям страница отдаётся из кэша, и ETag считается по
+    ней самой (conditional_page): ответ 304 не стоит ни одного запроса
+    к БД. Для вошедших пользователей страница не кэшируется, и ETag
+    считается до рендера (get_validators).
+    """
     model = News
     template_name = 'news/home.html'
+    ordering = ('-date', '-id')
 
     def get_queryset(self):
         """
-        Выводим только несколько последних новостей.
+        Выводим новости постранично, по курсору.
 
-        Их количество определяется в настройках проекта.
+        Размер страницы определяется в настройках проекта.
+        Число комментариев берётся из News.comment_count,
+        таблица комментариев при этом не запрашивается.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()
+
+    def get_paginate_by(self, queryset):
+        return settings.NEWS_COUNT_ON_HOME_PAGE
+
+    def get_validators(self):
+        """
+        Поколение страниц и сводка по новостям страницы.
+
+        Любое изменение новости или комментария меняет поколение
+        (bump_page_generation), а сводка кэшируется в этом поколении:
+        повторная проверка не обращается к новостям вовсе. Без кэша
+        сводку даёт один запрос страницы, и загруженная страница идёт
+        и в рендер.
+        """
+        if not self.request.user.is_authenticated:
+            return None
+        cursor = self.request.GET.get(self.cursor_kwarg, '')
+        generation = get_page_generation()
+        parts = cached_page_part(
+            generation, 'list_validators', self.load_validators,
+            variant=cursor,
+        )
+        if parts is None:
+            return None
+        return (generation, *parts), None
+
+    def load_validators(self):
+        paginator = KeysetPaginator(
+            self.get_queryset(), self.get_ordering(),
+            self.get_paginate_by(None),
+        )
+        try:
+            self.page = paginator.get_page(
+                self.request.GET.get(self.cursor_kwarg)
+            )
+        except InvalidCursor:
+            # Некорректный курсор — view сам ответит 404.
+            return None
+        news = self.page.objects
+        return (
+            len(news),
+            max((item.pk for item in news), default=None),
+            max((item.date for item in news), default=None),
+            sum(item.comment_count for item in news),
+            self.page.has_next(),
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        page = getattr(self, 'page', None)
+        if page is None:
+            return super().paginate_queryset(queryset, page_size)
+        return page.paginator, page, page.object_list, page.has_other_pages()
+
+
+def add_comment(comment):
+    """Сохраняет новый комментарий и увеличивает счётчик у его новости."""
+    with transaction.atomic():
+        comment.save()
+        News.objects.filter(pk=comment.news_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
 
+def delete_comment(comment):
+    """Удаляет комментарий; счётчик новости учитывает только видимые."""
+    with transaction.atomic():
+        comment.delete()
+        if comment.is_hidden:
+            return
+        News.objects.filter(
+            pk=comment.news_id, comment_count__gt=0
+        ).update(
+            comment_count=F('comment_count') - 1
+        )
+
+
+class NewsSearch(generic.TemplateView):
+    """Поиск по новостям и комментариям."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '')
+        context['query'] = query
+        context['results'] = search(query)
+        return context
+
+
+class ObjectMemoMixin:
+    """
+    get_object() обращается к базе один раз за запрос.
 
-class NewsDetail(generic.DetailView):
+    Повторный вызов без queryset (из get_success_url, шаблона или
+    другого миксина) возвращает уже загруженный объект: экземпляр view
+    создаётся заново для каждого запроса.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+
+class NewsFragmentsMixin:
+    """
+    Текст новости и список комментариев рендерятся отдельными фрагментами.
+
+    Текст новости одинаков для всех и кэшируется всегда, список
+    комментариев — только для анонимных читателей: авторам в нём
+    показываются ссылки на редактирование.
+    """
+    comments_cursor_kwarg = 'comments'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        pk = self.kwargs['pk']
+        version = get_news_version(pk)
+        # Если оба фрагмента нашлись в кэше, новость из БД не загружается.
+        news = self.object or SimpleLazyObject(self.get_object)
+        context['news_body'] = mark_safe(cached_fragment(
+            pk, version, 'body', lambda: self.render_body(news)
+        ))
+        cursor = self.request.GET.get(self.comments_cursor_kwarg, '')
+        if self.request.user.is_authenticated:
+            comments = self.render_comments(news, cursor)
+        else:
+            comments = cached_fragment(
+                pk, version, 'comments',
+                lambda: self.render_comments(news, cursor),
+                variant=cursor,
+            )
+        context['news_comments'] = mark_safe(comments)
+        return context
+
+    def render_body(self, news):
+        return render_to_string(
+            'news/includes/body.html', {'news': news}, self.request
+        )
+
+    def render_comments(self, news, cursor):
+        paginator = KeysetPaginator(
+            news.comment_set.filter(is_hidden=False).select_related('author'),
+            ('created', 'id'),
+            settings.COMMENTS_COUNT_ON_PAGE,
+        )
+        page = get_page_or_404(paginator, cursor)
+        return render_to_string(
+            'news/includes/comments.html',
+            {'comments': page.object_list, 'comments_page': page},
+            self.request,
+        )
+
+
+class NewsDetail(
+        ConditionalGetMixin, NewsFragmentsMixin, generic.DetailView
+):
     model = News
     template_name = 'news/detail.html'
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+    def get(self, request, *args, **kwargs):
+        # Новость уже загружена, если части ETag не нашлись в кэше.
+        self.object = getattr(self, 'news', None)
+        return self.render_to_response(self.get_context_data())
+
+    def get_validators(self):
+        """
+        Части ETag из кэша версии новости или из одного запроса.
+
+        Запрос — строка новости по первичному ключу с последним
+        изменением её комментариев (поиск по индексу news, updated);
+        сами комментарии не читаются, а загруженная новость идёт и в
+        рендер. Заголовок и текст входят в части хэшем: целиком они в
+        кэше не нужны. Last-Modified не отдаётся: после удаления
+        комментария время изменения может уйти назад.
+        """
+        pk = self.kwargs['pk']
+        parts = cached_fragment(
+            pk, get_news_version(pk), 'validators', self.load_validators
+        )
+        if parts is None:
+            return None
+        return parts, None
+
+    def load_validators(self):
+        last_comment = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by('-updated').values('updated')[:1]
+        self.news = self.model.objects.annotate(
+            last_comment=Subquery(last_comment)
+        ).filter(pk=self.kwargs['pk']).first()
+        if self.news is None:
+            return None
+        return (
+            self.news.pk,
+            self.news.date,
+            self.news.comment_count,
+            self.news.last_comment,
+            hashlib.md5(
+                repr((self.news.title, self.news.text)).encode()
+            ).hexdigest(),
         )
-        return obj
+
+    def get_object(self, queryset=None):
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -44,6 +277,8 @@ class NewsDetail(generic.DetailView):
 
 class NewsComment(
         LoginRequiredMixin,
+        ObjectMemoMixin,
+        NewsFragmentsMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,12 +294,13 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        add_comment(comment)
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -78,14 +314,14 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
-class CommentBase(LoginRequiredMixin):
+class CommentBase(LoginRequiredMixin, ObjectMemoMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Адрес новости берём из news_id, саму новость не загружаем."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
@@ -102,3 +338,35 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        """Вместе с видимым комментарием уменьшаем счётчик у новости."""
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        delete_comment(self.object)
+        return HttpResponseRedirect(success_url)
+
+
+class ProfilingReport(UserPassesTestMixin, generic.View):
+    """Сводка ProfilingMiddleware по страницам, только для сотрудников."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(
+            registry.report(), json_dumps_params={'ensure_ascii': False}
+        )
+
+
+class PrometheusMetrics(generic.View):
+    """Счётчики SQL-запросов для Prometheus, только с разрешённых адресов."""
+
+    def get(self, request, *args, **kwargs):
+        if request.META.get('REMOTE_ADDR') not in (
+                settings.METRICS_ALLOWED_IPS):
+            raise Http404
+        return HttpResponse(
+            metrics.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
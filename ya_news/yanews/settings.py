@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,6 +22,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'news.profiling.ProfilingMiddleware',
+    'news.instrumentation.QueryInstrumentationMiddleware',
+    'news.replicas.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,13 +59,75 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Реплика только для чтения: локально её наполняет команда sync_replica.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['news.replicas.PrimaryReplicaRouter']
+
+# SQLITE_PROFILE=production включает бэкенд news.db (WAL, PRAGMA, очередь
+# писателей) и постоянные соединения вместо открытия файла на каждый запрос.
+if os.environ.get('SQLITE_PROFILE') == 'production':
+    DATABASES['default'].update(ENGINE='news.db', CONN_MAX_AGE=600)
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
 
+# SQL-запросы страниц пишутся в лог news.sql строками JSON: медленные и
+# повторные — на уровне WARNING, все остальные — на уровне DEBUG.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'news.instrumentation.JsonFormatter'},
+    },
+    'handlers': {
+        'json_console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'news.sql': {
+            'handlers': ['json_console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Сессии и пользователь сессии из кэша (CachedModelBackend) работают
+# только с кэшем, общим для всех процессов сайта: с LocMemCache выход и
+# смена пароля сбрасывали бы кэш лишь в своём процессе, и в остальных
+# сессия продолжала бы действовать. Поэтому по умолчанию сессии в БД, а
+# SHARED_CACHE_DIR=<каталог> включает общий файловый кэш и вместе с ним
+# кэшированные сессии и пользователя. Для memcached или Redis задайте
+# CACHES сами; проверка news.E001 не даст включить их с LocMemCache.
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 60
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+if os.environ.get('SHARED_CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['SHARED_CACHE_DIR'],
+    }
+    AUTHENTICATION_BACKENDS = ['news.auth.CachedModelBackend']
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
 LANGUAGE_CODE = 'ru'
 
 TIME_ZONE = 'Europe/Moscow'
@@ -80,3 +146,49 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_PAGE = 50
+
+NEWS_FRAGMENT_CACHE_TIMEOUT = 60 * 5
+
+# Главная страница для анонимных читателей кэшируется целиком.
+NEWS_PAGE_CACHE_TIMEOUT = 10
+
+# Файл с дополнительными запрещёнными словами, по слову на строку.
+BAD_WORDS_FILE = None
+
+# Сколько новостей и комментариев показывать в результатах поиска.
+NEWS_SEARCH_LIMIT = 20
+
+# Доля запросов, которые замеряет ProfilingMiddleware (0 — отключено).
+PROFILING_SAMPLE_RATE = 0
+
+# Каталог для дампов cProfile замеренных запросов; None — без cProfile.
+PROFILING_DUMP_DIR = None
+# Сколько последних дампов хранить для каждой страницы.
+PROFILING_DUMP_LIMIT = 200
+
+# SQL-запросы дольше порога логируются как медленные, мс.
+SQL_SLOW_QUERY_MS = 100
+
+# Параметры повторённых SQL-запросов в логе duplicate_query. В них бывают
+# пароли и личные данные, поэтому включать только для отладки.
+SQL_LOG_PARAMS = False
+
+# Адреса, с которых Prometheus может забирать счётчики со страницы /metrics/.
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Под ASGI отдавать список и страницу новости асинхронными view
+# (news.async_views), которые ходят в БД из пула в ASYNC_DB_THREADS потоков.
+NEWS_ASYNC_VIEWS = False
+ASYNC_DB_THREADS = 8
+
+# Реплики, из которых читают страницы; пусто — всё читается из default.
+NEWS_READ_REPLICAS = ()
+
+# Сколько секунд после своего POST посетитель читает из основной базы.
+REPLICA_PIN_SECONDS = 10
+
+# Размер страницы списков JSON API и порция строк при выгрузке NDJSON.
+API_PAGE_SIZE = 100
+API_EXPORT_CHUNK_SIZE = 2000
@@ -0,0 +1,39 @@
+"""
+Замеры производительности YaNote.
+
+Каждый скрипт запускается из каталога ya_note командой
+``python -m benchmarks.<имя> --help`` и работает с отдельной
+базой SQLite, рабочая db.sqlite3 не затрагивается.
+"""
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def setup(database=None):
+    """Настраивает Django на отдельную базу и применяет миграции."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    if database is None:
+        database = Path(tempfile.mkdtemp()) / 'benchmark.sqlite3'
+    settings.DATABASES['default']['NAME'] = database
+    # Иначе connection.queries копит каждый запрос замера.
+    settings.DEBUG = False
+    django.setup()
+    call_command('migrate', verbosity=0)
+    return database
+
+
+def measure(func, repeat):
+    """Медиана времени выполнения func в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
@@ -0,0 +1,189 @@
+"""
+Синхронные и асинхронные view заметок под ASGI.
+
+Приложение get_asgi_application() вызывается напрямую, без сети, из
+--connections одновременных «соединений» (корутин) от имени одного
+автора; каждое шлёт запросы подряд, пока не наберётся --requests.
+Прогон повторяется с синхронными view и с асинхронными
+(NOTES_ASYNC_VIEWS), печатается пропускная способность и перцентили
+времени ответа:
+
+    python -m benchmarks.asgi --connections 500 --requests 5000
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import time
+from pathlib import Path
+
+from . import harness, setup
+
+# Сколько разных заметок обходить для страниц заметки.
+SAMPLE_SIZE = 100
+
+
+async def call(application, path, cookie):
+    """Один GET через интерфейс ASGI; возвращает код ответа."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'cookie', cookie)],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    status = None
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    return status
+
+
+async def load(application, paths, cookie, connections, requests):
+    samples = []
+    remaining = requests
+
+    async def connection():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            status = await call(application, random.choice(paths), cookie)
+            samples.append(harness.Sample(
+                (time.perf_counter() - start) * 1000, 0, status
+            ))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(connections)))
+    return samples, time.perf_counter() - started
+
+
+def use_async_views(enabled):
+    from django.conf import settings
+    from django.urls import clear_url_caches
+
+    import notes.urls
+    import yanote.urls
+
+    settings.NOTES_ASYNC_VIEWS = enabled
+    importlib.reload(notes.urls)
+    importlib.reload(yanote.urls)
+    clear_url_caches()
+
+
+def get_session_cookie(author):
+    """Заголовок Cookie с сессией автора."""
+    from django.conf import settings
+    from django.test import Client
+
+    client = Client()
+    client.force_login(author)
+    session = client.cookies[settings.SESSION_COOKIE_NAME].value
+    return f'{settings.SESSION_COOKIE_NAME}={session}'.encode()
+
+
+def get_paths(author):
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    slugs = Note.objects.filter(author=author).order_by('?').values_list(
+        'slug', flat=True
+    )[:SAMPLE_SIZE]
+    return [reverse('notes:list')] + [
+        reverse('notes:detail', args=(slug,)) for slug in slugs
+    ]
+
+
+def run_mode(name, paths, cookie, args):
+    from django.core.asgi import get_asgi_application
+
+    from notes.instrumentation import metrics
+
+    use_async_views(name == 'async')
+    application = get_asgi_application()
+    asyncio.run(load(application, paths, cookie, 10, args.warmup))
+    metrics.clear()
+    samples, elapsed = asyncio.run(
+        load(application, paths, cookie, args.connections, args.requests)
+    )
+    result = harness.summarize(samples, elapsed)
+    result['queries_per_request'] = round(
+        metrics.total('sql_queries_total') / len(samples), 2
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--notes', type=int, default=1000,
+                        help='Заметок у каждого пользователя.')
+    parser.add_argument('--connections', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=100)
+    parser.add_argument('--threads', type=int,
+                        help='Размер пула БД асинхронных view.')
+    parser.add_argument('--output', type=Path, help='Файл для отчёта JSON.')
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    from notes.seeding import seed_notes, seed_users
+
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    if args.threads is not None:
+        settings.ASYNC_DB_THREADS = args.threads
+    # Под такой нагрузкой предупреждения о медленных запросах — шум.
+    settings.SQL_SLOW_QUERY_MS = float('inf')
+    workers = os.cpu_count()
+    users, _ = seed_users(args.users, 'password', 5000, workers)
+    seed_notes(args.notes, users, 5000, workers)
+    author = get_user_model().objects.first()
+    paths = get_paths(author)
+    cookie = get_session_cookie(author)
+
+    report = {
+        'commit': harness.get_commit(),
+        'connections': args.connections,
+        'async_db_threads': settings.ASYNC_DB_THREADS,
+        'modes': {},
+    }
+    print(
+        f'{"view":<8}{"p50":>9}{"p95":>9}{"p99":>9}'
+        f'{"зап/с":>9}{"SQL":>7}{"ошибки":>8}'
+    )
+    for name in ('sync', 'async'):
+        result = run_mode(name, paths, cookie, args)
+        report['modes'][name] = result
+        print(
+            f'{name:<8}{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}'
+            f'{result["p99_ms"]:>9.2f}{result["throughput_rps"]:>9.0f}'
+            f'{result["queries_per_request"]:>7.1f}{result["errors"]:>8}'
+        )
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2)
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Нагрузочный прогон страниц через WSGI-приложение в том же процессе.
+
+Запросы выполняет django.test.Client (он вызывает WSGI-обработчик
+Django напрямую, без сети) в нескольких потоках. Для каждой страницы
+считаются перцентили времени ответа, пропускная способность и число
+SQL-запросов на ответ. Отчёт сохраняется в JSON, чтобы сравнивать
+коммиты: с --baseline прогон завершается с ошибкой, если страница
+стала медленнее порога.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from pathlib import Path
+
+# paths — адреса, которые обходятся по кругу; user — пользователь,
+# от имени которого идут запросы (None — аноним).
+Route = namedtuple('Route', ('name', 'paths', 'user'))
+Sample = namedtuple('Sample', ('ms', 'queries', 'status'))
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--requests', type=int, default=200,
+        help='Запросов к каждой странице.',
+    )
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument(
+        '--warmup', type=int, default=10,
+        help='Запросов к странице до замера (прогрев кэшей).',
+    )
+    parser.add_argument('--output', type=Path, help='Файл для отчёта JSON.')
+    parser.add_argument(
+        '--baseline', type=Path, help='Отчёт JSON прошлого прогона.'
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='Допустимое ухудшение p95 и пропускной способности (доля).',
+    )
+
+
+def run_worker(route, paths, requests):
+    from django.db import connection
+    from django.test import Client
+
+    client = Client()
+    if route.user is not None:
+        client.force_login(route.user)
+    queries = 0
+
+    def count_query(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    samples = []
+    try:
+        with connection.execute_wrapper(count_query):
+            for _ in range(requests):
+                path = route.paths[next(paths) % len(route.paths)]
+                queries = 0
+                start = time.perf_counter()
+                response = client.get(path)
+                samples.append(Sample(
+                    (time.perf_counter() - start) * 1000,
+                    queries,
+                    response.status_code,
+                ))
+    finally:
+        # Соединения с БД у каждого потока свои.
+        connection.close()
+    return samples
+
+
+def run_route(route, requests, workers, warmup):
+    if warmup:
+        run_worker(route, count(), warmup)
+    paths = count()
+    shares = [
+        requests // workers + (index < requests % workers)
+        for index in range(workers)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(run_worker, route, paths, share)
+            for share in shares if share
+        ]
+        samples = [
+            sample for future in futures for sample in future.result()
+        ]
+    return summarize(samples, time.perf_counter() - started)
+
+
+def summarize(samples, elapsed):
+    timings = sorted(sample.ms for sample in samples)
+    if len(timings) > 1:
+        cuts = statistics.quantiles(timings, n=100, method='inclusive')
+    else:
+        cuts = timings * 99
+    return {
+        'requests': len(samples),
+        'errors': sum(sample.status >= 400 for sample in samples),
+        'p50_ms': round(cuts[49], 3),
+        'p95_ms': round(cuts[94], 3),
+        'p99_ms': round(cuts[98], 3),
+        'throughput_rps': round(len(samples) / elapsed, 1),
+        'queries_per_request': round(
+            statistics.mean(sample.queries for sample in samples), 2
+        ),
+    }
+
+
+def compare(report, baseline, threshold):
+    """Описания регрессий относительно отчёта baseline."""
+    regressions = []
+    for name, current in report['routes'].items():
+        previous = baseline['routes'].get(name)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p95 {current["p95_ms"]:.1f} мс, '
+                f'было {previous["p95_ms"]:.1f} мс'
+            )
+        if current['throughput_rps'] < (
+                previous['throughput_rps'] * (1 - threshold)):
+            regressions.append(
+                f'{name}: {current["throughput_rps"]:.0f} запросов/с, '
+                f'было {previous["throughput_rps"]:.0f}'
+            )
+        if current['queries_per_request'] > previous['queries_per_request']:
+            regressions.append(
+                f'{name}: {current["queries_per_request"]} SQL-запросов '
+                f'на ответ, было {previous["queries_per_request"]}'
+            )
+        if current['errors'] > previous['errors']:
+            regressions.append(f'{name}: ошибок {current["errors"]}')
+    return regressions
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args, routes, data):
+    """
+    Прогоняет страницы, печатает таблицу и пишет отчёт.
+
+    data — объёмы заполненных данных, попадают в отчёт. Возвращает код
+    завершения: 1, если есть регрессии относительно --baseline или
+    страницы отвечали ошибками.
+    """
+    from django.conf import settings
+
+    # Client ходит на хост testserver.
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    report = {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'data': data,
+        'requests': args.requests,
+        'workers': args.workers,
+        'routes': {},
+    }
+    print(
+        f'{"страница":<28}{"p50":>9}{"p95":>9}{"p99":>9}'
+        f'{"зап/с":>9}{"SQL":>7}{"ошибки":>8}'
+    )
+    for route in routes:
+        result = run_route(route, args.requests, args.workers, args.warmup)
+        report['routes'][route.name] = result
+        print(
+            f'{route.name:<28}{result["p50_ms"]:>9.2f}'
+            f'{result["p95_ms"]:>9.2f}{result["p99_ms"]:>9.2f}'
+            f'{result["throughput_rps"]:>9.0f}'
+            f'{result["queries_per_request"]:>7.1f}{result["errors"]:>8}'
+        )
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2)
+        )
+    problems = [
+        f'{name}: ошибок {result["errors"]}'
+        for name, result in report['routes'].items() if result['errors']
+    ]
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        problems += compare(report, baseline, args.threshold)
+    for problem in problems:
+        print(f'РЕГРЕССИЯ {problem}')
+    return 1 if problems else 0
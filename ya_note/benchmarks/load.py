@@ -0,0 +1,98 @@
+"""
+Нагрузочный прогон всех страниц notes.urls.
+
+Заполняет отдельную базу пользователями с заметками (как команда
+seed_notes) и обходит каждую страницу в несколько потоков от имени
+одного из авторов. Отчёт JSON можно сравнить с прошлым прогоном:
+
+    python -m benchmarks.load --output before.json
+    python -m benchmarks.load --baseline before.json --threshold 0.2
+"""
+import argparse
+import os
+import sys
+
+from . import harness, setup
+
+# Сколько разных заметок обходить для страниц заметки.
+SAMPLE_SIZE = 100
+
+
+def get_routes():
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from notes.models import Note
+    from notes.seeding import WORDS
+
+    from .harness import Route
+
+    author = get_user_model().objects.first()
+    slugs = list(
+        Note.objects.filter(author=author).order_by('?').values_list(
+            'slug', flat=True
+        )[:SAMPLE_SIZE]
+    )
+
+    def note_routes(name):
+        paths = [reverse(name, args=(slug,)) for slug in slugs]
+        return Route(name, paths, author)
+
+    list_url = reverse('notes:list')
+    return [
+        Route('notes:home', [reverse('notes:home')], None),
+        Route('notes:list', [list_url], author),
+        Route(
+            'notes:list (deep)',
+            [
+                f'{list_url}?cursor={cursor}'
+                for cursor in get_deep_cursors(author)
+            ],
+            author,
+        ),
+        Route(
+            'notes:search',
+            [f'{reverse("notes:search")}?q={word}' for word in WORDS],
+            author,
+        ),
+        Route('notes:add', [reverse('notes:add')], author),
+        note_routes('notes:detail'),
+        note_routes('notes:edit'),
+        note_routes('notes:delete'),
+        Route('notes:success', [reverse('notes:success')], author),
+    ]
+
+
+def get_deep_cursors(author):
+    """Курсоры на страницы в конце списка заметок автора."""
+    from django.conf import settings
+
+    from notes.models import Note
+    from notes.pagination import FORWARD, KeysetPaginator
+
+    notes = Note.objects.filter(author=author).only('id')
+    paginator = KeysetPaginator(notes, ('id',), settings.NOTES_COUNT_ON_PAGE)
+    tail = notes.order_by('-id')[settings.NOTES_COUNT_ON_PAGE:][:SAMPLE_SIZE]
+    return [paginator.encode_cursor(note, FORWARD) for note in tail]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--notes', type=int, default=10000,
+                        help='Заметок у каждого пользователя.')
+    parser.add_argument('--seed-workers', type=int, default=os.cpu_count())
+    harness.add_arguments(parser)
+    args = parser.parse_args()
+
+    setup()
+    from notes.seeding import seed_notes, seed_users
+
+    users, _ = seed_users(args.users, 'password', 5000, args.seed_workers)
+    seed_notes(args.notes, users, 5000, args.seed_workers)
+    data = {'users': args.users, 'notes_per_user': args.notes}
+    sys.exit(harness.run(args, get_routes(), data))
+
+
+if __name__ == '__main__':
+    main()
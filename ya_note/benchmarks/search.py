@@ -0,0 +1,133 @@
+"""
+Поиск по заметкам: индекс FTS5 против сканирования icontains.
+
+Заполняет отдельную базу заметками нескольких авторов, перестраивает
+поисковый индекс тем же способом, что и команда rebuild_search_index,
+и для слов разной частоты печатает медиану времени поиска у одного
+автора через notes.search.search_notes и через icontains. Слова заметок
+берутся из словаря с распределением Ципфа, как в живом тексте: по
+частым словам FTS5 ранжирует сотни совпадений и для IDF читает весь
+список документов слова, по редким icontains просматривает все заметки
+автора.
+
+    python -m benchmarks.search --notes 1000000 --authors 100
+"""
+import argparse
+import random
+import time
+from itertools import accumulate
+
+from . import measure, setup
+
+BATCH_SIZE = 10000
+LETTERS = 'абвгдежзиклмнопрстуфхцчшэюя'
+# Места слов в словаре (от самого частого) для запросов из одного слова.
+QUERY_RANKS = (0, 100, 1000, 10000)
+
+
+class Vocabulary:
+
+    def __init__(self, size):
+        self.words = [
+            ''.join(random.choices(LETTERS, k=random.randint(4, 9)))
+            for _ in range(size)
+        ]
+        self.weights = list(
+            accumulate(1 / rank for rank in range(1, size + 1))
+        )
+
+    def text(self, words_count):
+        return ' '.join(random.choices(
+            self.words, cum_weights=self.weights, k=words_count
+        ))
+
+    def queries(self):
+        single = [self.words[rank] for rank in QUERY_RANKS]
+        return [
+            *single,
+            f'{single[1]} {single[2]}',
+            f'{single[0]} {single[3]}',
+        ]
+
+
+def seed(notes_count, authors_count, vocabulary):
+    from django.contrib.auth import get_user_model
+
+    from notes import search
+    from notes.models import Note
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'author{index}') for index in range(authors_count)
+    )
+    author_ids = list(User.objects.values_list('pk', flat=True))
+    # Без триггеров массовая вставка быстрее, индекс строится разом.
+    search.uninstall()
+    for start in range(0, notes_count, BATCH_SIZE):
+        size = min(BATCH_SIZE, notes_count - start)
+        Note.objects.bulk_create(
+            Note(
+                title=vocabulary.text(3),
+                text=vocabulary.text(30),
+                slug=f'note-{start + index}',
+                author_id=random.choice(author_ids),
+            )
+            for index in range(size)
+        )
+    started = time.perf_counter()
+    search.rebuild()
+    return time.perf_counter() - started
+
+
+def icontains(author, query, limit):
+    from django.db.models import Q
+
+    from notes.models import Note
+    from notes.search import get_terms
+
+    condition = Q()
+    for term in get_terms(query):
+        condition &= Q(title__icontains=term) | Q(text__icontains=term)
+    return list(
+        Note.objects.filter(condition, author=author).only(
+            'id', 'title', 'slug'
+        )[:limit]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--notes', type=int, default=1000000)
+    parser.add_argument('--authors', type=int, default=100)
+    parser.add_argument('--words', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    from notes.search import search_notes
+
+    random.seed(args.seed)
+    print(f'Заполнение: {args.notes} заметок, {args.authors} авторов')
+    vocabulary = Vocabulary(args.words)
+    elapsed = seed(args.notes, args.authors, vocabulary)
+    print(f'Перестройка индекса: {elapsed:.1f} с')
+    author = get_user_model().objects.first()
+    limit = settings.NOTES_SEARCH_LIMIT
+    print(f'Заметок у автора: {author.note_set.count()}')
+    print(
+        f'{"запрос":<24}{"найдено":>10}{"FTS5, мс":>12}'
+        f'{"icontains, мс":>16}'
+    )
+    for query in vocabulary.queries():
+        found = len(search_notes(author, query, limit))
+        fts = measure(lambda: search_notes(author, query, limit), args.repeat)
+        scan = measure(lambda: icontains(author, query, limit), args.repeat)
+        print(f'{query:<24}{found:>10}{fts:>12.2f}{scan:>16.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Сессии и пользователь из БД и из кэша на странице notes:list.
+
+Создаёт --sessions пользователей с заметками и по активной сессии на
+каждого, затем для каждого профиля открывает список заметок от имени
+случайных сессий и печатает перцентили времени ответа, пропускную
+способность и число SQL-запросов на ответ:
+
+* db — сессии в БД, пользователь из auth_user (настройки по умолчанию);
+* cached_db — сессии и пользователь из кэша (с SHARED_CACHE_DIR);
+* signed_cookies — сессия в cookie, пользователь из кэша.
+
+Кэш перед замером прогревается одним запросом от каждой сессии:
+
+    python -m benchmarks.sessions --sessions 10000 --requests 5000
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from . import harness, setup
+
+CACHED_BACKEND = 'notes.auth.CachedModelBackend'
+PROFILES = {
+    'db': (
+        'django.contrib.sessions.backends.db',
+        'django.contrib.auth.backends.ModelBackend',
+    ),
+    'cached_db': (
+        'django.contrib.sessions.backends.cached_db', CACHED_BACKEND
+    ),
+    'signed_cookies': (
+        'django.contrib.sessions.backends.signed_cookies', CACHED_BACKEND
+    ),
+}
+BATCH_SIZE = 5000
+
+
+def create_sessions(users, engine, backend):
+    """Ключи сессий, в которые вошли пользователи из диапазона users."""
+    from importlib import import_module
+
+    from django.conf import settings
+    from django.contrib.auth import (
+        BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+    )
+    from django.contrib.sessions.models import Session
+    from django.utils import timezone
+
+    store_class = import_module(engine).SessionStore
+    # У всех пользователей общий пароль, а с ним и хэш для сессии.
+    session_hash = get_user_model().objects.first().get_session_auth_hash()
+    keys = []
+    rows = []
+    expire_date = timezone.now() + timedelta(
+        seconds=settings.SESSION_COOKIE_AGE
+    )
+    for pk in range(*users):
+        store = store_class()
+        data = {
+            SESSION_KEY: str(pk),
+            BACKEND_SESSION_KEY: backend,
+            HASH_SESSION_KEY: session_hash,
+        }
+        if engine.endswith('signed_cookies'):
+            store.update(data)
+            store.save()
+            keys.append(store.session_key)
+            continue
+        key = store._get_new_session_key()
+        keys.append(key)
+        rows.append(Session(
+            session_key=key,
+            session_data=store.encode(data),
+            expire_date=expire_date,
+        ))
+    Session.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return keys
+
+
+def run_worker(url, keys):
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client
+
+    client = Client()
+    queries = 0
+
+    def count_query(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    samples = []
+    try:
+        with connection.execute_wrapper(count_query):
+            for key in keys:
+                client.cookies[settings.SESSION_COOKIE_NAME] = key
+                queries = 0
+                start = time.perf_counter()
+                response = client.get(url)
+                samples.append(harness.Sample(
+                    (time.perf_counter() - start) * 1000,
+                    queries,
+                    response.status_code,
+                ))
+    finally:
+        connection.close()
+    return samples
+
+
+def run_profile(name, users, url, args):
+    from django.conf import settings
+    from django.contrib.sessions.models import Session
+    from django.core.cache import cache
+
+    engine, backend = PROFILES[name]
+    settings.SESSION_ENGINE = engine
+    settings.AUTHENTICATION_BACKENDS = [backend]
+    cache.clear()
+    Session.objects.all().delete()
+    keys = create_sessions(users, engine, backend)
+    # Прогрев: каждая сессия и её пользователь попадают в кэш.
+    run_worker(url, keys)
+    chosen = random.choices(keys, k=args.requests)
+    shares = [chosen[index::args.workers] for index in range(args.workers)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as executor:
+        results = executor.map(run_worker, [url] * len(shares), shares)
+        samples = [sample for result in results for sample in result]
+    return harness.summarize(samples, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--notes', type=int, default=10,
+                        help='Заметок у каждого пользователя.')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--output', type=Path, help='Файл для отчёта JSON.')
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from django.urls import reverse
+
+    from notes.seeding import seed_notes, seed_users
+
+    # Сессии и пользователи всех посетителей должны поместиться в кэш.
+    settings.CACHES['default'].setdefault('OPTIONS', {})['MAX_ENTRIES'] = (
+        4 * args.sessions
+    )
+    # Под такой нагрузкой предупреждения о медленных запросах — шум.
+    settings.SQL_SLOW_QUERY_MS = float('inf')
+    workers = os.cpu_count()
+    users, _ = seed_users(args.sessions, 'password', BATCH_SIZE, workers)
+    seed_notes(args.notes, users, BATCH_SIZE, workers)
+    url = reverse('notes:list')
+
+    report = {
+        'commit': harness.get_commit(),
+        'sessions': args.sessions,
+        'profiles': {},
+    }
+    print(
+        f'{"профиль":<16}{"p50":>9}{"p95":>9}{"p99":>9}'
+        f'{"зап/с":>9}{"SQL":>7}{"ошибки":>8}'
+    )
+    for name in PROFILES:
+        result = run_profile(name, users, url, args)
+        report['profiles'][name] = result
+        print(
+            f'{name:<16}{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}'
+            f'{result["p99_ms"]:>9.2f}{result["throughput_rps"]:>9.0f}'
+            f'{result["queries_per_request"]:>7.1f}{result["errors"]:>8}'
+        )
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2)
+        )
+
+
+if __name__ == '__main__':
+    main()
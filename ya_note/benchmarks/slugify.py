@@ -0,0 +1,63 @@
+"""
+Транслитерация slug: pytils напрямую против кэшированной notes.slugs.
+
+Заголовки выбираются из набора с распределением Ципфа: несколько
+популярных заголовков встречаются часто, остальные — редко.
+
+    python -m benchmarks.slugify --calls 100000 --titles 2000
+"""
+import argparse
+import os
+import random
+import time
+
+
+def make_titles(count):
+    words = (
+        'список', 'покупок', 'идеи', 'для', 'проекта', 'встреча', 'план',
+        'на', 'неделю', 'книги', 'рецепт', 'отпуск', 'заметка', 'задачи',
+    )
+    return [
+        ' '.join(random.sample(words, random.randint(2, 4))) + f' {index}'
+        for index in range(count)
+    ]
+
+
+def throughput(func, titles):
+    start = time.perf_counter()
+    for title in titles:
+        func(title)
+    return len(titles) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=100000)
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+    from pytils.translit import slugify as translit_slugify
+
+    from notes.slugs import slugify
+
+    random.seed(args.seed)
+    titles = make_titles(args.titles)
+    weights = [1 / rank for rank in range(1, len(titles) + 1)]
+    calls = random.choices(titles, weights, k=args.calls)
+
+    plain = throughput(translit_slugify, calls)
+    slugify.cache_clear()
+    cached = throughput(slugify, calls)
+    info = slugify.cache_info()
+    print(f'pytils.translit.slugify  {plain:12.0f} вызовов/с')
+    print(f'notes.slugs.slugify      {cached:12.0f} вызовов/с')
+    print(
+        f'Попаданий {info.hits}, промахов {info.misses}, '
+        f'размер кэша {info.currsize}/{info.maxsize}'
+    )
+
+
+if __name__ == '__main__':
+    main()
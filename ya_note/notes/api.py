@@ -0,0 +1,234 @@
+"""
+JSON API заметок для синхронизации клиентов.
+
+Заметки создаются, изменяются и удаляются пачками до
+settings.API_BATCH_SIZE штук. Пачка проверяется правилами NoteForm,
+уникальность slug — одним запросом на всю пачку (forms.assign_slugs),
+а запись идёт bulk_create и bulk_update в одной транзакции. В ответе —
+результат для каждой заметки в порядке запроса: невалидные заметки
+не мешают сохранить остальные.
+
+Вход — обычная сессия сайта, запросы на запись проверяются на CSRF.
+Работать можно только со своими заметками (NoteBase.get_queryset).
+"""
+import json
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from django.views import generic
+
+from .forms import NoteBatchForm, assign_slugs
+from .models import Note
+from .pagination import InvalidCursor, KeysetPaginator
+from .views import NoteBase
+
+NOTE_FIELDS = ('id', 'title', 'text', 'slug', 'updated')
+# Поля, которые меняет пакетное обновление.
+UPDATE_FIELDS = ('title', 'text', 'slug', 'updated')
+
+
+def serialize_note(note):
+    return {name: getattr(note, name) for name in NOTE_FIELDS}
+
+
+def error_response(status, message, **extra):
+    return JsonResponse(
+        {'error': message, **extra},
+        status=status,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def invalid(errors):
+    return {'status': 'invalid', 'errors': errors}
+
+
+def is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def has_id(item):
+    return isinstance(item, dict) and is_id(item.get('id'))
+
+
+class ApiMixin:
+    """Ответы и ошибки, включая 401 и 404, — в JSON."""
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return error_response(HTTPStatus.NOT_FOUND, 'Не найдено.')
+        except BadRequest as error:
+            return error_response(HTTPStatus.BAD_REQUEST, str(error))
+
+    def handle_no_permission(self):
+        return error_response(HTTPStatus.UNAUTHORIZED, 'Требуется вход.')
+
+    def render(self, data, status=HTTPStatus.OK):
+        return JsonResponse(
+            data,
+            status=status,
+            encoder=DjangoJSONEncoder,
+            json_dumps_params={'ensure_ascii': False},
+        )
+
+    def get_batch(self):
+        """Тело запроса — список JSON не длиннее API_BATCH_SIZE."""
+        try:
+            batch = json.loads(self.request.body)
+        except ValueError:
+            batch = None
+        if not isinstance(batch, list):
+            raise BadRequest('Ожидается список JSON.')
+        if len(batch) > settings.API_BATCH_SIZE:
+            raise BadRequest(
+                f'Не больше {settings.API_BATCH_SIZE} заметок за запрос.'
+            )
+        return batch
+
+
+class NotesApi(ApiMixin, NoteBase, generic.View):
+    """
+    Заметки пользователя.
+
+    GET — страница по курсору на id, POST — создать пачку, PATCH —
+    изменить пачку (в каждом объекте id и изменяемые поля), DELETE —
+    удалить заметки по списку id.
+    """
+    ordering = ('id',)
+
+    def get(self, request, *args, **kwargs):
+        paginator = KeysetPaginator(
+            self.get_queryset().only(*NOTE_FIELDS),
+            self.ordering,
+            settings.API_PAGE_SIZE,
+        )
+        try:
+            page = paginator.get_page(request.GET.get('cursor'))
+        except InvalidCursor as error:
+            raise BadRequest(error) from error
+        return self.render({
+            'results': [serialize_note(note) for note in page],
+            'next': page.next_cursor,
+        })
+
+    def post(self, request, *args, **kwargs):
+        results = []
+        for item in self.get_batch():
+            if not isinstance(item, dict):
+                results.append(invalid({'__all__': ['Ожидается объект.']}))
+                continue
+            form = NoteBatchForm(item)
+            form.instance.author = request.user
+            results.append(form)
+
+        def create(notes):
+            Note.objects.bulk_create(notes)
+            self.fill_ids(notes)
+
+        return self.save_batch(results, create, 'created')
+
+    def patch(self, request, *args, **kwargs):
+        batch = self.get_batch()
+        notes = self.get_queryset().in_bulk(
+            [item['id'] for item in batch if has_id(item)]
+        )
+        results = []
+        for item in batch:
+            # Повтор id в пачке тоже не найдётся: заметка уже выбрана.
+            note = notes.pop(item['id'], None) if has_id(item) else None
+            if note is None:
+                results.append(invalid({'id': ['Заметка не найдена.']}))
+                continue
+            data = {
+                name: getattr(note, name)
+                for name in NoteBatchForm.Meta.fields
+            }
+            data.update(item)
+            results.append(NoteBatchForm(data, instance=note))
+
+        def update(notes):
+            now = timezone.now()
+            for note in notes:
+                # bulk_update не заполняет поля с auto_now.
+                note.updated = now
+            Note.objects.bulk_update(notes, UPDATE_FIELDS)
+
+        return self.save_batch(results, update, 'updated')
+
+    def delete(self, request, *args, **kwargs):
+        batch = self.get_batch()
+        queryset = self.get_queryset().filter(
+            pk__in=[pk for pk in batch if is_id(pk)]
+        )
+        with transaction.atomic():
+            found = set(queryset.values_list('pk', flat=True))
+            queryset.delete()
+        results = []
+        for pk in batch:
+            # Объекты и списки нельзя искать в множестве, а 1.0 == 1.
+            if not is_id(pk):
+                results.append(invalid({'id': ['Ожидается целое число.']}))
+            elif pk in found:
+                results.append({'status': 'deleted', 'id': pk})
+            else:
+                results.append(invalid({'id': ['Заметка не найдена.']}))
+        return self.render({'results': results})
+
+    def save_batch(self, results, write, status):
+        """
+        Назначает slug и пишет валидные заметки пачки в одной транзакции.
+
+        Если slug успел занять параллельный запрос, транзакция
+        откатывается целиком и клиент получает 409: пачку можно
+        повторить.
+        """
+        forms = [
+            result for result in results if not isinstance(result, dict)
+        ]
+        try:
+            with transaction.atomic():
+                assign_slugs(forms)
+                write([form.instance for form in forms if form.is_valid()])
+        except IntegrityError:
+            return error_response(
+                HTTPStatus.CONFLICT, 'Slug занят, повторите запрос.'
+            )
+        return self.render({'results': [
+            result if isinstance(result, dict)
+            else self.form_result(result, status)
+            for result in results
+        ]})
+
+    @staticmethod
+    def fill_ids(notes):
+        """
+        Проставляет id созданным заметкам, если bulk_create их не вернул.
+
+        SQLite в Django 3.2 их не возвращает; заметки находятся по
+        уникальному slug одним запросом.
+        """
+        missing = [note for note in notes if note.pk is None]
+        if not missing:
+            return
+        ids = dict(Note.objects.filter(
+            slug__in=[note.slug for note in missing]
+        ).values_list('slug', 'pk'))
+        for note in missing:
+            note.pk = ids[note.slug]
+
+    @staticmethod
+    def form_result(form, status):
+        if not form.is_valid():
+            return invalid(form.errors)
+        return {
+            'status': status,
+            'id': form.instance.pk,
+            'slug': form.instance.slug,
+        }
@@ -0,0 +1,84 @@
+"""
+Асинхронные варианты страниц чтения для ASGI.
+
+Синхронные view под ASGI Django выполняет через sync_to_async с
+thread_sensitive=True — все в одном потоке, по очереди. Асинхронного
+ORM в Django 3.2 нет, поэтому здесь view остаётся прежним классом, но
+вызывается вместе с отрисовкой шаблона в ограниченном пуле потоков
+(settings.ASYNC_DB_THREADS): запросы к БД разных посетителей идут
+параллельно, а число одновременных соединений с БД не превышает
+размера пула.
+
+Какие view подключены к адресам, решает settings.NOTES_ASYNC_VIEWS.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, update_wrapper
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import views
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_DB_THREADS,
+                thread_name_prefix='notes-db',
+            )
+        return _executor
+
+
+def run_job(func, *args, **kwargs):
+    # Как обработчик Django вокруг синхронного запроса: соединения
+    # старше CONN_MAX_AGE и сломанные закрываются.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(func, *args, **kwargs):
+    """
+    Выполняет func в пуле потоков БД и дожидается результата.
+
+    Контекст (contextvars) переходит в поток пула, поэтому обёртки
+    запросов из instrumentation видят запросы func.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(),
+        partial(context.run, run_job, func, *args, **kwargs),
+    )
+
+
+def render_view(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    # Отрисовка шаблона может обращаться к БД (ленивые querysets,
+    # request.user), поэтому тоже идёт в пуле.
+    if hasattr(response, 'render') and callable(response.render):
+        response.render()
+    return response
+
+
+def async_view(view_class, **initkwargs):
+    """Асинхронная view-функция над синхронным классом-представлением."""
+    view = view_class.as_view(**initkwargs)
+
+    async def handler(request, *args, **kwargs):
+        return await run_in_pool(render_view, view, request, *args, **kwargs)
+
+    return update_wrapper(handler, view)
+
+
+notes_list = async_view(views.NotesList)
+note_detail = async_view(views.NoteDetail)
@@ -0,0 +1,5 @@
+"""
+Бэкенд SQLite для нагрузки: ENGINE = 'notes.db'.
+
+Подробности — в notes/db/base.py.
+"""
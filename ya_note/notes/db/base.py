@@ -0,0 +1,95 @@
+"""
+SQLite, настроенный для одновременных чтения и записи.
+
+При открытии соединения применяются PRAGMA из PRAGMAS (их можно
+переопределить словарём OPTIONS['pragmas'] в DATABASES):
+
+* journal_mode=WAL — читатели не ждут писателя, а писатель читателей;
+* synchronous=NORMAL — в режиме WAL безопасно и без fsync на коммит;
+* mmap_size и cache_size — чтение страниц без лишних копирований;
+* busy_timeout — сколько ждать чужой записи вместо ошибки.
+
+Транзакции (transaction.atomic) начинаются с BEGIN IMMEDIATE: по
+умолчанию SQLite начинает транзакцию на чтение, и если затем другая
+транзакция уже пишет, запись сразу падает с «database is locked», не
+дожидаясь busy_timeout. Писатели одного процесса вдобавок выстраиваются
+в очередь на блокировке и не тратят время на повторные попытки.
+"""
+import threading
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в килобайтах, а не в страницах.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+
+_write_locks = {}
+_write_locks_lock = threading.Lock()
+
+
+def get_write_lock(name):
+    """Блокировка писателей одного файла базы в этом процессе."""
+    with _write_locks_lock:
+        return _write_locks.setdefault(str(name), threading.Lock())
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pragmas = {
+            **PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})
+        }
+        self.write_lock = get_write_lock(self.settings_dict['NAME'])
+        self.holds_write_lock = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        timeout = self.pragmas['busy_timeout'] / 1000
+        if not self.write_lock.acquire(timeout=timeout):
+            raise OperationalError('database is locked')
+        self.holds_write_lock = True
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except Exception:
+            self.release_write_lock()
+            raise
+
+    def release_write_lock(self):
+        if self.holds_write_lock:
+            self.holds_write_lock = False
+            self.write_lock.release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self.release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.release_write_lock()
@@ -1,9 +1,8 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
 from .models import Note
+from .slugs import slugify, suffixes, taken_slugs, with_suffix
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
@@ -16,14 +15,95 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
+        """
+        Обрабатывает случай, если указанный slug не уникален.
+
+        Пустой slug не проверяем: Note.save сам подберёт свободный.
+        Неизменённый slug редактируемой заметки уже уникален.
+        """
+        slug = self.cleaned_data.get('slug')
+        if not slug or (self.instance.pk and slug == self.instance.slug):
+            return slug
         if Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+    def validate_unique(self):
+        """
+        Уникальность slug уже проверена в clean_slug или ляжет на save.
+
+        Остальные поля модель проверяет, как в ModelForm: кроме полей не
+        из формы и не прошедших проверку.
+        """
+        exclude = [
+            field.name for field in Note._meta.fields
+            if field.name == 'slug' or field.name not in self.cleaned_data
+        ]
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self.add_error(None, error)
+
+
+class NoteBatchForm(NoteForm):
+    """
+    Форма заметки для пакетов из API.
+
+    Правила те же, что у NoteForm, но уникальность slug проверяет
+    assign_slugs сразу для всей пачки, а не запросом на каждую форму.
+    """
+
+    def clean_slug(self):
+        return self.cleaned_data.get('slug')
+
+
+def assign_slugs(forms):
+    """
+    Проверяет и назначает slug валидным формам пачки одним запросом.
+
+    Занятый другой заметкой или повторённый в пачке slug — ошибка формы,
+    как в NoteForm.clean_slug. Пустой slug, как в Note.save, получает
+    транслитерацию заголовка, а если она занята — номер больше
+    наибольшего занятого. Slug, который другая заметка освобождает в
+    этой же пачке, ещё считается занятым.
+    """
+    max_length = Note._meta.get_field('slug').max_length
+    forms = [form for form in forms if form.is_valid()]
+    bases = {
+        form: slugify(form.cleaned_data['title'])[:max_length]
+        for form in forms if not form.cleaned_data['slug']
+    }
+    taken = taken_slugs(
+        Note.objects,
+        [form.cleaned_data['slug'] for form in forms if form not in bases],
+        set(bases.values()),
+        max_length,
+    )
+    used = set()
+
+    def is_free(slug, form):
+        return slug not in used and taken.get(
+            slug, form.instance.pk
+        ) == form.instance.pk
+
+    # Сначала заданные slug: номера для пустых подбираются в обход них.
+    for form in forms:
+        if form in bases:
+            continue
+        slug = form.cleaned_data['slug']
+        if not is_free(slug, form):
+            form.add_error('slug', slug + WARNING)
+            continue
+        used.add(slug)
+    numbers = {}
+    for form, base in bases.items():
+        if base not in numbers:
+            numbers[base] = max(suffixes(taken, base, max_length), default=1)
+        slug = base
+        while not is_free(slug, form):
+            numbers[base] += 1
+            slug = with_suffix(base, numbers[base], max_length)
+        used.add(slug)
+        form.instance.slug = slug
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from notes import search
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс заметок (SQLite FTS5).'
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError(
+                'Полнотекстовый индекс доступен только для SQLite.'
+            )
+        search.rebuild(connection)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано заметок: {Note.objects.count()}'
+        ))
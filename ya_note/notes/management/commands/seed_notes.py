@@ -0,0 +1,61 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from notes.seeding import seed_notes, seed_users
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу авторами и их заметками для стендов и замеров.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument(
+            '--notes',
+            type=int,
+            default=1000,
+            help='Заметок у каждого автора.',
+        )
+        parser.add_argument(
+            '--password',
+            default='password',
+            help='Общий пароль всех созданных авторов.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Строк в одной порции bulk_create.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов, создающих строки.',
+        )
+
+    def report(self, label):
+        def on_progress(stats):
+            self.stdout.write(
+                f'{label}: {stats.rows} строк, {stats.rate:.0f} строк/с'
+            )
+        return on_progress
+
+    def summary(self, label, stats):
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {stats.rows} строк за {stats.elapsed:.1f} с '
+            f'({stats.rate:.0f} строк/с)'
+        ))
+
+    def handle(self, *args, **options):
+        batch_size, workers = options['batch_size'], options['workers']
+        users, users_stats = seed_users(
+            options['users'], options['password'], batch_size, workers,
+            self.report('Авторы'),
+        )
+        self.summary('Авторы', users_stats)
+        notes_stats = seed_notes(
+            options['notes'], users, batch_size, workers,
+            self.report('Заметки'),
+        )
+        self.summary('Заметки', notes_stats)
@@ -0,0 +1,81 @@
+from django.db import migrations
+
+# SQL индекса записан здесь, а не взят из notes.search: правки модуля не
+# должны менять уже применённую миграцию.
+CREATE_INDEX_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS notes_note_fts USING fts5("
+    "title, text, author_id, "
+    "content='notes_note', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+RANK_SQL = (
+    "INSERT INTO notes_note_fts(notes_note_fts, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0, 0.0)')"
+)
+TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_ai
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (new.id, new.title, new.text, new.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_ad
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        ) VALUES ('delete', old.id, old.title, old.text, old.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS notes_note_fts_au
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        INSERT INTO notes_note_fts(
+            notes_note_fts, rowid, title, text, author_id
+        ) VALUES ('delete', old.id, old.title, old.text, old.author_id);
+        INSERT INTO notes_note_fts(rowid, title, text, author_id)
+        VALUES (new.id, new.title, new.text, new.author_id);
+    END
+    """,
+)
+REBUILD_SQL = (
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('optimize')",
+)
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_ai',
+    'DROP TRIGGER IF EXISTS notes_note_fts_ad',
+    'DROP TRIGGER IF EXISTS notes_note_fts_au',
+    'DROP TABLE IF EXISTS notes_note_fts',
+)
+
+
+def run(schema_editor, statements):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def create_index(apps, schema_editor):
+    run(
+        schema_editor,
+        (CREATE_INDEX_SQL, RANK_SQL, *TRIGGERS_SQL, *REBUILD_SQL),
+    )
+
+
+def drop_index(apps, schema_editor):
+    run(schema_editor, DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
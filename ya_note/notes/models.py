@@ -1,7 +1,13 @@
+import random
+from contextlib import nullcontext
+
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+
+from .slugs import last_suffix, slugify, with_suffix
 
-from pytils.translit import slugify
+# Сколько раз пробуем подобрать свободный slug при гонке вставок.
+SLUG_ATTEMPTS = 20
 
 
 class Note(models.Model):
@@ -27,12 +33,62 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated = models.DateTimeField('Изменена', auto_now=True)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Пустой slug получает транслитерацию заголовка.
+
+        Уникальность проверяет сам индекс: сначала пробуем сохранить
+        базовый slug, а если он занят — добавляем номер больше
+        наибольшего занятого и повторяем. Другие нарушения ограничений
+        (NOT NULL, внешний ключ) пробрасываются как есть.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        base = slugify(self.title)[:max_slug_length]
+        self.slug = base
+        using = kwargs.get('using') or router.db_for_write(type(self))
+        manager = type(self)._default_manager.db_manager(using)
+        for attempt in range(SLUG_ATTEMPTS):
+            try:
+                with self._slug_attempt(using):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Текст ошибки у каждой СУБД свой, поэтому причину
+                # проверяем по самому slug: если он свободен, запись
+                # отклонило другое ограничение.
+                if not manager.filter(slug=self.slug).exists():
+                    self.slug = ''
+                    raise
+                # Случайный сдвиг разводит потоки, одновременно
+                # увидевшие один и тот же занятый номер.
+                number = last_suffix(
+                    manager, base, max_slug_length
+                ) + 1 + random.randrange(attempt + 1)
+                self.slug = with_suffix(base, number, max_slug_length)
+        self.slug = ''
+        raise IntegrityError(f'Не удалось подобрать slug для «{self.title}»')
+
+    @staticmethod
+    def _slug_attempt(using):
+        """
+        Точка сохранения для попытки вставки — только внутри транзакции.
+
+        Вне транзакции INSERT и так атомарен, а лишний BEGIN мешает
+        SQLite: триггер поискового индекса сначала читает его таблицы,
+        и повышение блокировки до записи при конкурентных вставках
+        сразу заканчивается «database is locked».
+        """
+        if transaction.get_connection(using).in_atomic_block:
+            return transaction.atomic(using=using)
+        return nullcontext()
@@ -0,0 +1,190 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class KeysetPaginator:
+    """
+    Постраничный вывод по ключу сортировки (keyset pagination).
+
+    Вместо OFFSET каждая следующая страница выбирается условием
+    «строго после последней записи предыдущей страницы», поэтому
+    глубокие страницы стоят столько же, сколько первая, если по полям
+    сортировки есть составной индекс. Положение в списке передаётся
+    непрозрачным курсором.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        opts = queryset.model._meta
+        self.fields = [
+            opts.get_field(name.lstrip('-')) for name in self.ordering
+        ]
+
+    def get_page(self, cursor=None):
+        """
+        Страница по курсору одним запросом.
+
+        Запрос выбирает на одну запись больше размера страницы: по ней
+        видно, есть ли дальше ещё страница, поэтому по курсорам нельзя
+        прийти на пустую страницу.
+        """
+        direction, ordering = None, self.ordering
+        queryset = self.queryset
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+            reverse = direction == BACKWARD
+            if reverse:
+                ordering = [self._flip(name) for name in self.ordering]
+            queryset = queryset.filter(self._after(values, reverse=reverse))
+        return KeysetPage(
+            self,
+            queryset.order_by(*ordering)[:self.per_page + 1],
+            cursor_direction=direction,
+        )
+
+    def encode_cursor(self, obj, direction):
+        values = [field.value_to_string(obj) for field in self.fields]
+        raw = json.dumps([direction, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, values = json.loads(
+                base64.urlsafe_b64decode(padded.encode())
+            )
+            if direction not in (FORWARD, BACKWARD):
+                raise ValueError(direction)
+            if len(values) != len(self.fields):
+                raise ValueError(values)
+            return direction, [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (
+                binascii.Error, TypeError, ValueError, ValidationError
+        ) as error:
+            raise InvalidCursor('Некорректный курсор.') from error
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith('-') else '-' + name
+
+    def _after(self, values, reverse):
+        """
+        Условие «запись идёт после ключа values».
+
+        Для полей (a, b) строится a <= x AND (a < x OR (a = x AND b < y)):
+        первое неравенство даёт индексу диапазон для поиска.
+        """
+        condition = None
+        pairs = list(zip(self.ordering, values))
+        for name, value in reversed(pairs):
+            descending = name.startswith('-') != reverse
+            field = name.lstrip('-')
+            strict = Q(**{f'{field}__{"lt" if descending else "gt"}': value})
+            if condition is None:
+                condition = strict
+                continue
+            loose = Q(**{f'{field}__{"lte" if descending else "gte"}': value})
+            condition = loose & (strict | (Q(**{field: value}) & condition))
+        return condition
+
+
+class KeysetPage:
+    """
+    Страница KeysetPaginator с курсорами на соседние страницы.
+
+    queryset выбирает записи в порядке обхода (при движении назад — в
+    обратном) с одной лишней записью; object_list — записи страницы в
+    порядке сортировки.
+    """
+
+    def __init__(self, paginator, queryset, cursor_direction=None):
+        self.paginator = paginator
+        self.queryset = queryset
+        self.cursor_direction = cursor_direction
+
+    def __iter__(self):
+        return iter(self.objects)
+
+    def __len__(self):
+        return len(self.objects)
+
+    @cached_property
+    def rows(self):
+        """Записи страницы и признак, что в направлении обхода есть ещё."""
+        rows = list(self.queryset)
+        per_page = self.paginator.per_page
+        more = len(rows) > per_page
+        rows = rows[:per_page]
+        if self.cursor_direction == BACKWARD:
+            rows.reverse()
+        return rows, more
+
+    @property
+    def objects(self):
+        return self.rows[0]
+
+    object_list = objects
+
+    def has_next(self):
+        # Назад уходят со страницы, за которой записи точно есть.
+        if self.cursor_direction == BACKWARD:
+            return bool(self.objects)
+        return self.rows[1]
+
+    def has_previous(self):
+        if self.cursor_direction == BACKWARD:
+            return self.rows[1]
+        return self.cursor_direction == FORWARD and bool(self.objects)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(self.objects[-1], FORWARD)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(self.objects[0], BACKWARD)
+
+
+def get_page_or_404(paginator, cursor):
+    try:
+        return paginator.get_page(cursor)
+    except InvalidCursor:
+        raise Http404('Некорректный курсор.')
+
+
+class KeysetPaginationMixin:
+    """Подменяет постраничный вывод ListView на KeysetPaginator."""
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, self.get_ordering(), page_size)
+        page = get_page_or_404(
+            paginator, self.request.GET.get(self.cursor_kwarg)
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
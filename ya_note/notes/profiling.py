@@ -0,0 +1,241 @@
+"""
+Выборочное профилирование запросов.
+
+ProfilingMiddleware замеряет долю settings.PROFILING_SAMPLE_RATE
+запросов и раскладывает время ответа на SQL, отрисовку шаблона и
+остальной Python. Замеры копятся в памяти процесса по имени страницы
+и методу: у одного адреса GET и POST по-разному нагружают базу
+(NoteUpdate показывает форму и сохраняет заметку). Сводка доступна
+сотрудникам на странице notes:profiling.
+
+Отрисовкой считается всё время внутри Template.render, в том числе
+фрагменты, которые view отрисовывает сам через render_to_string.
+
+С settings.PROFILING_DUMP_DIR каждый замеренный запрос ещё и
+профилируется cProfile; у каждой страницы хранятся только последние
+settings.PROFILING_DUMP_LIMIT дампов. Дампы по страницам сводит
+команда profiling_report.
+
+При нулевой доле middleware отключается целиком и ничего не стоит.
+"""
+import contextvars
+import cProfile
+import functools
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.base import Template
+
+from .instrumentation import wrap_queries
+from .middleware import SyncAsyncMiddleware
+
+# Верхние границы корзин гистограммы времени ответа, мс.
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Замер текущего запроса; у каждого потока и задачи asyncio свой.
+current_profile = contextvars.ContextVar('current_profile', default=None)
+
+
+class RequestProfile:
+    """
+    Части времени одного запроса, в секундах.
+
+    Экземпляр служит обёрткой execute_wrapper: считает SQL-запросы и
+    их время.
+    """
+
+    def __init__(self):
+        self.sql = 0.0
+        self.queries = 0
+        self.render = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - start
+            self.queries += 1
+
+    def timed_render(self, render):
+        """Выполняет render() и добавляет его время к отрисовке."""
+        if self.rendering:
+            # Вложенный шаблон ({% include %}) уже учтён внешним.
+            return render()
+        self.rendering = True
+        start = time.perf_counter()
+        sql_before = self.sql
+        try:
+            return render()
+        finally:
+            self.rendering = False
+            # Ленивые querysets, выполненные шаблоном, относим к SQL.
+            self.render += (
+                time.perf_counter() - start - (self.sql - sql_before)
+            )
+
+
+def profiled_render(render):
+    """Обёртка Template.render, замеряющая отрисовку в current_profile."""
+    @functools.wraps(render)
+    def wrapper(self, context):
+        profile = current_profile.get()
+        if profile is None:
+            return render(self, context)
+        return profile.timed_render(lambda: render(self, context))
+
+    wrapper.profiled = True
+    return wrapper
+
+
+def instrument_templates():
+    """Подменяет Template.render замеряющей обёрткой; один раз."""
+    if not getattr(Template.render, 'profiled', False):
+        Template.render = profiled_render(Template.render)
+
+
+class ViewStats:
+    """Накопленные замеры одной страницы."""
+
+    def __init__(self):
+        self.count = 0
+        self.queries = 0
+        self.total = self.sql = self.render = 0.0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def add(self, total, profile):
+        self.count += 1
+        self.queries += profile.queries
+        self.total += total
+        self.sql += profile.sql
+        self.render += profile.render
+        self.histogram[bisect_left(BUCKETS, total * 1000)] += 1
+
+    def as_dict(self):
+        def mean_ms(seconds):
+            return round(seconds * 1000 / self.count, 3)
+
+        labels = [f'<={bound}' for bound in BUCKETS] + [f'>{BUCKETS[-1]}']
+        return {
+            'count': self.count,
+            'mean_ms': mean_ms(self.total),
+            'sql_ms': mean_ms(self.sql),
+            'render_ms': mean_ms(self.render),
+            'python_ms': mean_ms(self.total - self.sql - self.render),
+            'queries': round(self.queries / self.count, 2),
+            'histogram_ms': dict(zip(labels, self.histogram)),
+        }
+
+
+class ProfileRegistry:
+    """Замеры страниц текущего процесса; общие для всех потоков."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, key, total, profile):
+        with self.lock:
+            self.views.setdefault(key, ViewStats()).add(total, profile)
+
+    def report(self):
+        with self.lock:
+            return {
+                key: stats.as_dict()
+                for key, stats in sorted(self.views.items())
+            }
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+
+
+registry = ProfileRegistry()
+
+
+def get_key(request):
+    """Имя страницы и метод, например «notes:edit POST»."""
+    match = request.resolver_match
+    name = match.view_name if match is not None else 'unresolved'
+    return f'{name} {request.method}'
+
+
+def dump(profiler, key, directory, limit):
+    """
+    Сохраняет профиль в файл <directory>/<key>/<время>.prof.
+
+    Дампы старше последних limit удаляются: на нагруженной странице
+    иначе за день набирались бы тысячи файлов.
+    """
+    path = Path(directory) / re.sub(r'[^\w.-]', '_', key)
+    path.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(path / f'{time.time_ns()}.prof')
+    # Имена — время в наносекундах одинаковой длины, порядок по имени
+    # совпадает с порядком по времени.
+    for old in sorted(path.glob('*.prof'))[:-limit]:
+        old.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware(SyncAsyncMiddleware):
+    """
+    Замеряет случайную долю запросов.
+
+    Время отрисовки считает обёртка Template.render (instrument_templates)
+    по current_profile: и для TemplateResponse, и для фрагментов,
+    отрисованных во view. cProfile работает только в синхронной цепочке:
+    в асинхронной он видел бы лишь цикл событий.
+    """
+
+    def __init__(self, get_response):
+        self.rate = settings.PROFILING_SAMPLE_RATE
+        if not self.rate:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.dump_dir = settings.PROFILING_DUMP_DIR
+        self.dump_limit = settings.PROFILING_DUMP_LIMIT
+        instrument_templates()
+
+    def handle(self, request):
+        if random.random() >= self.rate:
+            return self.get_response(request)
+        profile = RequestProfile()
+        profiler = cProfile.Profile() if self.dump_dir else None
+        start = time.perf_counter()
+        token = current_profile.set(profile)
+        with wrap_queries(profile):
+            if profiler is not None:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                current_profile.reset(token)
+        key = get_key(request)
+        registry.record(key, time.perf_counter() - start, profile)
+        if profiler is not None:
+            dump(profiler, key, self.dump_dir, self.dump_limit)
+        return response
+
+    async def ahandle(self, request):
+        if random.random() >= self.rate:
+            return await self.get_response(request)
+        profile = RequestProfile()
+        start = time.perf_counter()
+        token = current_profile.set(profile)
+        try:
+            with wrap_queries(profile):
+                response = await self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        registry.record(
+            get_key(request), time.perf_counter() - start, profile
+        )
+        return response
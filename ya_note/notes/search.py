@@ -0,0 +1,155 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Note
+
+INDEX_TABLE = 'notes_note_fts'
+
+# Внешний (external content) индекс FTS5: тексты хранятся только в
+# notes_note, в индексе — лишь словари. author_id проиндексирован как
+# отдельная колонка, чтобы отбор по автору шёл внутри FTS5, а не
+# фильтром по всем найденным во всей базе заметкам.
+CREATE_INDEX_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABLE} USING fts5("
+    "title, text, author_id, "
+    "content='notes_note', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+# Заголовок весит в десять раз больше текста, author_id в ранге не
+# участвует. Функция ранжирования хранится в настройках индекса, и
+# ORDER BY rank FTS5 считает сам, без вызова bm25() из SQL.
+RANK_SQL = (
+    f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0, 0.0)')"
+)
+TRIGGERS_SQL = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {INDEX_TABLE}_ai
+    AFTER INSERT ON notes_note BEGIN
+        INSERT INTO {INDEX_TABLE}(rowid, title, text, author_id)
+        VALUES (new.id, new.title, new.text, new.author_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {INDEX_TABLE}_ad
+    AFTER DELETE ON notes_note BEGIN
+        INSERT INTO {INDEX_TABLE}(
+            {INDEX_TABLE}, rowid, title, text, author_id
+        ) VALUES ('delete', old.id, old.title, old.text, old.author_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {INDEX_TABLE}_au
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        INSERT INTO {INDEX_TABLE}(
+            {INDEX_TABLE}, rowid, title, text, author_id
+        ) VALUES ('delete', old.id, old.title, old.text, old.author_id);
+        INSERT INTO {INDEX_TABLE}(rowid, title, text, author_id)
+        VALUES (new.id, new.title, new.text, new.author_id);
+    END
+    """,
+)
+DROP_SQL = (
+    f'DROP TRIGGER IF EXISTS {INDEX_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {INDEX_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {INDEX_TABLE}_au',
+    f'DROP TABLE IF EXISTS {INDEX_TABLE}',
+)
+# Все совпадения у автора ранжирует сам FTS5: ORDER BY rank с LIMIT
+# он выполняет, держа в памяти только лучшие limit строк.
+SEARCH_SQL = (
+    f'SELECT notes_note.id, notes_note.title, notes_note.slug '
+    f'FROM ('
+    f'SELECT rowid, rank FROM {INDEX_TABLE} '
+    f'WHERE {INDEX_TABLE} MATCH %s ORDER BY rank LIMIT %s'
+    f') AS found '
+    f'JOIN notes_note ON notes_note.id = found.rowid '
+    f'ORDER BY found.rank'
+)
+# С settings.NOTES_SEARCH_CANDIDATES ранжируются только самые новые
+# совпадения: по частому слову у автора могут найтись десятки тысяч
+# заметок, и bm25 для каждой стоит дороже самого поиска. Старые
+# заметки при этом не найдутся, даже если подходят лучше всех.
+RECENT_SEARCH_SQL = (
+    f'SELECT notes_note.id, notes_note.title, notes_note.slug '
+    f'FROM ('
+    f'SELECT rowid, rank FROM {INDEX_TABLE} '
+    f'WHERE {INDEX_TABLE} MATCH %s ORDER BY rowid DESC LIMIT %s'
+    f') AS found '
+    f'JOIN notes_note ON notes_note.id = found.rowid '
+    f'ORDER BY found.rank LIMIT %s'
+)
+
+
+def is_supported(db_connection=connection):
+    return db_connection.vendor == 'sqlite'
+
+
+def install(db_connection=connection):
+    """Создаёт индекс и триггеры, поддерживающие его в актуальном виде."""
+    with db_connection.cursor() as cursor:
+        cursor.execute(CREATE_INDEX_SQL)
+        cursor.execute(RANK_SQL)
+        for sql in TRIGGERS_SQL:
+            cursor.execute(sql)
+
+
+def uninstall(db_connection=connection):
+    with db_connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+def rebuild(db_connection=connection):
+    """Переиндексирует все заметки и сжимает индекс."""
+    install(db_connection)
+    with db_connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('rebuild')"
+        )
+        cursor.execute(
+            f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('optimize')"
+        )
+
+
+def get_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def build_match(author_id, terms):
+    """
+    Выражение MATCH: все слова запроса, только у автора.
+
+    Слова берутся в кавычки, поэтому операторы FTS5 из запроса
+    пользователя не интерпретируются. Поиск по префиксу не
+    используется: для частых слов он в десятки раз медленнее.
+    """
+    words = ' '.join(f'"{term}"' for term in terms)
+    return f'author_id:"{author_id}" AND {{title text}}: ({words})'
+
+
+def search_notes(author, query, limit=None):
+    """Заметки автора, подходящие под запрос, от самых релевантных."""
+    limit = limit or settings.NOTES_SEARCH_LIMIT
+    terms = get_terms(query)
+    if not terms:
+        return []
+    if not is_supported():
+        condition = Q()
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(text__icontains=term)
+        return list(
+            Note.objects.filter(condition, author=author).only(
+                'id', 'title', 'slug'
+            )[:limit]
+        )
+    match = build_match(author.pk, terms)
+    candidates = settings.NOTES_SEARCH_CANDIDATES
+    if candidates is None:
+        return list(Note.objects.raw(SEARCH_SQL, (match, limit)))
+    return list(Note.objects.raw(
+        RECENT_SEARCH_SQL, (match, max(limit, candidates), limit)
+    ))
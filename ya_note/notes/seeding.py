@@ -0,0 +1,192 @@
+"""
+Массовое заполнение базы для стендов и замеров.
+
+Строки создаются bulk_create порциями. Каждая порция — отдельная
+задача со своим непересекающимся диапазоном id, поэтому задачи можно
+выполнять в нескольких процессах без согласования между ними: id и
+slug назначаются заранее, а не базой и не Note.save().
+
+SQLite пускает к записи одно соединение за раз, поэтому на ней
+процессы ускоряют только подготовку строк, а сама вставка идёт по
+очереди.
+"""
+import random
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from .models import Note
+from .slugs import slugify, with_suffix
+
+# Сколько секунд процесс ждёт своей очереди на запись в SQLite.
+SQLITE_TIMEOUT = 600
+WORDS = (
+    'покупки', 'идеи', 'проект', 'встреча', 'книги', 'рецепт',
+    'отпуск', 'ремонт', 'спорт', 'работа', 'подарки', 'фильмы',
+)
+
+
+@dataclass
+class SeedStats:
+    rows: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def split(start, count, size):
+    """Диапазоны [начало, конец) по size id, покрывающие count id."""
+    stop = start + count
+    return [
+        (low, min(low + size, stop)) for low in range(start, stop, size)
+    ]
+
+
+def init_worker(database_name):
+    import django
+
+    django.setup()
+    settings_dict = connections['default'].settings_dict
+    settings_dict['NAME'] = database_name
+    if connections['default'].vendor == 'sqlite':
+        settings_dict['OPTIONS'] = {
+            **settings_dict['OPTIONS'], 'timeout': SQLITE_TIMEOUT
+        }
+
+
+def create_users(start, stop, password_hash):
+    """Авторы author<id> с общим, заранее посчитанным хэшем пароля."""
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(id=pk, username=f'author{pk}', password=password_hash)
+        for pk in range(start, stop)
+    )
+    return stop - start
+
+
+@contextmanager
+def write_transaction():
+    """
+    Транзакция, которая сразу захватывает запись в SQLite.
+
+    Триггер поискового индекса сначала читает его таблицы, а повысить
+    блокировку чтения до записи SQLite не ждёт и при другом пишущем
+    процессе сразу отвечает «database is locked». BEGIN IMMEDIATE
+    ждёт своей очереди SQLITE_TIMEOUT секунд. На других СУБД и внутри
+    уже открытой транзакции это обычный transaction.atomic().
+    """
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic():
+            yield
+        return
+    # Вне автокоммита atomic() внутри bulk_create не открывает
+    # своей транзакции, и действует начатая здесь.
+    connection.set_autocommit(False)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('BEGIN IMMEDIATE')
+        yield
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        connection.set_autocommit(True)
+
+
+def create_notes(start, stop, first_note_id, notes_per_user, users):
+    """
+    Заметки с id из [start, stop); у каждого автора notes_per_user штук.
+
+    Заметка с id n принадлежит автору номер
+    (n - first_note_id) // notes_per_user из диапазона users. Slug —
+    транслитерация заголовка с номером заметки, он уникален без
+    проверок в базе.
+    """
+    rng = random.Random(start)
+    max_slug_length = Note._meta.get_field('slug').max_length
+    notes = []
+    for pk in range(start, stop):
+        title = ' и '.join(rng.sample(WORDS, 2)).capitalize()
+        notes.append(Note(
+            id=pk,
+            title=title,
+            text=' '.join(rng.choices(WORDS, k=30)),
+            slug=with_suffix(slugify(title), pk, max_slug_length),
+            author_id=users[0] + (pk - first_note_id) // notes_per_user,
+        ))
+    with write_transaction():
+        # Строки поискового индекса добавляют триггеры базы.
+        Note.objects.bulk_create(notes)
+    return len(notes)
+
+
+def run_tasks(func, tasks, workers, on_progress=None):
+    """
+    Выполняет func(*task) для каждой задачи и считает созданные строки.
+
+    При workers > 1 задачи распределяются по процессам; каждый процесс
+    открывает своё соединение с той же базой. После каждой задачи
+    вызывается on_progress(stats).
+    """
+    stats = SeedStats()
+    started = time.monotonic()
+
+    def done(rows):
+        stats.rows += rows
+        stats.elapsed = time.monotonic() - started
+        if on_progress is not None:
+            on_progress(stats)
+
+    if workers <= 1:
+        for task in tasks:
+            done(func(*task))
+        return stats
+    database_name = connection.settings_dict['NAME']
+    # Дочерние процессы не должны унаследовать открытое соединение.
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(database_name,),
+    ) as executor:
+        futures = [executor.submit(func, *task) for task in tasks]
+        for future in as_completed(futures):
+            done(future.result())
+    return stats
+
+
+def seed_users(count, password, batch_size, workers, on_progress=None):
+    password_hash = make_password(password)
+    first = next_id(get_user_model())
+    tasks = [
+        (start, stop, password_hash)
+        for start, stop in split(first, count, batch_size)
+    ]
+    return (first, first + count), run_tasks(
+        create_users, tasks, workers, on_progress
+    )
+
+
+def seed_notes(notes_per_user, users, batch_size, workers,
+               on_progress=None):
+    """Заметки для каждого автора из диапазона id users."""
+    first_note_id = next_id(Note)
+    count = (users[1] - users[0]) * notes_per_user
+    tasks = [
+        (start, stop, first_note_id, notes_per_user, users)
+        for start, stop in split(first_note_id, count, batch_size)
+    ]
+    return run_tasks(create_notes, tasks, workers, on_progress)
@@ -0,0 +1,77 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import Length
+from pytils.translit import slugify as translit_slugify
+
+# Сколько символов оставляем под «-N», когда slug упирается в max_length.
+SUFFIX_RESERVE = 10
+
+
+@lru_cache(maxsize=settings.NOTES_SLUG_CACHE_SIZE)
+def slugify(title):
+    """
+    Транслитерация заголовка в slug с кэшем последних заголовков.
+
+    Заголовки часто повторяются («Список покупок», «Идеи»), а pytils
+    для каждого прогоняет цепочку замен по строке.
+    Статистика попаданий — slugify.cache_info().
+    """
+    return translit_slugify(title)
+
+
+def suffix_prefix(base, max_length):
+    return base[:max_length - SUFFIX_RESERVE] + '-'
+
+
+def with_suffix(base, number, max_length):
+    """Slug вида base-N, укладывающийся в max_length."""
+    return f'{suffix_prefix(base, max_length)}{number}'
+
+
+def last_suffix(queryset, base, max_length):
+    """
+    Наибольший занятый номер N среди slug вида base-N (1, если таких нет).
+
+    Один запрос: диапазон по уникальному индексу slug отбирает строки,
+    начинающиеся с «base-» и цифры, среди них берётся самая длинная и
+    лексикографически старшая — это и есть наибольший номер.
+    """
+    prefix = suffix_prefix(base, max_length)
+    slug = queryset.filter(
+        slug__gte=prefix + '0',
+        slug__lt=prefix + ':',
+        slug__regex=rf'^{re.escape(prefix)}[0-9]+$',
+    ).order_by(
+        Length('slug').desc(), '-slug'
+    ).values_list('slug', flat=True).first()
+    if slug is None:
+        return 1
+    return int(slug[len(prefix):])
+
+
+def taken_slugs(queryset, slugs, bases, max_length):
+    """
+    Занятые slug для целой пачки заметок одним запросом: slug → id.
+
+    В выборку попадают slug из slugs и вида base-N для каждого base из
+    bases — по тем же диапазонам уникального индекса, что и в
+    last_suffix.
+    """
+    condition = Q(slug__in=set(slugs) | set(bases))
+    for base in bases:
+        prefix = suffix_prefix(base, max_length)
+        condition |= Q(slug__gte=prefix + '0', slug__lt=prefix + ':')
+    return dict(queryset.filter(condition).values_list('slug', 'pk'))
+
+
+def suffixes(slugs, base, max_length):
+    """Номера N среди slug вида base-N."""
+    prefix = suffix_prefix(base, max_length)
+    pattern = re.compile(rf'{re.escape(prefix)}([0-9]+)')
+    for slug in slugs:
+        match = pattern.fullmatch(slug)
+        if match:
+            yield int(match[1])
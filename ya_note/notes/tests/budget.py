@@ -0,0 +1,50 @@
+import re
+import time
+from collections import Counter
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def format_queries(queries):
+    """
+    Запросы, сгруппированные по виду, с числом повторов.
+
+    Запросы, различающиеся только параметрами, — признак N+1; самые
+    частые идут первыми.
+    """
+    shapes = Counter(
+        re.sub(r"\b\d+\b|'[^']*'", '?', query['sql']) for query in queries
+    )
+    return '\n'.join(
+        f'{count:>4} × {sql}' for sql, count in shapes.most_common()
+    )
+
+
+class RequestBudgetMixin:
+    """Проверка числа SQL-запросов и времени ответа страницы."""
+
+    def assert_request_budget(
+            self, client, url, max_queries, max_ms, method='get', **kwargs):
+        """
+        Выполняет запрос и сверяет его с бюджетом.
+
+        При превышении тест падает с перечнем выполненных запросов.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = getattr(client, method)(url, **kwargs)
+            elapsed = (time.perf_counter() - start) * 1000
+        problems = []
+        if len(queries) > max_queries:
+            problems.append(
+                f'запросов к БД {len(queries)}, бюджет {max_queries}'
+            )
+        if elapsed > max_ms:
+            problems.append(f'ответ за {elapsed:.0f} мс, бюджет {max_ms} мс')
+        if problems:
+            self.fail(
+                f'{method.upper()} {url}: ' + '; '.join(problems)
+                + '\n' + format_queries(queries.captured_queries)
+            )
+        return response
@@ -0,0 +1,221 @@
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from pytils.translit import slugify
+
+from notes.forms import WARNING
+from notes.models import Note
+from notes.search import search_notes
+
+User = get_user_model()
+
+
+class TestNotesApi(TestCase):
+
+    URL = reverse('notes:api_notes')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор заметок')
+        cls.another_user = User.objects.create(username='Другой пользователь')
+        cls.note = Note.objects.create(
+            title='Покупки', text='Хлеб', slug='pokupki', author=cls.author
+        )
+        cls.foreign_note = Note.objects.create(
+            title='Чужая', text='Текст', slug='foreign',
+            author=cls.another_user,
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def send(self, method, data, client=None):
+        client = client or self.author_client
+        return getattr(client, method)(
+            self.URL, json.dumps(data), content_type='application/json'
+        )
+
+    def test_anonymous_gets_401(self):
+        for method in ('post', 'patch', 'delete'):
+            with self.subTest(method=method):
+                response = self.send(method, [], client=self.client)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.UNAUTHORIZED
+                )
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_list_pages_own_notes(self):
+        for index in range(4):
+            Note.objects.create(
+                title='Идея', text='Текст', slug=f'idea-{index}',
+                author=self.author,
+            )
+        slugs = []
+        cursor = ''
+        with override_settings(API_PAGE_SIZE=2):
+            while cursor is not None:
+                data = self.author_client.get(
+                    self.URL, {'cursor': cursor}
+                ).json()
+                slugs += [note['slug'] for note in data['results']]
+                cursor = data['next']
+        self.assertEqual(slugs, list(
+            Note.objects.filter(
+                author=self.author
+            ).order_by('id').values_list('slug', flat=True)
+        ))
+
+    @override_settings(API_PAGE_SIZE=1)
+    def test_last_full_page_has_no_next(self):
+        data = self.author_client.get(self.URL).json()
+        self.assertEqual(
+            [note['id'] for note in data['results']], [self.note.pk]
+        )
+        self.assertIsNone(data['next'])
+
+    def test_body_must_be_list(self):
+        for body in ('не json', '{}'):
+            with self.subTest(body=body):
+                response = self.author_client.post(
+                    self.URL, body, content_type='application/json'
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+
+    @override_settings(API_BATCH_SIZE=2)
+    def test_batch_size_limit(self):
+        response = self.send('post', [{'title': 'a', 'text': 'b'}] * 3)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(Note.objects.count(), 2)
+
+    def test_create_batch(self):
+        response = self.send('post', [
+            {'title': 'Первая', 'text': 'Текст', 'slug': 'first'},
+            {'title': 'Без текста'},
+            {'title': 'Занятый', 'text': 'Текст', 'slug': 'foreign'},
+            {'title': 'Повтор', 'text': 'Текст', 'slug': 'first'},
+            'не объект',
+            {'title': 'Вторая', 'text': 'Текст'},
+        ])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        results = response.json()['results']
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['created', 'invalid', 'invalid', 'invalid', 'invalid',
+             'created'],
+        )
+        self.assertIn('text', results[1]['errors'])
+        self.assertEqual(results[2]['errors'], {'slug': ['foreign' + WARNING]})
+        self.assertEqual(results[3]['errors'], {'slug': ['first' + WARNING]})
+        first = Note.objects.get(slug='first')
+        self.assertEqual(results[0]['id'], first.pk)
+        self.assertEqual(first.author, self.author)
+        second = Note.objects.get(pk=results[5]['id'])
+        self.assertEqual(second.slug, slugify('Вторая'))
+        self.assertEqual(results[5]['slug'], second.slug)
+        # Поисковый индекс заполняют триггеры базы и при bulk_create.
+        self.assertEqual(list(search_notes(self.author, 'Вторая')), [second])
+
+    def test_generated_slugs_are_numbered(self):
+        Note.objects.create(
+            title='Покупки', text='Текст', slug='pokupki-7',
+            author=self.another_user,
+        )
+        response = self.send('post', [
+            {'title': 'Покупки', 'text': 'Текст'},
+            {'title': 'Покупки', 'text': 'Текст'},
+            {'title': 'Покупки', 'text': 'Текст', 'slug': 'pokupki-9'},
+        ])
+        self.assertEqual(
+            [result['slug'] for result in response.json()['results']],
+            ['pokupki-8', 'pokupki-10', 'pokupki-9'],
+        )
+
+    def test_create_queries_do_not_grow_with_batch(self):
+        def count(size, prefix):
+            batch = [
+                {'title': 'Покупки', 'text': 'Текст'} for _ in range(size)
+            ] + [
+                {'title': 'Заметка', 'text': 'Текст', 'slug': f'{prefix}-{i}'}
+                for i in range(size)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.send('post', batch)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            return len(queries)
+
+        # Сессия и пользователь попадают в кэш.
+        self.author_client.get(self.URL)
+        # 180 заметок ещё укладываются в один INSERT (999 параметров).
+        self.assertEqual(count(5, 'small'), count(90, 'large'))
+        self.assertEqual(Note.objects.filter(author=self.author).count(), 191)
+
+    def test_update_batch(self):
+        updated_before = self.note.updated
+        response = self.send('patch', [
+            {'id': self.note.pk, 'title': 'Продукты', 'slug': 'produkty'},
+            {'id': self.foreign_note.pk, 'title': 'Чужая правка'},
+            {'id': self.note.pk, 'title': 'Повтор'},
+            {'title': 'Без id'},
+        ])
+        results = response.json()['results']
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['updated', 'invalid', 'invalid', 'invalid'],
+        )
+        self.note.refresh_from_db()
+        self.assertEqual(
+            (self.note.title, self.note.text, self.note.slug),
+            ('Продукты', 'Хлеб', 'produkty'),
+        )
+        self.assertGreater(self.note.updated, updated_before)
+        self.foreign_note.refresh_from_db()
+        self.assertEqual(self.foreign_note.title, 'Чужая')
+
+    def test_update_keeps_own_slug_and_rejects_taken(self):
+        other = Note.objects.create(
+            title='Другая', text='Текст', slug='other', author=self.author
+        )
+        response = self.send('patch', [
+            {'id': self.note.pk, 'slug': 'pokupki', 'text': 'Молоко'},
+            {'id': other.pk, 'slug': 'foreign'},
+        ])
+        results = response.json()['results']
+        self.assertEqual(results[0]['status'], 'updated')
+        self.assertEqual(results[1]['errors'], {'slug': ['foreign' + WARNING]})
+        other.refresh_from_db()
+        self.assertEqual(other.slug, 'other')
+
+    def test_delete_batch(self):
+        response = self.send(
+            'delete', [self.note.pk, self.foreign_note.pk, 'id']
+        )
+        self.assertEqual(
+            [result['status'] for result in response.json()['results']],
+            ['deleted', 'invalid', 'invalid'],
+        )
+        self.assertFalse(Note.objects.filter(pk=self.note.pk).exists())
+        self.assertTrue(
+            Note.objects.filter(pk=self.foreign_note.pk).exists()
+        )
+
+    def test_delete_rejects_malformed_items(self):
+        items = [{'id': self.note.pk}, [self.note.pk], float(self.note.pk),
+                 True, None]
+        response = self.send('delete', items)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.json()['results'],
+            [{'status': 'invalid', 'errors': {
+                'id': ['Ожидается целое число.']
+            }}] * len(items),
+        )
+        self.assertTrue(Note.objects.filter(pk=self.note.pk).exists())
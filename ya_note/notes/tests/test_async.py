@@ -0,0 +1,75 @@
+import asyncio
+import importlib
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+from django.urls import clear_url_caches, resolve, reverse
+
+import notes.urls
+import yanote.urls
+from notes import async_views
+from notes.instrumentation import metrics
+from notes.models import Note
+
+User = get_user_model()
+
+
+def reload_urls():
+    importlib.reload(notes.urls)
+    importlib.reload(yanote.urls)
+    clear_url_caches()
+
+
+class TestAsyncViews(TransactionTestCase):
+    """
+    Асинхронные view ходят в БД из потоков пула со своими
+    соединениями, поэтому данные тестов должны быть закоммичены.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create(username='Автор')
+        self.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='note', author=self.author
+        )
+        self.async_client.force_login(self.author)
+        self.list_url = reverse('notes:list')
+        self.detail_url = reverse('notes:detail', args=(self.note.slug,))
+        settings = override_settings(NOTES_ASYNC_VIEWS=True)
+        settings.enable()
+        reload_urls()
+        self.addCleanup(reload_urls)
+        self.addCleanup(settings.disable)
+        metrics.clear()
+        self.addCleanup(metrics.clear)
+
+    def test_setting_selects_async_views(self):
+        view = resolve(self.list_url).func
+        self.assertIs(view, async_views.notes_list)
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+
+    def test_pool_size_from_settings(self):
+        from django.conf import settings
+
+        self.assertEqual(
+            async_views.get_executor()._max_workers,
+            settings.ASYNC_DB_THREADS,
+        )
+
+    async def test_async_pages(self):
+        response = await self.async_client.get(self.list_url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(self.note, response.context['object_list'])
+        response = await self.async_client.get(self.detail_url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context['object'], self.note)
+        # Запросы из потоков пула видны middleware через contextvars.
+        self.assertGreater(metrics.get('sql_queries_total', 'notes:list'), 0)
+        self.assertGreater(
+            metrics.get('sql_queries_total', 'notes:detail'), 0
+        )
+
+    async def test_async_views_require_login(self):
+        self.async_client.cookies.clear()
+        response = await self.async_client.get(self.list_url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
@@ -0,0 +1,115 @@
+import tempfile
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes import auth
+from notes.auth import USER_KEY, CachedModelBackend, check_shared_cache
+
+User = get_user_model()
+
+CACHE_DIR = tempfile.mkdtemp()
+
+
+# Настройки SHARED_CACHE_DIR: общий файловый кэш, сессии в кэше.
+@override_settings(
+    CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR,
+    }},
+    AUTHENTICATION_BACKENDS=['notes.auth.CachedModelBackend'],
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+)
+class TestCachedAuth(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор')
+        cls.url = reverse('notes:list')
+        cls.login_url = reverse('users:login')
+        cls.logout_url = reverse('users:logout')
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def tables(self, queries):
+        return {
+            table for table in ('auth_user', 'django_session')
+            for query in queries if table in query['sql']
+        }
+
+    def test_session_and_user_from_cache(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.author_client.get(self.url)
+        # Сессия попала в кэш при входе, пользователь — при первом запросе.
+        self.assertEqual(self.tables(queries), {'auth_user'})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.author_client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(self.tables(queries), set())
+
+    def test_password_change_ends_sessions(self):
+        self.author_client.get(self.url)
+        self.author.set_password('новый пароль')
+        self.author.save()
+        response = self.author_client.get(self.url)
+        self.assertRedirects(
+            response, f'{self.login_url}?next={self.url}'
+        )
+
+    def test_logout_forgets_user(self):
+        key = USER_KEY.format(pk=self.author.pk)
+        self.author_client.get(self.url)
+        self.assertEqual(cache.get(key), self.author)
+        self.author_client.get(self.logout_url)
+        self.assertIsNone(cache.get(key))
+
+    def test_forget_user_in_other_worker(self):
+        """
+        Два процесса — два экземпляра кэша.
+
+        Сброс в одном процессе виден другому только через общий кэш; у
+        LocMemCache в разных процессах разное содержимое.
+        """
+        key = USER_KEY.format(pk=self.author.pk)
+        workers = {
+            True: (FileBasedCache(CACHE_DIR, {}),
+                   FileBasedCache(CACHE_DIR, {})),
+            False: (LocMemCache('first-worker', {}),
+                    LocMemCache('second-worker', {})),
+        }
+        for shared, (first, second) in workers.items():
+            with self.subTest(shared=shared):
+                with mock.patch.object(auth, 'cache', first):
+                    CachedModelBackend().get_user(self.author.pk)
+                with mock.patch.object(auth, 'cache', second):
+                    auth.forget_user(self.author.pk)
+                self.assertEqual(first.get(key) is None, shared)
+
+    def test_check_requires_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }}):
+            errors = check_shared_cache(None)
+            self.assertEqual(
+                [error.id for error in errors], ['notes.E001'] * 2
+            )
+            with override_settings(
+                AUTHENTICATION_BACKENDS=[
+                    'django.contrib.auth.backends.ModelBackend'
+                ],
+                SESSION_ENGINE='django.contrib.sessions.backends.db',
+            ):
+                self.assertEqual(check_shared_cache(None), [])
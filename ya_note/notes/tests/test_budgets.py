@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from notes.models import Note
+from notes.tests.budget import RequestBudgetMixin
+
+User = get_user_model()
+
+NOTES_COUNT = 2000
+
+# Бюджеты (запросов к БД, миллисекунд) на запрос к странице. Время —
+# с большим запасом на медленные машины: оно ловит только порядки.
+BUDGETS = {
+    'notes:home': (2, 500),
+    'notes:list': (3, 500),
+    'notes:search': (3, 500),
+    'notes:add': (2, 500),
+    'notes:detail': (3, 500),
+    'notes:edit': (3, 500),
+    'notes:delete': (3, 500),
+    'notes:success': (2, 500),
+}
+
+
+class TestRequestBudgets(RequestBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор Заметок')
+        cls.other_user = User.objects.create(username='Другой пользователь')
+        for author in (cls.author, cls.other_user):
+            Note.objects.bulk_create(
+                Note(
+                    title=f'Заметка {index}',
+                    text=f'Список покупок номер {index}: хлеб, молоко.',
+                    slug=f'{author.pk}-note-{index}',
+                    author=author,
+                )
+                for index in range(NOTES_COUNT)
+            )
+        cls.note = Note.objects.filter(author=cls.author).last()
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def test_pages_within_budget(self):
+        urls = (
+            ('notes:home', None, {}),
+            ('notes:list', None, {}),
+            ('notes:search', None, {'q': 'молоко'}),
+            ('notes:add', None, {}),
+            ('notes:detail', (self.note.slug,), {}),
+            ('notes:edit', (self.note.slug,), {}),
+            ('notes:delete', (self.note.slug,), {}),
+            ('notes:success', None, {}),
+        )
+        for name, args, data in urls:
+            with self.subTest(name=name):
+                self.assert_request_budget(
+                    self.author_client, reverse(name, args=args),
+                    *BUDGETS[name], data=data,
+                )
+
+    def test_deep_list_pages_within_budget(self):
+        url = reverse('notes:list')
+        page = self.author_client.get(url).context['page_obj']
+        for _ in range(3):
+            page = self.assert_request_budget(
+                self.author_client, url, *BUDGETS['notes:list'],
+                data={'cursor': page.next_cursor},
+            ).context['page_obj']
+        self.assertTrue(page.has_next())
@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from django.views import generic
+
+from notes.conditional import ConditionalGetMixin
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestNoteDetailConditionalGet(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор Заметок')
+        cls.another_user = User.objects.create(username='Другой пользователь')
+        cls.note = Note.objects.create(
+            title='Заметка', text='Текст заметки', slug='note',
+            author=cls.author,
+        )
+        cls.url = reverse('notes:detail', args=(cls.note.slug,))
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_validators_sent(self):
+        response = self.author_client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('ETag', response)
+        self.assertEqual(
+            response['Last-Modified'],
+            http_date(int(self.note.updated.timestamp())),
+        )
+
+    def test_not_modified_after_one_query(self):
+        etag = self.author_client.get(self.url)['ETag']
+        # Сессия, пользователь и одна заметка: страница не рендерится.
+        with CaptureQueriesContext(connection) as queries:
+            response = self.author_client.get(
+                self.url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(len(queries), 3)
+        self.assertIn('notes_note', queries[-1]['sql'])
+
+    def test_not_modified_since(self):
+        last_modified = self.author_client.get(self.url)['Last-Modified']
+        response = self.author_client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_edit_invalidates_etag(self):
+        etag = self.author_client.get(self.url)['ETag']
+        self.note.text = 'Новый текст'
+        self.note.save()
+        response = self.author_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_other_users_still_get_404(self):
+        client = Client()
+        client.force_login(self.another_user)
+        response = client.get(self.url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class TestConditionalGetMixin(TestCase):
+
+    def test_no_validators_by_default(self):
+        class Page(ConditionalGetMixin, generic.View):
+            def get(self, request, *args, **kwargs):
+                return HttpResponse('Страница')
+
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH='*')
+        response = Page.as_view()(request)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(response.has_header('ETag'))
@@ -1,9 +1,14 @@
-from django.test import Client, TestCase
+from http import HTTPStatus
+
+from django.test import Client, TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from notes.models import Note
 from notes.forms import NoteForm
+from notes.search import search_notes
 
 
 User = get_user_model()
@@ -47,3 +52,141 @@ class TestNotesContext(TestCase):
                 response = self.author_client.get(reverse(url, kwargs=kwargs))
                 form = response.context.get('form')
                 self.assertIsInstance(form, NoteForm)
+
+
+@override_settings(NOTES_COUNT_ON_PAGE=2)
+class TestNotesListPagination(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор Заметок')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Длинный текст заметки',
+                slug=f'note-{index}',
+                author=cls.author,
+            )
+            for index in range(5)
+        )
+        cls.url = reverse('notes:list')
+
+    def test_pages_follow_cursor(self):
+        pages = []
+        cursor = None
+        while True:
+            response = self.author_client.get(
+                self.url, {'cursor': cursor} if cursor else {}
+            )
+            page = response.context['page_obj']
+            pages.append([note.slug for note in page])
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(
+            pages,
+            [['note-0', 'note-1'], ['note-2', 'note-3'], ['note-4']],
+        )
+
+    def test_list_loads_only_displayed_columns(self):
+        # Сессия, пользователь и одна страница заметок.
+        with CaptureQueriesContext(connection) as queries:
+            self.author_client.get(self.url)
+        self.assertEqual(len(queries), 3)
+        sql = queries[-1]['sql']
+        columns = sql[len('SELECT '):sql.index(' FROM ')].split(', ')
+        self.assertEqual(columns, [
+            '"notes_note"."id"', '"notes_note"."title"', '"notes_note"."slug"'
+        ])
+        # Лишняя запись показывает, есть ли следующая страница.
+        self.assertIn('LIMIT 3', sql)
+
+    def test_cursors_reach_both_ends_of_full_pages(self):
+        Note.objects.filter(slug='note-4').delete()
+        pages = [self.author_client.get(self.url).context['page_obj']]
+        while pages[-1].next_cursor is not None:
+            pages.append(self.author_client.get(
+                self.url, {'cursor': pages[-1].next_cursor}
+            ).context['page_obj'])
+        # Последняя страница заполнена целиком, пустой за ней нет.
+        self.assertEqual(
+            [[note.slug for note in page] for page in pages],
+            [['note-0', 'note-1'], ['note-2', 'note-3']],
+        )
+        back_page = self.author_client.get(
+            self.url, {'cursor': pages[-1].previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back_page), list(pages[0]))
+        self.assertIsNone(back_page.previous_cursor)
+        self.assertIsNotNone(back_page.next_cursor)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.author_client.get(self.url, {'cursor': 'мусор'})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class TestNotesSearch(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Автор Заметок')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.another_user = User.objects.create(username='Другой пользователь')
+        cls.note = Note.objects.create(
+            title='Список покупок',
+            text='Молоко, хлеб и яблоки',
+            author=cls.author
+        )
+        cls.other_note = Note.objects.create(
+            title='Список покупок',
+            text='Молоко',
+            author=cls.another_user
+        )
+        cls.url = reverse('notes:search')
+
+    def search(self, query):
+        response = self.author_client.get(self.url, {'q': query})
+        return [note.pk for note in response.context['object_list']]
+
+    def test_search_by_title_and_text(self):
+        for query in ('покупок', 'ЯБЛОКИ', 'хлеб, молоко'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [self.note.pk])
+
+    def test_search_only_own_notes(self):
+        self.assertNotIn(self.other_note.pk, self.search('молоко'))
+
+    def test_search_follows_note_changes(self):
+        self.note.text = 'Сыр'
+        self.note.save()
+        self.assertEqual(self.search('хлеб'), [])
+        self.assertEqual(self.search('сыр'), [self.note.pk])
+        self.note.delete()
+        self.assertEqual(self.search('сыр'), [])
+
+    def test_search_query_syntax_is_not_interpreted(self):
+        for query in ('', 'NOT', '"молоко', 'text: хлеб*', 'спис', 'a OR b ('):
+            with self.subTest(query=query):
+                response = self.author_client.get(self.url, {'q': query})
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_old_best_match_found_among_many(self):
+        best = Note.objects.create(
+            title='Рецепт пирога', text='Мука', author=self.author
+        )
+        Note.objects.bulk_create(
+            Note(
+                title='Заметка',
+                text=f'Тут упомянут рецепт, номер {index}',
+                slug=f'recipe-{index}',
+                author=self.author,
+            )
+            for index in range(600)
+        )
+        self.assertEqual(search_notes(self.author, 'рецепт', 1), [best])
+        # Отсечение по новизне — только по явной настройке.
+        with override_settings(NOTES_SEARCH_CANDIDATES=500):
+            self.assertNotIn(best, search_notes(self.author, 'рецепт', 1))
@@ -0,0 +1,114 @@
+import json
+import logging
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from notes.instrumentation import JsonFormatter, Query, metrics, report
+from notes.models import Note
+
+User = get_user_model()
+
+
+class TestQueryInstrumentation(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Автор')
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='note', author=cls.author
+        )
+        cls.detail_url = reverse('notes:detail', args=(cls.note.slug,))
+        cls.edit_url = reverse('notes:edit', args=(cls.note.slug,))
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def setUp(self):
+        metrics.clear()
+        self.addCleanup(metrics.clear)
+
+    @staticmethod
+    def events(logs, name):
+        return [record.data for record in logs.records if record.msg == name]
+
+    def test_every_query_logged_with_view(self):
+        with self.assertLogs('notes.sql', logging.DEBUG) as logs:
+            self.author_client.get(self.detail_url)
+        queries = self.events(logs, 'query')
+        self.assertEqual(
+            len(queries), metrics.get('sql_queries_total', 'notes:detail')
+        )
+        for query in queries:
+            self.assertEqual(query['view'], 'notes:detail')
+            self.assertGreaterEqual(query['duration_ms'], 0)
+
+    @override_settings(SQL_SLOW_QUERY_MS=-1)
+    def test_slow_queries_flagged(self):
+        with self.assertLogs('notes.sql', logging.WARNING) as logs:
+            self.author_client.get(self.detail_url)
+        slow = self.events(logs, 'slow_query')
+        self.assertTrue(slow)
+        self.assertEqual(
+            metrics.get('sql_slow_queries_total', 'notes:detail'), len(slow)
+        )
+
+    def test_no_duplicates_on_edit(self):
+        with self.assertLogs('notes.sql', logging.DEBUG) as logs:
+            self.author_client.post(
+                self.edit_url,
+                data={'title': 'Новый', 'text': 'Текст', 'slug': 'note'},
+            )
+        self.assertEqual(self.events(logs, 'duplicate_query'), [])
+        self.assertEqual(
+            metrics.get('sql_duplicate_queries_total', 'notes:edit'), 0
+        )
+
+    def report_repeated_select(self):
+        request = RequestFactory().get(self.edit_url)
+        request.resolver_match = resolve(self.edit_url)
+        select = 'SELECT * FROM notes_note WHERE slug = %s'
+        with self.assertLogs('notes.sql', logging.WARNING) as logs:
+            report(request, [
+                Query('default', select, ('note',), 0.001),
+                Query('default', select, ('note',), 0.001),
+            ])
+        return self.events(logs, 'duplicate_query')
+
+    def test_repeated_query_params_not_logged(self):
+        duplicates = self.report_repeated_select()
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual(duplicates[0]['count'], 2)
+        # Параметры могут содержать личные данные.
+        self.assertNotIn('params', duplicates[0])
+
+    @override_settings(SQL_LOG_PARAMS=True)
+    def test_repeated_query_params_logged_on_request(self):
+        duplicates = self.report_repeated_select()
+        self.assertEqual(duplicates[0]['params'], "('note',)")
+
+    def test_json_formatter(self):
+        record = logging.LogRecord(
+            'notes.sql', logging.WARNING, __file__, 1, 'duplicate_query',
+            None, None,
+        )
+        record.data = {'view': 'notes:edit', 'count': 2}
+        data = json.loads(JsonFormatter().format(record))
+        self.assertEqual(data['event'], 'duplicate_query')
+        self.assertEqual(data['view'], 'notes:edit')
+        self.assertEqual(data['count'], 2)
+
+    def test_metrics_endpoint(self):
+        self.author_client.get(self.detail_url)
+        response = self.client.get(reverse('notes:metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        text = response.content.decode()
+        self.assertIn('# TYPE sql_queries_total counter', text)
+        self.assertIn('http_requests_total{view="notes:detail"} 1', text)
+
+    def test_metrics_only_for_allowed_addresses(self):
+        response = self.client.get(
+            reverse('notes:metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
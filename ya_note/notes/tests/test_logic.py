@@ -1,11 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
+from io import StringIO
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from pytils.translit import slugify
 
 from notes.models import Note
+from notes.search import search_notes
+from notes.slugs import slugify as cached_slugify
 
 
 User = get_user_model()
@@ -109,8 +116,9 @@ class TestNoteCreation(TestCase):
     def test_slug_unique(self):
         before_note_count = Note.objects.count()
         response = self.author_client.post(self.add_url, data={
-            'title': self.NOTE_TITLE,
+            'title': self.NOTE_TITLE_EDIT,
             'text': self.NOTE_TEXT,
+            'slug': self.generated_slug,
         })
         self.assertFormError(
             response,
@@ -120,3 +128,134 @@ class TestNoteCreation(TestCase):
             'придумайте уникальное значение!'
         )
         self.assertEqual(Note.objects.count(), before_note_count)
+
+    def test_same_title_gets_numbered_slug(self):
+        for number in (2, 3):
+            with self.subTest(number=number):
+                self.author_client.post(self.add_url, data={
+                    'title': self.NOTE_TITLE,
+                    'text': self.NOTE_TEXT,
+                })
+                self.assertTrue(Note.objects.filter(
+                    slug=f'{self.generated_slug}-{number}'
+                ).exists())
+
+    def test_slugify_cached_between_requests(self):
+        cached_slugify.cache_clear()
+        for _ in range(2):
+            self.author_client.post(self.add_url, data={
+                'title': self.NOTE_TITLE,
+                'text': self.NOTE_TEXT,
+            })
+        info = cached_slugify.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_post_flows_query_count(self):
+        """
+        Сессия и пользователь, заметка не больше одного раза, запись.
+
+        Заметка сохраняется одним запросом, а неизменённый slug не
+        проверяется на уникальность повторно.
+        """
+        edit_data = {**self.form_data, 'slug': self.note.slug}
+        flows = (
+            # SAVEPOINT, INSERT, RELEASE: slug подбирает Note.save.
+            (self.add_url, self.form_data, 5),
+            # Проверка slug формой, INSERT.
+            (self.add_url, {**self.form_data, 'slug': 'new-slug'}, 4),
+            # Заметка, UPDATE.
+            (self.edit_url, edit_data, 4),
+            # Заметка, DELETE.
+            (self.delete_url, {}, 4),
+        )
+        for url, data, queries in flows:
+            with self.subTest(url=url, data=data):
+                with self.assertNumQueries(queries):
+                    response = self.author_client.post(url, data=data)
+                self.assertRedirects(
+                    response, self.redirect_url, fetch_redirect_response=False
+                )
+
+
+class TestNoteSave(TestCase):
+
+    def test_other_integrity_errors_not_retried(self):
+        note = Note(
+            title='Без текста',
+            text=None,
+            author=User.objects.create(username='Автор заметки'),
+        )
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertRaisesMessage(IntegrityError, 'notes_note.text'):
+                note.save()
+        inserts = [
+            query for query in queries if query['sql'].startswith('INSERT')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(note.slug, '')
+
+
+class TestSlugConcurrency(TransactionTestCase):
+
+    THREADS = 8
+    NOTES_PER_THREAD = 125
+
+    def test_parallel_notes_with_same_title(self):
+        author = User.objects.create(username='Автор заметки')
+
+        def create_notes():
+            try:
+                for _ in range(self.NOTES_PER_THREAD):
+                    Note.objects.create(
+                        title='Одинаковый заголовок',
+                        text='Текст',
+                        author=author,
+                    )
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            futures = [
+                executor.submit(create_notes) for _ in range(self.THREADS)
+            ]
+        for future in futures:
+            future.result()
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), self.THREADS * self.NOTES_PER_THREAD)
+        self.assertEqual(len(set(slugs)), len(slugs))
+
+
+class TestSeedNotes(TestCase):
+
+    def test_seed_notes(self):
+        call_command(
+            'seed_notes', users=3, notes=4, batch_size=5, workers=1,
+            password='secret', stdout=StringIO(),
+        )
+        authors = User.objects.all()
+        self.assertEqual(authors.count(), 3)
+        self.assertTrue(all(
+            author.check_password('secret') for author in authors
+        ))
+        self.assertEqual(len({author.password for author in authors}), 1)
+        for author in authors:
+            notes = Note.objects.filter(author=author)
+            self.assertEqual(notes.count(), 4)
+            note = notes.first()
+            self.assertEqual(note.slug, f'{slugify(note.title)}-{note.pk}')
+            self.assertIn(note, search_notes(author, note.title))
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(set(slugs)), len(slugs))
+
+
+class TestParallelSeedNotes(TransactionTestCase):
+
+    def test_workers_write_disjoint_ranges(self):
+        call_command(
+            'seed_notes', users=4, notes=25, batch_size=10, workers=2,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Note.objects.count(), 100)
+        self.assertEqual(
+            Note.objects.values('author').distinct().count(), 4
+        )
@@ -0,0 +1,117 @@
+import tempfile
+import time
+from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from notes.profiling import (
+    RequestProfile, current_profile, instrument_templates, registry
+)
+
+User = get_user_model()
+
+
+class TestProfiling(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Автор')
+        cls.staff = User.objects.create_user(username='Сотрудник',
+                                             is_staff=True)
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='note', author=cls.author
+        )
+        cls.edit_url = reverse('notes:edit', args=(cls.note.slug,))
+        cls.profiling_url = reverse('notes:profiling')
+
+    def setUp(self):
+        registry.clear()
+        self.addCleanup(registry.clear)
+        # Middleware загружается при первом запросе клиента, поэтому
+        # клиенты создаются в каждом тесте заново.
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_sampling_off_records_nothing(self):
+        self.author_client.get(self.edit_url)
+        self.assertEqual(registry.report(), {})
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_get_and_post_recorded_separately(self):
+        self.author_client.get(self.edit_url)
+        self.author_client.post(
+            self.edit_url,
+            data={'title': 'Новый', 'text': 'Текст', 'slug': 'note'},
+        )
+        report = registry.report()
+        edit = report['notes:edit GET']
+        self.assertEqual(edit['count'], 1)
+        self.assertGreater(edit['queries'], 0)
+        self.assertGreater(edit['render_ms'], 0)
+        self.assertGreaterEqual(
+            edit['mean_ms'], edit['sql_ms'] + edit['render_ms']
+        )
+        self.assertEqual(sum(edit['histogram_ms'].values()), 1)
+        self.assertEqual(report['notes:edit POST']['count'], 1)
+
+    def test_cprofile_dumps_reported(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        directory = Path(temp_dir.name)
+        with override_settings(
+            PROFILING_SAMPLE_RATE=1, PROFILING_DUMP_DIR=directory
+        ):
+            self.author_client.get(self.edit_url)
+        self.assertEqual(
+            len(list((directory / 'notes_edit_GET').glob('*.prof'))), 1
+        )
+        out = StringIO()
+        call_command('profiling_report', dir=directory, stdout=out)
+        self.assertIn('notes_edit_GET: запросов 1', out.getvalue())
+
+    def test_cprofile_dumps_limited_per_page(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        directory = Path(temp_dir.name)
+        with override_settings(
+            PROFILING_SAMPLE_RATE=1, PROFILING_DUMP_DIR=directory,
+            PROFILING_DUMP_LIMIT=2,
+        ):
+            for _ in range(3):
+                self.author_client.get(self.edit_url)
+        self.assertEqual(
+            len(list((directory / 'notes_edit_GET').glob('*.prof'))), 2
+        )
+
+    def test_templates_rendered_outside_response_counted(self):
+        instrument_templates()
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            render_to_string('notes/list.html', {'object_list': []})
+        finally:
+            current_profile.reset(token)
+        self.assertGreater(profile.render, 0)
+        self.assertLessEqual(profile.render, time.perf_counter() - start)
+
+    def test_report_only_for_staff(self):
+        self.assertEqual(
+            Client().get(self.profiling_url).status_code, HTTPStatus.FOUND
+        )
+        self.assertEqual(
+            self.author_client.get(self.profiling_url).status_code,
+            HTTPStatus.FORBIDDEN,
+        )
+        staff_client = Client()
+        staff_client.force_login(self.staff)
+        response = staff_client.get(self.profiling_url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json(), {})
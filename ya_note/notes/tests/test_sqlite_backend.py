@@ -0,0 +1,78 @@
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+from notes.db.base import DatabaseWrapper
+
+
+class TestSqliteBackend(SimpleTestCase):
+    """Соединения бэкенда notes.db с отдельным файлом базы."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.name = Path(directory.name) / 'tuned.sqlite3'
+
+    def open_database(self, **options):
+        wrapper = DatabaseWrapper(
+            {
+                **connection.settings_dict,
+                'ENGINE': 'notes.db',
+                'NAME': self.name,
+                'OPTIONS': options,
+            },
+            alias='tuned',
+        )
+        wrapper.inc_thread_sharing()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        wrapper = self.open_database()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        # 1 — NORMAL.
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -64 * 1024)
+
+    def test_pragmas_from_options(self):
+        wrapper = self.open_database(pragmas={'busy_timeout': 100}, timeout=1)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 100)
+
+    def test_concurrent_read_then_write_transactions(self):
+        """
+        Транзакции, которые сначала читают, а потом пишут, с обычным
+        бэкендом падают с «database is locked».
+        """
+        setup = self.open_database()
+        with setup.cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (value INTEGER)')
+        local = threading.local()
+
+        def write(_):
+            if not hasattr(local, 'wrapper'):
+                local.wrapper = self.open_database()
+            wrapper = local.wrapper
+            wrapper._start_transaction_under_autocommit()
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM counter')
+                (count,) = cursor.fetchone()
+                cursor.execute('INSERT INTO counter VALUES (%s)', (count,))
+            wrapper.commit()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(write, range(40)))
+        with setup.cursor() as cursor:
+            cursor.execute('SELECT value FROM counter ORDER BY value')
+            values = [value for (value,) in cursor.fetchall()]
+        # Писатели шли строго по очереди: каждый видел все прошлые записи.
+        self.assertEqual(values, list(range(40)))
@@ -36,6 +36,7 @@ class TestUrls(TestCase):
             (reverse('users:logout'), self.default_client, HTTPStatus.OK),
             (reverse('users:signup'), self.default_client, HTTPStatus.OK),
             (reverse('notes:list'), self.author_client, HTTPStatus.OK),
+            (reverse('notes:search'), self.author_client, HTTPStatus.OK),
             (reverse('notes:edit', args=(self.note.slug,)),
              self.author_client, HTTPStatus.OK),
             (reverse('notes:detail', args=(self.note.slug,)),
@@ -65,6 +66,7 @@ class TestUrls(TestCase):
         login_url = reverse('users:login')
         urls = [
             reverse('notes:list'),
+            reverse('notes:search'),
             reverse('notes:add'),
             reverse('notes:success'),
             reverse('notes:detail', args=(self.note.slug,)),
@@ -1,15 +1,27 @@
+from django.conf import settings
 from django.urls import path
 
-from notes import views
+from notes import api, async_views, views
 
 app_name = 'notes'
 
+if settings.NOTES_ASYNC_VIEWS:
+    notes_list = async_views.notes_list
+    note_detail = async_views.note_detail
+else:
+    notes_list = views.NotesList.as_view()
+    note_detail = views.NoteDetail.as_view()
+
 urlpatterns = [
     path('', views.Home.as_view(), name='home'),
     path('add/', views.NoteCreate.as_view(), name='add'),
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
-    path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
+    path('note/<slug:slug>/', note_detail, name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
-    path('notes/', views.NotesList.as_view(), name='list'),
+    path('notes/', notes_list, name='list'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path('profiling/', views.ProfilingReport.as_view(), name='profiling'),
+    path('metrics/', views.PrometheusMetrics.as_view(), name='metrics'),
+    path('api/notes/', api.NotesApi.as_view(), name='api_notes'),
 ]
@@ -1,9 +1,18 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.conf import settings
+from django.contrib.auth.mixins import (
+    LoginRequiredMixin, UserPassesTestMixin
+)
+from django.http import Http404, HttpResponse, JsonResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
+from .conditional import ConditionalGetMixin
 from .forms import NoteForm
+from .instrumentation import metrics
 from .models import Note
+from .pagination import KeysetPaginationMixin
+from .profiling import registry
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -16,6 +25,23 @@ class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
     template_name = 'notes/success.html'
 
 
+class ObjectMemoMixin:
+    """
+    get_object() обращается к базе один раз за запрос.
+
+    Повторный вызов без queryset (из get_success_url, шаблона или
+    другого миксина) возвращает уже загруженный объект: экземпляр view
+    создаётся заново для каждого запроса.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+
 class NoteBase(LoginRequiredMixin):
     """Базовый класс для остальных CBV."""
     model = Note
@@ -32,28 +58,92 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """Автор задаётся до сохранения, и заметка пишется одним INSERT."""
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, ObjectMemoMixin, generic.UpdateView):
     """Редактирование заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
 
-class NoteDelete(NoteBase, generic.DeleteView):
+class NoteDelete(NoteBase, ObjectMemoMixin, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
 
 
-class NotesList(NoteBase, generic.ListView):
+class NotesList(NoteBase, KeysetPaginationMixin, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
+    ordering = ('id',)
+
+    def get_queryset(self):
+        """
+        Заметки автора постранично, по курсору на id.
 
+        Загружаются только поля, которые выводит шаблон: текст
+        заметки может быть длинным, а в списке он не нужен.
+        """
+        return super().get_queryset().only('id', 'slug', 'title')
 
-class NoteDetail(NoteBase, generic.DetailView):
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_COUNT_ON_PAGE
+
+
+class NoteDetail(
+        NoteBase, ConditionalGetMixin, ObjectMemoMixin, generic.DetailView
+):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+    def get_validators(self):
+        """
+        Заметка и время её изменения.
+
+        Загруженная заметка запоминается и для рендера страницы, поэтому
+        ответ 200 не делает лишнего запроса.
+        """
+        note = self.get_object()
+        return (note.pk, note.updated), note.updated
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        return search_notes(
+            self.request.user, self.request.GET.get('q', '')
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class ProfilingReport(UserPassesTestMixin, generic.View):
+    """Сводка ProfilingMiddleware по страницам, только для сотрудников."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(
+            registry.report(), json_dumps_params={'ensure_ascii': False}
+        )
+
+
+class PrometheusMetrics(generic.View):
+    """Счётчики SQL-запросов для Prometheus, только с разрешённых адресов."""
+
+    def get(self, request, *args, **kwargs):
+        if request.META.get('REMOTE_ADDR') not in (
+                settings.METRICS_ALLOWED_IPS):
+            raise Http404
+        return HttpResponse(
+            metrics.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
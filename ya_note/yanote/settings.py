@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,6 +23,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.profiling.ProfilingMiddleware',
+    'notes.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,9 +59,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Тестовая база в файле, а не в памяти: общая база в памяти
+        # блокирует таблицы целиком, и тесты с потоками падают.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# SQLITE_PROFILE=production включает бэкенд notes.db (WAL, PRAGMA, очередь
+# писателей) и постоянные соединения вместо открытия файла на каждый запрос.
+if os.environ.get('SQLITE_PROFILE') == 'production':
+    DATABASES['default'].update(ENGINE='notes.db', CONN_MAX_AGE=600)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -70,6 +81,55 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# SQL-запросы страниц пишутся в лог notes.sql строками JSON: медленные и
+# повторные — на уровне WARNING, все остальные — на уровне DEBUG.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'notes.instrumentation.JsonFormatter'},
+    },
+    'handlers': {
+        'json_console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'notes.sql': {
+            'handlers': ['json_console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Сессии и пользователь сессии из кэша (CachedModelBackend) работают
+# только с кэшем, общим для всех процессов сайта: с LocMemCache выход и
+# смена пароля сбрасывали бы кэш лишь в своём процессе, и в остальных
+# сессия продолжала бы действовать. Поэтому по умолчанию сессии в БД, а
+# SHARED_CACHE_DIR=<каталог> включает общий файловый кэш и вместе с ним
+# кэшированные сессии и пользователя. Для memcached или Redis задайте
+# CACHES сами; проверка notes.E001 не даст включить их с LocMemCache.
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 60
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+if os.environ.get('SHARED_CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['SHARED_CACHE_DIR'],
+    }
+    AUTHENTICATION_BACKENDS = ['notes.auth.CachedModelBackend']
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
 LANGUAGE_CODE = 'ru'
 
 TIME_ZONE = 'Europe/Moscow'
@@ -87,3 +147,43 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# Сколько последних заголовков помнит кэш транслитерации slug.
+NOTES_SLUG_CACHE_SIZE = 4096
+
+NOTES_COUNT_ON_PAGE = 50
+
+# Сколько заметок показывать в результатах поиска.
+NOTES_SEARCH_LIMIT = 50
+# Ранжировать только столько самых новых совпадений (None — все). Быстрее
+# на частых словах, но старые релевантные заметки в выдачу не попадут.
+NOTES_SEARCH_CANDIDATES = None
+
+# Доля запросов, которые замеряет ProfilingMiddleware (0 — отключено).
+PROFILING_SAMPLE_RATE = 0
+
+# Каталог для дампов cProfile замеренных запросов; None — без cProfile.
+PROFILING_DUMP_DIR = None
+# Сколько последних дампов хранить для каждой страницы.
+PROFILING_DUMP_LIMIT = 200
+
+# SQL-запросы дольше порога логируются как медленные, мс.
+SQL_SLOW_QUERY_MS = 100
+
+# Параметры повторённых SQL-запросов в логе duplicate_query. В них бывают
+# пароли и личные данные, поэтому включать только для отладки.
+SQL_LOG_PARAMS = False
+
+# Адреса, с которых Prometheus может забирать счётчики со страницы /metrics/.
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Под ASGI отдавать список и страницу заметки асинхронными view
+# (notes.async_views), которые ходят в БД из пула в ASYNC_DB_THREADS потоков.
+NOTES_ASYNC_VIEWS = False
+ASYNC_DB_THREADS = 8
+
+# Размер страницы списка JSON API и наибольший размер пачки заметок.
+# Проверка slug пачки — один запрос до трёх параметров на заметку, а
+# SQLite по умолчанию принимает не больше 999 параметров.
+API_PAGE_SIZE = 100
+API_BATCH_SIZE = 300